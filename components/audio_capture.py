@@ -0,0 +1,263 @@
+"""
+Shared microphone capture engine.
+
+A single long-lived thread reads 16 kHz int16 frames from one PortAudio input
+stream into a preallocated ring buffer. Wake word detection, VAD and STT read
+from that buffer through independent cursors, so the device is opened once per
+process and no samples are dropped between stages.
+"""
+
+import logging
+import threading
+
+import numpy as np
+import pyaudio
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Audio settings shared by every consumer of the microphone
+FORMAT = pyaudio.paInt16
+CHANNELS = 1
+RATE = 16000
+CHUNK = 512  # Matches Porcupine's frame length at 16 kHz
+
+
+class RingBuffer:
+    """
+    Preallocated int16 ring buffer addressed by absolute sample position.
+
+    Positions count every sample ever written, so readers can tell how far
+    behind the writer they are and whether their data has been overwritten.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._write_pos = 0
+        self._cond = threading.Condition()
+
+    @property
+    def write_pos(self) -> int:
+        """Absolute position one past the newest sample."""
+        return self._write_pos
+
+    @property
+    def oldest_pos(self) -> int:
+        """Absolute position of the oldest sample still held in the buffer."""
+        return max(0, self._write_pos - self.capacity)
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples, overwriting the oldest data when full."""
+        count = len(samples)
+        if count == 0:
+            return
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+            skipped = count - self.capacity
+            count = self.capacity
+        else:
+            skipped = 0
+
+        with self._cond:
+            start = (self._write_pos + skipped) % self.capacity
+            first = min(count, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            if first < count:
+                self._data[:count - first] = samples[first:]
+            self._write_pos += skipped + count
+            self._cond.notify_all()
+
+    def wait_for(self, position: int, timeout: float | None = None) -> bool:
+        """Block until the writer has reached `position`. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._write_pos >= position, timeout)
+
+    def read_into(self, position: int, out: np.ndarray) -> None:
+        """
+        Copy `len(out)` samples starting at `position` into `out`.
+
+        Raises:
+            ValueError: If the requested range is not held in the buffer
+        """
+        count = len(out)
+        with self._cond:
+            if position < self.oldest_pos or position + count > self._write_pos:
+                raise ValueError(
+                    f"Samples {position}-{position + count} not available "
+                    f"(buffer holds {self.oldest_pos}-{self._write_pos})"
+                )
+            start = position % self.capacity
+            first = min(count, self.capacity - start)
+            out[:first] = self._data[start:start + first]
+            if first < count:
+                out[first:] = self._data[:count - first]
+
+
+class CaptureCursor:
+    """Independent read position into a RingBuffer."""
+
+    def __init__(self, ring: RingBuffer, position: int):
+        self._ring = ring
+        self.position = position
+        self.overruns = 0
+
+    @property
+    def available(self) -> int:
+        """Number of captured samples not yet read by this cursor."""
+        return self._ring.write_pos - self.position
+
+    def seek(self, position: int) -> None:
+        """Move the cursor, clamped to the audio still held in the buffer."""
+        self.position = min(max(position, self._ring.oldest_pos), self._ring.write_pos)
+
+    def read_into(self, out: np.ndarray, timeout: float | None = None) -> bool:
+        """
+        Fill `out` with the next samples, waiting for the capture thread if needed.
+
+        Returns:
+            True if `out` was filled, False if `timeout` expired first
+        """
+        count = len(out)
+        if not self._ring.wait_for(self.position + count, timeout):
+            return False
+        if self.position < self._ring.oldest_pos:
+            # The reader fell a full buffer behind; jump to the oldest data we still have
+            skipped = self._ring.oldest_pos - self.position
+            self.overruns += 1
+            logger.warning(f"Capture cursor overrun, skipped {skipped} samples")
+            self.position = self._ring.oldest_pos
+            if not self._ring.wait_for(self.position + count, timeout):
+                return False
+        self._ring.read_into(self.position, out)
+        self.position += count
+        return True
+
+    def read(self, count: int, timeout: float | None = None) -> np.ndarray | None:
+        """Return the next `count` samples, or None if `timeout` expired first."""
+        out = np.empty(count, dtype=np.int16)
+        return out if self.read_into(out, timeout) else None
+
+    def read_bytes(self, count: int, timeout: float | None = None) -> bytes | None:
+        """Return the next `count` samples as little-endian PCM bytes."""
+        samples = self.read(count, timeout)
+        return samples.tobytes() if samples is not None else None
+
+
+class AudioCapture:
+    """Owns the single PortAudio input stream and the thread that drains it."""
+
+    def __init__(self, rate: int = RATE, chunk: int = CHUNK, buffer_seconds: float = 20.0):
+        self.rate = rate
+        self.chunk = chunk
+        self.ring = RingBuffer(int(rate * buffer_seconds))
+        self.pyaudio_instance = None
+        self._stream = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._error = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Open the input device and start the capture thread (idempotent)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._error = None
+        self.pyaudio_instance = pyaudio.PyAudio()
+        try:
+            self._stream = self.pyaudio_instance.open(format=FORMAT,
+                                                      channels=CHANNELS,
+                                                      rate=self.rate,
+                                                      input=True,
+                                                      frames_per_buffer=self.chunk)
+        except Exception:
+            self.pyaudio_instance.terminate()
+            self.pyaudio_instance = None
+            raise
+        self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+        self._thread.start()
+        logger.info(f"Audio capture started ({self.rate} Hz, {self.chunk}-sample frames)")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Use exception_on_overflow=False to drop frames instead of crashing
+                data = self._stream.read(self.chunk, exception_on_overflow=False)
+            except Exception as e:
+                if not self._stop.is_set():
+                    self._error = e
+                    logger.error(f"Audio capture error: {e}")
+                return
+            self.ring.write(np.frombuffer(data, dtype=np.int16))
+
+    def stop(self) -> None:
+        """Stop the capture thread and release the input device."""
+        self._stop.set()
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception as e:
+                logger.warning(f"Error closing audio stream: {e}")
+            self._stream = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.pyaudio_instance is not None:
+            try:
+                self.pyaudio_instance.terminate()
+            except Exception as e:
+                logger.warning(f"Error terminating PyAudio: {e}")
+            self.pyaudio_instance = None
+
+    def recent(self, count: int) -> np.ndarray:
+        """Return a copy of up to `count` of the most recently captured samples."""
+        start = max(self.ring.write_pos - count, self.ring.oldest_pos)
+        out = np.empty(self.ring.write_pos - start, dtype=np.int16)
+        self.ring.read_into(start, out)
+        return out
+
+    def open_cursor(self, lookback_samples: int = 0) -> CaptureCursor:
+        """
+        Create a cursor at the live edge of the capture.
+
+        Args:
+            lookback_samples: Start this many samples in the past (clamped to the buffer)
+        """
+        if self._error is not None:
+            raise OSError(f"Audio capture stopped: {self._error}")
+        cursor = CaptureCursor(self.ring, self.ring.write_pos)
+        cursor.seek(self.ring.write_pos - lookback_samples)
+        return cursor
+
+
+_capture = None
+_capture_lock = threading.Lock()
+
+
+def get_capture() -> AudioCapture:
+    """Return the process-wide capture engine, starting it on first use."""
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            _capture = AudioCapture(buffer_seconds=config.AUDIO_BUFFER_SECONDS)
+        if not _capture.running:
+            _capture.start()
+        return _capture
+
+
+def shutdown_capture() -> None:
+    """Stop the shared capture engine if it was started."""
+    global _capture
+    with _capture_lock:
+        if _capture is not None:
+            _capture.stop()
+            _capture = None
+
@@ -0,0 +1,196 @@
+"""
+Callback-mode speaker output.
+
+PortAudio pulls audio from a preallocated int16 jitter buffer on its own
+thread, so a synthesizer or recognizer hogging the CPU delays the writer
+rather than the device. Playback of an utterance only starts once
+`target_latency_ms` of audio is queued, and every callback that finds the
+buffer empty mid-utterance is counted as an underrun so buffer sizes can be
+tuned per device.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+import pyaudio
+
+from components.pcm import PCM16
+
+logger = logging.getLogger(__name__)
+
+# How long a writer waits for the device to consume audio before giving up
+STALL_SECONDS = 2.0
+
+
+class AudioOutput:
+    """
+    Mono 16-bit output stream fed through a jitter buffer.
+
+    Args:
+        pyaudio_instance: PyAudio instance to open the stream on
+        rate: Sample rate of the audio that will be written
+        frames_per_buffer: Frames PortAudio requests per callback
+        target_latency_ms: Audio queued before an utterance starts playing
+        buffer_ms: Jitter buffer capacity; writers block when it is full
+    """
+
+    def __init__(self, pyaudio_instance, rate: int, frames_per_buffer: int = 512,
+                 target_latency_ms: float = 150, buffer_ms: float = 2000):
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.target_frames = max(1, int(rate * target_latency_ms / 1000))
+        capacity = max(int(rate * buffer_ms / 1000), self.target_frames + frames_per_buffer)
+        self._ring = np.zeros(capacity, dtype=PCM16)
+        self._out = np.zeros(frames_per_buffer, dtype=PCM16)
+        # Absolute sample positions; buffered audio is ring[read_pos:write_pos]
+        self._read_pos = 0
+        self._write_pos = 0
+        self._playing = False  # Primed and draining the buffer
+        self._ending = False  # Writer has queued the last of the current utterance
+        self._cond = threading.Condition()
+        self.underruns = 0
+        self.device_underflows = 0
+        self._stream = pyaudio_instance.open(
+            rate=rate,
+            channels=1,
+            format=pyaudio.paInt16,
+            output=True,
+            frames_per_buffer=frames_per_buffer,
+            stream_callback=self._callback)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._ring)
+
+    @property
+    def buffered(self) -> int:
+        """Samples queued and not yet handed to the device."""
+        return self._write_pos - self._read_pos
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """PortAudio callback: copy queued samples out, padding with silence."""
+        if status & pyaudio.paOutputUnderflow:
+            self.device_underflows += 1
+        if frame_count > len(self._out):
+            self._out = np.zeros(frame_count, dtype=PCM16)
+        out = self._out[:frame_count]
+
+        with self._cond:
+            available = self._write_pos - self._read_pos
+            if not self._playing and available and (available >= self.target_frames or self._ending):
+                self._playing = True
+            count = min(available, frame_count) if self._playing else 0
+            if count:
+                start = self._read_pos % self.capacity
+                first = min(count, self.capacity - start)
+                out[:first] = self._ring[start:start + first]
+                if first < count:
+                    out[first:count] = self._ring[:count - first]
+                self._read_pos += count
+                self._cond.notify_all()
+            if self._playing and count < frame_count:
+                # Starved before the writer said the utterance was over: a real underrun.
+                # Re-prime so playback resumes with a full target latency of headroom.
+                if not self._ending:
+                    self.underruns += 1
+                self._playing = False
+        out[count:] = 0
+        return out.tobytes(), pyaudio.paContinue
+
+    def _wait(self, predicate, cancel: threading.Event | None) -> bool:
+        """
+        Wait on the buffer condition until `predicate` holds.
+
+        Returns:
+            False if `cancel` was set first
+
+        Raises:
+            OSError: If the device stops consuming audio
+        """
+        deadline = time.monotonic() + STALL_SECONDS
+        consumed = self._read_pos
+        while not predicate():
+            if cancel is not None and cancel.is_set():
+                return False
+            if self._read_pos != consumed:
+                consumed = self._read_pos
+                deadline = time.monotonic() + STALL_SECONDS
+            elif time.monotonic() > deadline:
+                raise OSError("Audio output stalled")
+            self._cond.wait(0.05)
+        return True
+
+    def write(self, audio_bytes: bytes, cancel: threading.Event | None = None) -> bool:
+        """
+        Queue 16-bit PCM, blocking while the jitter buffer is full.
+
+        Args:
+            audio_bytes: Little-endian 16-bit mono PCM at `rate`
+            cancel: Stops queueing once set
+
+        Returns:
+            False if `cancel` stopped the write
+        """
+        samples = np.frombuffer(audio_bytes, dtype=PCM16, count=len(audio_bytes) // 2)
+        offset = 0
+        with self._cond:
+            self._ending = False
+            while offset < len(samples):
+                if not self._wait(lambda: self.buffered < self.capacity, cancel):
+                    return False
+                count = min(len(samples) - offset, self.capacity - self.buffered)
+                start = self._write_pos % self.capacity
+                first = min(count, self.capacity - start)
+                self._ring[start:start + first] = samples[offset:offset + first]
+                if first < count:
+                    self._ring[:count - first] = samples[offset + first:offset + count]
+                self._write_pos += count
+                offset += count
+        return True
+
+    def drain(self, cancel: threading.Event | None = None) -> bool:
+        """
+        Mark the end of an utterance and wait until it has been played.
+
+        A short utterance below the target latency starts playing now instead
+        of waiting for more audio. If `cancel` is set first, the rest of the
+        queued audio is dropped.
+
+        Returns:
+            False if playback was cancelled
+        """
+        with self._cond:
+            self._ending = True
+            if self._wait(lambda: self.buffered == 0, cancel):
+                return True
+        self.flush()
+        return False
+
+    def flush(self) -> None:
+        """Drop all queued audio; the device plays silence from its next callback."""
+        with self._cond:
+            self._read_pos = self._write_pos
+            self._playing = False
+            self._ending = False
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Report underrun counters and the current buffer fill."""
+        return {
+            "underruns": self.underruns,
+            "device_underflows": self.device_underflows,
+            "buffered_ms": 1000 * self.buffered / self.rate,
+            "target_latency_ms": 1000 * self.target_frames / self.rate,
+            "capacity_ms": 1000 * self.capacity / self.rate,
+        }
+
+    def close(self) -> None:
+        """Stop and close the PortAudio stream."""
+        self.flush()
+        try:
+            self._stream.stop_stream()
+        finally:
+            self._stream.close()
+        logger.info(f"Audio output closed: {self.stats()}")
@@ -0,0 +1,68 @@
+"""
+Local command handling module.
+
+Answers a small set of fixed commands on the device, without the LLM. Used by
+the fast command mode that a dedicated wake word routes to.
+"""
+
+import re
+import time
+
+# Registered commands: phrase -> handler returning the spoken reply
+_commands = {}
+
+
+def register_command(phrases, handler) -> None:
+    """
+    Register a handler for one or more spoken phrases.
+
+    Args:
+        phrases: Phrases that trigger the handler (matched case-insensitively)
+        handler: Callable taking the recognized text and returning the reply text
+    """
+    for phrase in phrases:
+        _commands[_normalize(phrase)] = handler
+
+
+def get_phrases() -> list[str]:
+    """Return all registered command phrases."""
+    return list(_commands)
+
+
+def handle_command(text: str) -> str | None:
+    """
+    Run the command matching the recognized text.
+
+    Args:
+        text: Transcribed user speech
+
+    Returns:
+        The reply to speak, or None if no command matches
+    """
+    normalized = _normalize(text)
+    handler = _commands.get(normalized)
+    if handler is None:
+        # Accept the phrase inside a longer utterance ("computer what time is it please")
+        for phrase, candidate in _commands.items():
+            if re.search(rf"\b{re.escape(phrase)}\b", normalized):
+                handler = candidate
+                break
+    return handler(text) if handler is not None else None
+
+
+def _normalize(text: str) -> str:
+    """Lower-case and strip punctuation so phrases compare like transcripts."""
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _tell_time(_text: str) -> str:
+    return time.strftime("It's %-I:%M %p.")
+
+
+def _tell_date(_text: str) -> str:
+    return time.strftime("Today is %A, %B %-d.")
+
+
+register_command(["what time is it", "what's the time", "tell me the time"], _tell_time)
+register_command(["what day is it", "what's the date", "what is the date", "what's today's date"], _tell_date)
@@ -3,6 +3,8 @@ Conversation history management module.
 
 Manages conversation history as a simple list of dictionaries,
 handles pruning, ending detection, and formatting for LLM consumption.
+Also tracks the Ollama context tokens for the transcript, so a turn can send
+only the new messages instead of the whole history.
 """
 
 import config
@@ -10,6 +12,16 @@ import config
 # Global conversation history
 conversation_history = []
 
+# Messages pruned from the front of the history since it was last cleared
+_dropped = 0
+# Ollama context tokens covering the first _llm_context_end messages of the
+# history, valid only while no message has been pruned since they were made
+_llm_context = None
+_llm_context_start = 0
+_llm_context_end = 0
+# Value of _dropped when the prompt for the pending request was built
+_prompt_start = 0
+
 # Configuration constants
 ENDING_PHRASES = [
     "goodbye",
@@ -47,7 +59,10 @@ def add_assistant_message(text: str) -> None:
 
 def clear_history() -> None:
     """Clear all conversation history."""
+    global _dropped
     conversation_history.clear()
+    _dropped = 0
+    _reset_llm_context()
 
 
 def get_history() -> list:
@@ -73,6 +88,8 @@ def _prune_history() -> None:
         excess = len(conversation_history) - max_messages
         for _ in range(excess):
             conversation_history.pop(0)
+        global _dropped
+        _dropped += excess
 
 
 def is_conversation_ending() -> bool:
@@ -110,10 +127,7 @@ def format_for_llm(provider: str = "ollama") -> str | list:
     if provider == "ollama":
         # Ollama format: system prompt + conversation history as text
         prompt = f"{system_message}\n\n"
-        for msg in conversation_history:
-            role = msg["role"].capitalize()
-            content = msg["content"]
-            prompt += f"{role}: {content}\n"
+        prompt += _format_messages(conversation_history)
         prompt += "Assistant:"
         return prompt
 
@@ -125,3 +139,54 @@ def format_for_llm(provider: str = "ollama") -> str | list:
 
     else:
         raise ValueError(f"Unknown provider: {provider}")
+
+
+def _format_messages(messages: list) -> str:
+    """Format messages as "Role: content" lines."""
+    return "".join(f"{msg['role'].capitalize()}: {msg['content']}\n" for msg in messages)
+
+
+def _reset_llm_context() -> None:
+    global _llm_context, _llm_context_start, _llm_context_end
+    _llm_context = None
+    _llm_context_start = 0
+    _llm_context_end = 0
+
+
+def prompt_for_llm() -> tuple[str, list | None]:
+    """
+    Build the next Ollama prompt, continuing from the stored context when possible.
+
+    With a valid context (OLLAMA_REUSE_CONTEXT), the prompt holds only the
+    messages added since that context was returned, so Ollama evaluates just
+    the new turn. After the history has been pruned, the context still holds
+    the dropped messages, so the full format_for_llm() prompt is used instead.
+
+    Returns:
+        Tuple of (prompt, context tokens or None)
+    """
+    global _prompt_start
+    _prompt_start = _dropped
+    if (config.OLLAMA_REUSE_CONTEXT and _llm_context is not None
+            and _llm_context_start == _dropped and _llm_context_end < len(conversation_history)):
+        return _format_messages(conversation_history[_llm_context_end:]) + "Assistant:", _llm_context
+    return format_for_llm(), None
+
+
+def set_llm_context(context: list | None) -> None:
+    """
+    Store the context Ollama returned with the reply just added to the history.
+
+    Args:
+        context: Context tokens covering the prompt from prompt_for_llm() and
+            the reply, or None (failed or interrupted reply) to fall back to
+            the full prompt next turn
+    """
+    global _llm_context, _llm_context_start, _llm_context_end
+    if not context or _prompt_start != _dropped:
+        # Pruned while the reply was generated: the tokens include dropped messages
+        _reset_llm_context()
+        return
+    _llm_context = context
+    _llm_context_start = _dropped
+    _llm_context_end = len(conversation_history)
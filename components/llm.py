@@ -1,37 +1,388 @@
-
 import requests
 import json
 import sys
 import os
+import threading
+import time
+from requests.adapters import HTTPAdapter
 
 # Add the parent directory to sys.path for module discovery
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from config import OLLAMA_API_URL, OLLAMA_MODEL_NAME
+from config import (
+    OLLAMA_API_URL,
+    OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_MAX_RETRIES,
+    OLLAMA_MODEL_NAME,
+    OLLAMA_READ_TIMEOUT,
+    OLLAMA_RETRY_BACKOFF,
+    OLLAMA_WARMUP,
+)
+
+# Replies returned in place of a generation; never worth caching or remembering
+NO_RESPONSE_MESSAGE = "Sorry, I couldn't generate a response."
+CONNECTION_ERROR_MESSAGE = "Sorry, I'm having trouble connecting to the language model."
+UNEXPECTED_ERROR_MESSAGE = "Sorry, an unexpected error occurred."
+ERROR_RESPONSES = {NO_RESPONSE_MESSAGE, CONNECTION_ERROR_MESSAGE, UNEXPECTED_ERROR_MESSAGE}
+
+# Statuses worth retrying: Ollama restarting, or a proxy in front of it timing out
+RETRY_STATUSES = {502, 503, 504}
 
-def generate_response(prompt):
+
+def _keep_alive_value(value):
     """
-    Generates a response from the local Ollama LLM.
+    Convert a keep_alive setting to what Ollama expects.
+
+    Bare numbers are seconds and must be sent as numbers; durations such as
+    "10m" are sent as strings. None or "" leaves Ollama's default in place.
     """
+    if value is None or str(value).strip() == "":
+        return None
+    value = str(value).strip()
+    try:
+        return int(value)
+    except ValueError:
+        pass
     try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class OllamaClient:
+    """
+    Reusable Ollama client on a pooled keep-alive HTTP session.
+
+    Every request reuses the session's TCP connection, is bounded by a connect
+    and a read timeout, and is retried with exponential backoff when the
+    connection fails or Ollama answers with a retryable status. Requests that
+    reached Ollama and timed out reading are not retried, since that would
+    repeat a slow generation. Latency of the last request is kept in
+    `last_latency`, and the `context` tokens Ollama returned for it (the
+    evaluated prompt plus the reply) in `last_context`.
+
+    Args:
+        url: Ollama generate endpoint
+        model: Model name sent with every request
+        connect_timeout: Seconds to wait for the TCP connection
+        read_timeout: Seconds to wait for the next bytes of the response
+            (for non-streaming requests, the whole generation)
+        max_retries: Retries after the first attempt
+        backoff: Delay before the first retry; doubled for each further retry
+        pool_size: Connections kept open in the pool
+        keep_alive: How long Ollama keeps the model loaded after each request,
+            e.g. "10m" or seconds; None for Ollama's default
+    """
+
+    def __init__(self, url: str = OLLAMA_API_URL, model: str = OLLAMA_MODEL_NAME,
+                 connect_timeout: float = 3.0, read_timeout: float = 60.0,
+                 max_retries: int = 2, backoff: float = 0.5, pool_size: int = 2,
+                 keep_alive=None):
+        self.url = url
+        self.model = model
+        self.keep_alive = _keep_alive_value(keep_alive)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.last_latency = None
+        self.last_context = None
+
+    def post(self, payload: dict, stream: bool = False):
+        """
+        POST a payload, retrying connection failures and retryable statuses.
+
+        Returns:
+            Tuple of (response, attempts made)
+
+        Raises:
+            requests.exceptions.RequestException: Once retries are exhausted,
+                or at once for errors that are not retried
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(self.url, json=payload, stream=stream, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response, attempt + 1
+                response.close()
+                error = f"HTTP {response.status_code}"
+            except requests.exceptions.ConnectionError as e:
+                if attempt >= self.max_retries:
+                    raise
+                error = e
+            delay = self.backoff * 2 ** attempt
+            attempt += 1
+            print(f"Ollama request failed ({error}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _payload(self, prompt: str, stream: bool, context: list | None = None) -> dict:
         payload = {
-            "model": OLLAMA_MODEL_NAME,
+            "model": self.model,
             "prompt": prompt,
-            "stream": False
+            "stream": stream
+        }
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if context:
+            payload["context"] = context
+        return payload
+
+    @staticmethod
+    def _describe(payload: dict) -> dict:
+        """Payload for logging, with the context token array summarized."""
+        if "context" not in payload:
+            return payload
+        return {**payload, "context": f"<{len(payload['context'])} tokens>"}
+
+    def _record(self, started: float, response_at: float, first_token_at: float | None,
+                attempts: int, final: dict | None) -> dict:
+        """Store and print the latency of a finished request."""
+        now = time.monotonic()
+        latency = {
+            "attempts": attempts,
+            "response_ms": 1000 * (response_at - started),
+            "first_token_ms": 1000 * (first_token_at - started) if first_token_at is not None else None,
+            "total_ms": 1000 * (now - started),
         }
-        print(f"Sending payload to Ollama: {payload}")
-        response = requests.post(OLLAMA_API_URL, json=payload)
+        # Ollama reports its own timings (in nanoseconds) on the final chunk
+        if final:
+            for key in ("load_duration", "prompt_eval_duration", "eval_duration"):
+                if key in final:
+                    latency[key.replace("_duration", "_ms")] = final[key] / 1e6
+            if "eval_count" in final:
+                latency["eval_count"] = final["eval_count"]
+        self.last_latency = latency
+        first = f"{latency['first_token_ms']:.0f} ms" if first_token_at is not None else "n/a"
+        print(f"Ollama latency: first token {first}, total {latency['total_ms']:.0f} ms, "
+              f"{attempts} attempt(s)")
+        return latency
+
+    def generate(self, prompt: str, context: list | None = None) -> dict:
+        """
+        Request a complete (non-streaming) generation.
+
+        Args:
+            prompt: Prompt text; with `context`, only the text that follows it
+            context: Tokens from an earlier reply to continue from
+
+        Returns:
+            Ollama's response JSON
+        """
+        self.last_context = None
+        payload = self._payload(prompt, stream=False, context=context)
+        print(f"Sending payload to Ollama: {self._describe(payload)}")
+        started = time.monotonic()
+        response, attempts = self.post(payload)
+        print(f"Ollama response status code: {response.status_code}")
+        response_at = time.monotonic()
+        data = response.json()
+        print(f"Ollama response text: {data.get('response')}")
+        self._record(started, response_at, response_at, attempts, data)
+        self.last_context = data.get("context")
+        return data
+
+    def stream(self, prompt: str, context: list | None = None):
+        """
+        Request a streaming generation.
+
+        Args:
+            prompt: Prompt text; with `context`, only the text that follows it
+            context: Tokens from an earlier reply to continue from
+
+        Yields:
+            Decoded NDJSON chunks, up to and including the one marked done
+
+        Raises:
+            ValueError: If Ollama reports an error in the stream
+        """
+        self.last_context = None
+        payload = self._payload(prompt, stream=True, context=context)
+        print(f"Sending streaming payload to Ollama: {self._describe(payload)}")
+        started = time.monotonic()
+        response, attempts = self.post(payload, stream=True)
         print(f"Ollama response status code: {response.status_code}")
-        print(f"Ollama response text: {response.text}")
-        response.raise_for_status()  # Raise an exception for bad status codes
+        response_at = time.monotonic()
+        first_token_at = None
+        final = None
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise ValueError(f"Ollama error: {chunk['error']}")
+                if first_token_at is None and chunk.get("response"):
+                    first_token_at = time.monotonic()
+                if chunk.get("done"):
+                    final = chunk
+                yield chunk
+                if final is not None:
+                    break
+        finally:
+            response.close()
+            self._record(started, response_at, first_token_at, attempts, final)
+            # Only a reply that ran to completion leaves a usable context
+            if final is not None:
+                self.last_context = final.get("context")
+
+    def warm_up(self) -> float:
+        """
+        Load the model into memory without generating anything.
+
+        Ollama loads the model for a request with an empty prompt and keeps it
+        for `keep_alive`, so the first real request does not pay the load.
+
+        Returns:
+            Seconds the request took
+        """
+        started = time.monotonic()
+        response, _ = self.post(self._payload("", stream=False))
+        response.close()
+        return time.monotonic() - started
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> OllamaClient:
+    """Return the process-wide Ollama client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient(
+                connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+                read_timeout=OLLAMA_READ_TIMEOUT,
+                max_retries=OLLAMA_MAX_RETRIES,
+                backoff=OLLAMA_RETRY_BACKOFF,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+            )
+        return _client
+
 
+_warmup = None
+
+
+def warm_up_llm() -> threading.Thread | None:
+    """
+    Start loading the model in the background.
+
+    Called when the wake word fires so the model load overlaps the greeting
+    and the user's first request. Does nothing when OLLAMA_WARMUP is off or a
+    warm-up is already running.
+
+    Returns:
+        The warm-up thread, or None if none was started
+    """
+    global _warmup
+    if not OLLAMA_WARMUP:
+        return None
+    with _client_lock:
+        if _warmup is not None and _warmup.is_alive():
+            return None
+        _warmup = threading.Thread(target=_run_warm_up, name="llm-warmup", daemon=True)
+        _warmup.start()
+        return _warmup
+
+
+def _run_warm_up() -> None:
+    try:
+        elapsed = get_llm_client().warm_up()
+        print(f"Ollama model {OLLAMA_MODEL_NAME} ready ({elapsed * 1000:.0f} ms)")
+    except Exception as e:
+        print(f"Ollama warm-up failed: {e}")
+
+
+def shutdown_llm() -> None:
+    """Close the Ollama client; called once at shutdown."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_last_context() -> list | None:
+    """
+    Context tokens of the last completed reply, to continue the conversation from.
+
+    Returns:
+        Ollama's context array, or None if the last request failed, was cut
+        short, or nothing has been sent yet
+    """
+    with _client_lock:
+        return _client.last_context if _client is not None else None
+
+
+def generate_response(prompt, context=None):
+    """
+    Generates a response from the local Ollama LLM.
+
+    Args:
+        prompt: Prompt text; with `context`, only the new part of the conversation
+        context: Context tokens from the previous reply (see get_last_context())
+    """
+    try:
         # The response from Ollama is a JSON object, with the response in the 'response' key
-        response_data = response.json()
-        return response_data.get("response", "Sorry, I couldn't generate a response.")
+        response_data = get_llm_client().generate(prompt, context)
+        return response_data.get("response", NO_RESPONSE_MESSAGE)
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error connecting to Ollama: {e}")
+        return CONNECTION_ERROR_MESSAGE
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return UNEXPECTED_ERROR_MESSAGE
+
+
+def stream_response(prompt, context=None, cancel=None):
+    """
+    Streams a response from the local Ollama LLM as it is generated.
+
+    Ollama sends one JSON object per line; the text of each line is yielded
+    as soon as it arrives. Closing the generator closes the connection, which
+    makes Ollama stop generating.
+
+    Args:
+        prompt: Prompt text; with `context`, only the new part of the conversation
+        context: Context tokens from the previous reply (see get_last_context())
+        cancel: threading.Event checked for every token; once set, the
+            connection is closed and the generator ends
+
+    Yields:
+        Pieces of the response text, in order
+    """
+    produced = False
+    chunks = None
+    try:
+        chunks = get_llm_client().stream(prompt, context)
+        for chunk in chunks:
+            if cancel is not None and cancel.is_set():
+                print("Ollama stream cancelled")
+                break
+            text = chunk.get("response", "")
+            if text:
+                produced = True
+                yield text
 
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to Ollama: {e}")
-        return "Sorry, I'm having trouble connecting to the language model."
+        if not produced:
+            yield CONNECTION_ERROR_MESSAGE
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
-        return "Sorry, an unexpected error occurred."
+        if not produced:
+            yield UNEXPECTED_ERROR_MESSAGE
+    finally:
+        if chunks is not None:
+            chunks.close()
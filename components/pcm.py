@@ -0,0 +1,87 @@
+"""
+PCM conversion helpers.
+
+Turns whatever a synthesizer hands back (bytes, NumPy arrays, lists of ints,
+nested lists, dicts of chunks) into one contiguous little-endian int16 buffer
+with vectorized NumPy operations instead of per-sample Python loops.
+"""
+
+import numpy as np
+
+PCM16 = np.dtype("<i2")
+_INT16_MIN, _INT16_MAX = -32768, 32767
+
+
+def _chunks(pcm):
+    """Yield the leaf containers of a nested PCM structure in order."""
+    if isinstance(pcm, dict):
+        for value in pcm.values():
+            yield from _chunks(value)
+    elif isinstance(pcm, (list, tuple)) and pcm and isinstance(pcm[0], (list, tuple, dict, bytes, bytearray, np.ndarray)):
+        for item in pcm:
+            yield from _chunks(item)
+    else:
+        yield pcm
+
+
+def _chunk_to_int16(chunk) -> np.ndarray:
+    """Convert one flat chunk (bytes or a sequence of numbers) to int16."""
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        usable = len(chunk) - len(chunk) % 2
+        return np.frombuffer(chunk, dtype=PCM16, count=usable // 2)
+    try:
+        array = np.asarray(chunk)
+    except ValueError:
+        # Ragged nesting such as [1, [2, 3]]: fall back to converting item by item
+        return np.concatenate([_chunk_to_int16(item if isinstance(item, (list, tuple)) else [item])
+                               for item in chunk] or [np.zeros(0, dtype=PCM16)])
+    if array.dtype == PCM16:
+        return array.ravel()
+    if array.dtype.kind in "iuf":
+        # Out-of-range values would wrap around; clip them to full scale instead
+        return np.clip(array, _INT16_MIN, _INT16_MAX).astype(PCM16).ravel()
+    # Mixed or object sequences: convert what converts, like the old per-sample path
+    values = []
+    for sample in array.ravel():
+        try:
+            values.append(int(sample))
+        except (TypeError, ValueError):
+            continue
+    return np.clip(np.asarray(values, dtype=np.int64), _INT16_MIN, _INT16_MAX).astype(PCM16)
+
+
+def to_int16(pcm) -> np.ndarray:
+    """
+    Convert synthesizer output to a contiguous little-endian int16 array.
+
+    Args:
+        pcm: bytes-like, NumPy array, sequence of numbers, or nested lists/dicts of those
+
+    Returns:
+        1-D C-contiguous int16 array; no copy is made when `pcm` already is one
+    """
+    if isinstance(pcm, np.ndarray) and pcm.dtype == PCM16 and pcm.ndim == 1 and pcm.flags.c_contiguous:
+        return pcm
+    parts = [_chunk_to_int16(chunk) for chunk in _chunks(pcm)]
+    if not parts:
+        return np.zeros(0, dtype=PCM16)
+    if len(parts) == 1:
+        return np.ascontiguousarray(parts[0])
+    return np.concatenate(parts)
+
+
+def pcm_to_bytes(pcm) -> bytes:
+    """
+    Convert synthesizer output to little-endian 16-bit PCM bytes for playback.
+
+    Args:
+        pcm: Anything accepted by to_int16()
+
+    Returns:
+        Raw PCM bytes
+    """
+    if isinstance(pcm, bytes):
+        return pcm
+    if isinstance(pcm, (bytearray, memoryview)):
+        return bytes(pcm)
+    return to_int16(pcm).tobytes()
@@ -0,0 +1,223 @@
+"""
+Cache of LLM replies for repeated questions.
+
+Questions such as "what's the weather like" or "tell me a joke" come up again
+and again; answering them from a cache skips a full LLM generation. Entries
+are keyed by the normalized question (optionally plus the messages before
+it), expire after a TTL, live in a size-bounded in-memory LRU and can be
+persisted to SQLite so they survive restarts.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """
+    LRU cache of replies with a TTL and optional SQLite backing.
+
+    Args:
+        max_entries: Bound on entries held in memory and on disk
+        ttl_seconds: Age after which an entry is no longer used
+        db_path: SQLite file to persist entries in, or None for memory only
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0, db_path: str | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (response, created_at)
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    question TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache database unavailable, keeping entries in memory only: {e}")
+            self._db = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace."""
+        return _WHITESPACE.sub(" ", _PUNCTUATION.sub("", text.lower())).strip()
+
+    @classmethod
+    def key(cls, question: str, context=()) -> str:
+        """
+        Stable cache key for a question asked after the given messages.
+
+        Args:
+            question: The user's question
+            context: Texts of the messages before it; empty to key on the question alone
+        """
+        parts = [cls.normalize(text) for text in context] + [cls.normalize(question)]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _fresh(self, created_at: float, now: float) -> bool:
+        return now - created_at < self.ttl_seconds
+
+    def get(self, question: str, context=()) -> str | None:
+        """
+        Look up a cached reply.
+
+        Returns:
+            The reply, or None on a miss or an expired entry
+        """
+        key = self.key(question, context)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key)
+            if entry is not None and not self._fresh(entry[1], now):
+                self._remove(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self._touch(key, now)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, question: str, response: str, context=()) -> None:
+        """Store a reply in memory and, if configured, in SQLite."""
+        if not response:
+            return
+        key = self.key(question, context)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (response, now))
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, question, response, created_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, question, response, now, now),
+                )
+                self._db.execute("DELETE FROM response_cache WHERE created_at <= ?", (now - self.ttl_seconds,))
+                self._db.execute(
+                    "DELETE FROM response_cache WHERE key NOT IN "
+                    "(SELECT key FROM response_cache ORDER BY used_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to write response cache entry: {e}")
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        """Insert into the LRU and evict least recently used entries over the bound."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> tuple | None:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT response, created_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read response cache entry: {e}")
+            return None
+        return tuple(row) if row is not None else None
+
+    def _touch(self, key: str, now: float) -> None:
+        """Record a use in SQLite so eviction there follows recency too."""
+        if self._db is None:
+            return
+        try:
+            self._db.execute("UPDATE response_cache SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to update response cache entry: {e}")
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self._db is None:
+            return
+        try:
+            self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to delete response cache entry: {e}")
+
+    def stats(self) -> dict:
+        """Report hit/miss counters and the number of entries in memory."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+            }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Return the process-wide response cache, or None when it is disabled."""
+    global _cache
+    if not config.RESPONSE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            db_path = config.RESPONSE_CACHE_DB_PATH
+            _cache = ResponseCache(
+                max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+                ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS,
+                db_path=None if db_path.lower() == "none" else db_path,
+            )
+        return _cache
+
+
+def shutdown_response_cache() -> None:
+    """Close the response cache; called once at shutdown."""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            logger.info(f"Response cache: {_cache.stats()}")
+            _cache.close()
+            _cache = None
@@ -1,62 +1,337 @@
 
 import json
-import pyaudio
 import numpy as np
 import time
 import logging
-from vosk import Model, KaldiRecognizer
+import threading
+from typing import Iterator, NamedTuple
+
+import config
+from components.audio_capture import CHANNELS, FORMAT, RATE, get_capture
+from components.stt_engine import MODEL_PATH, STTEngine
+from components.vad import get_detector
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Path to your Vosk model
-MODEL_PATH = "models/vosk-model-small-en-us-0.15"
-
-# Audio settings
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-RATE = 16000
+# Audio settings (FORMAT, CHANNELS and RATE come from the shared capture engine)
 CHUNK = 512  # Reduced chunk size for faster VAD response
+CAPTURE_STALL_SECONDS = 2.0  # Give up if the capture thread delivers nothing for this long
+VAD_CALIBRATION_SECONDS = 1.0  # Recent audio used to seed the VAD noise floor
+
+
+_engine = None
+
+
+def get_engine() -> STTEngine:
+    """Return the process-wide STT engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = STTEngine()
+    return _engine
+
+
+def preload_model(background: bool = True) -> None:
+    """Start loading the Vosk model (or the decoding worker) before the first conversation."""
+    # Grammar decoding always runs in-process, so command mode and wake word verification need the local model too
+    if not config.STT_WORKER_PROCESS or config.STT_COMMAND_GRAMMAR or config.WAKE_VERIFY:
+        get_engine().preload(background=background)
+    if not config.STT_WORKER_PROCESS:
+        return
+    if background:
+        threading.Thread(target=get_worker, name="stt-worker-start", daemon=True).start()
+    else:
+        get_worker()
+
+
+class _LocalDecoder:
+    """Decodes an utterance on the calling thread with a recycled recognizer."""
+
+    def __init__(self, engine: STTEngine, grammar: list[str] | None = None):
+        self._engine = engine
+        self._grammar = grammar
+        self._recognizer = engine.acquire_recognizer(grammar)
+        self._last_partial = ""
+
+    def accept(self, samples: np.ndarray) -> list[tuple[str, str]]:
+        """
+        Feed samples and return new results as (kind, text) pairs.
+
+        Returns [("result", text)] when Vosk finalizes a segment, otherwise
+        [("partial", text)] if the partial hypothesis changed.
+        """
+        if self._recognizer.AcceptWaveform(samples.tobytes()):
+            self._last_partial = ""
+            return [("result", json.loads(self._recognizer.Result()).get("text", ""))]
+        partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        if partial != self._last_partial:
+            self._last_partial = partial
+            return [("partial", partial)]
+        return []
 
-def transcribe_audio():
+    def finalize(self) -> str:
+        return json.loads(self._recognizer.FinalResult()).get("text", "")
+
+    def close(self) -> None:
+        self._engine.release_recognizer(self._recognizer, self._grammar)
+
+
+_worker = None
+_worker_failed = False
+_worker_lock = threading.Lock()
+
+
+def get_worker():
     """
-    Captures audio from the microphone and transcribes it to text using Vosk.
+    Return the running STT worker process, starting it on first use.
+
+    Returns None if the worker cannot be started; callers then decode in-process.
+    """
+    global _worker, _worker_failed
+    from components.stt_worker import STTWorker
+
+    with _worker_lock:
+        if _worker_failed:
+            return None
+        if _worker is None or not _worker.running:
+            # Room for the longest utterance plus its pre-roll (and a grammar-fallback replay of it),
+            # with a second of headroom for the last read, so the worker never falls a lap behind
+            buffer_seconds = config.STT_MAX_UTTERANCE_SECONDS + config.STT_PREROLL_MS / 1000 + 1.0
+            _worker = STTWorker(MODEL_PATH, sample_rate=RATE, buffer_seconds=buffer_seconds)
+            try:
+                _worker.start()
+            except Exception as e:
+                logger.error(f"STT worker unavailable, decoding in-process: {e}")
+                _worker = None
+                _worker_failed = True
+        return _worker
+
+
+def shutdown_worker() -> None:
+    """Stop the STT worker process if one was started."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            _worker.stop()
+            _worker = None
+
+
+# Phrases accepted by the grammar-constrained command mode
+_command_phrases = []
+
+
+def register_command_phrases(phrases) -> None:
+    """
+    Register fixed command phrases for grammar-constrained recognition.
+
+    Phrases are lower-cased and must consist of words in the model's vocabulary.
+    """
+    for phrase in phrases:
+        phrase = phrase.strip().lower()
+        if phrase and phrase not in _command_phrases:
+            _command_phrases.append(phrase)
+
+
+def get_command_phrases() -> list[str]:
+    """Return a copy of the registered command phrases."""
+    return _command_phrases.copy()
+
+
+def _is_command(text: str) -> bool:
+    """True if a grammar pass produced a real command rather than [unk]."""
+    return bool(text) and "[unk]" not in text
+
+
+def _open_decoder(grammar: list[str] | None = None):
+    """
+    Use the worker process when enabled and available, otherwise decode in-process.
+
+    Grammar-constrained decoding is cheap and always runs in-process.
+    """
+    if grammar:
+        return _LocalDecoder(get_engine(), grammar)
+    if config.STT_WORKER_PROCESS:
+        worker = get_worker()
+        if worker is not None:
+            return worker.begin()
+    return _LocalDecoder(get_engine())
+
+
+# Absolute capture position where the last detected speech began, consumed by transcribe_audio(),
+# and the earliest position the pre-roll may reach back to
+_speech_start_pos = None
+_speech_start_floor = None
+
+
+def mark_speech_start(position: int, floor: int | None = None) -> None:
+    """
+    Record where speech began in the shared capture.
+
+    The next transcribe_audio() call starts decoding STT_PREROLL_MS before this
+    position instead of at the live edge, so the first syllable is not lost.
+
+    Args:
+        position: Capture position of the first speech chunk
+        floor: Earliest position the pre-roll may start at, e.g. the end of
+            the wake word, so audio before it is never transcribed
+    """
+    global _speech_start_pos, _speech_start_floor
+    _speech_start_pos = position
+    _speech_start_floor = floor
+
+
+def _open_transcription_cursor():
+    """Open a capture cursor at the pending speech start minus the pre-roll window."""
+    global _speech_start_pos, _speech_start_floor
+    capture = get_capture()
+    cursor = capture.open_cursor()
+    if _speech_start_pos is not None:
+        preroll_samples = int(capture.rate * config.STT_PREROLL_MS / 1000)
+        start = _speech_start_pos - preroll_samples
+        if _speech_start_floor is not None:
+            start = max(start, _speech_start_floor)
+        cursor.seek(start)
+        logger.debug(f"Starting transcription with {cursor.available} buffered samples of pre-roll")
+        _speech_start_pos = None
+        _speech_start_floor = None
+    return cursor
+
+
+def _trailing_silence(states: np.ndarray, frame_length: int, silence_so_far: int) -> int:
+    """
+    Update the trailing-silence run length (in samples) with new VAD frame states.
+
+    A long pre-roll drain that ends in silence is credited with exactly the
+    silence after its last speech frame.
+    """
+    speech = np.flatnonzero(states)
+    if speech.size == 0:
+        return silence_so_far + len(states) * frame_length
+    return (len(states) - speech[-1] - 1) * frame_length
+
+
+class TranscriptUpdate(NamedTuple):
+    """A transcription update: a partial hypothesis while speaking, then the final text."""
+    text: str
+    is_final: bool
+
+
+def _fall_back_to_open(grammar_decoder, heard: list[np.ndarray]):
+    """
+    Swap a grammar decoder for an open-vocabulary one primed with the audio heard so far.
 
     Returns:
-        str: Transcribed text from the audio input.
+        (decoder, events produced while replaying the heard audio)
+    """
+    decoder = _open_decoder()
+    grammar_decoder.close()
+    logger.debug("Command grammar returned [unk], falling back to open decoding")
+    events = decoder.accept(np.concatenate(heard)) if heard else []
+    return decoder, events
+
+
+def stream_transcription(endpoint_silence_ms: int | None = None,
+                         max_utterance_seconds: float | None = None,
+                         commands_only: bool | None = None) -> Iterator[TranscriptUpdate]:
+    """
+    Transcribe one utterance, yielding partial hypotheses as the user speaks.
+
+    Partial updates (is_final=False) are yielded whenever Vosk's PartialResult()
+    changes, so downstream stages can start work before the utterance ends.
+    The generator finishes after yielding exactly one final update.
+
+    If has_voice_activity() just fired, decoding starts from the audio that
+    triggered it (plus the configured pre-roll) rather than from silence.
+
+    With endpointing enabled the utterance is forced to a final result once
+    the speaker has been silent for `endpoint_silence_ms` or the utterance
+    reaches `max_utterance_seconds`, whichever comes first, so background
+    noise cannot keep the recognizer open indefinitely.
+
+    In command mode the recognizer is constrained to the phrases passed to
+    register_command_phrases(). If that pass yields "[unk]", the audio heard so
+    far is replayed into an open-vocabulary recognizer and decoding continues.
+
+    Args:
+        endpoint_silence_ms: Trailing silence that ends the utterance (default: config.STT_ENDPOINT_SILENCE_MS)
+        max_utterance_seconds: Hard cap on utterance length (default: config.STT_MAX_UTTERANCE_SECONDS)
+        commands_only: Try grammar-constrained decoding first (default: config.STT_COMMAND_GRAMMAR)
+
+    Yields:
+        TranscriptUpdate: partial updates, then the final one (empty text if an endpoint fired with nothing recognized)
 
     Raises:
         Exception: If audio capture or transcription fails.
     """
-    model = None
-    recognizer = None
-    audio = None
-    stream = None
+    if endpoint_silence_ms is None:
+        endpoint_silence_ms = config.STT_ENDPOINT_SILENCE_MS
+    if max_utterance_seconds is None:
+        max_utterance_seconds = config.STT_MAX_UTTERANCE_SECONDS
+    if commands_only is None:
+        commands_only = config.STT_COMMAND_GRAMMAR
+
+    detector = get_detector()
+    detector.energy_threshold = config.VAD_ENERGY_THRESHOLD
+    grammar = get_command_phrases() if commands_only else None
+    # Audio kept for replay while the grammar pass might still need the open fallback
+    heard = [] if grammar else None
+    decoder = None
 
     try:
-        model = Model(MODEL_PATH)
-        recognizer = KaldiRecognizer(model, RATE)
+        decoder = _open_decoder(grammar)
+        cursor = _open_transcription_cursor()
 
-        audio = pyaudio.PyAudio()
-        stream = audio.open(format=FORMAT,
-                            channels=CHANNELS,
-                            rate=RATE,
-                            input=True,
-                            frames_per_buffer=CHUNK)
+        endpoint_samples = int(RATE * endpoint_silence_ms / 1000)
+        max_samples = int(RATE * max_utterance_seconds)
+        utterance_samples = 0
+        silence_samples = 0
 
         print("Listening for command...")
 
         while True:
-            # Use exception_on_overflow=False to drop frames instead of crashing
-            # This prevents OSError: [Errno -9981] Input overflowed
-            data = stream.read(CHUNK, exception_on_overflow=False)
-
-            if recognizer.AcceptWaveform(data):
-                result = json.loads(recognizer.Result())
-                text = result.get("text", "")
-                if text:
+            # Drain everything already buffered in one call (the pre-roll on the first pass),
+            # otherwise wait for the next chunk
+            samples = cursor.read(max(cursor.available, CHUNK), timeout=CAPTURE_STALL_SECONDS)
+            if samples is None:
+                raise OSError("No audio received from the capture device")
+
+            if heard is not None:
+                heard.append(samples)
+
+            events = decoder.accept(samples)
+            while events:
+                kind, text = events.pop(0)
+                if heard is not None and kind == "result" and "[unk]" in text:
+                    decoder, events = _fall_back_to_open(decoder, heard)
+                    heard = None
+                    continue
+                if kind == "partial" and text and "[unk]" not in text:
+                    yield TranscriptUpdate(text, False)
+                elif kind == "result" and text:
                     logger.info(f"Recognized: {text}")
-                    return text
+                    yield TranscriptUpdate(text, True)
+                    return
+
+            if not config.STT_ENDPOINTING:
+                continue
+
+            utterance_samples += len(samples)
+            states = detector.classify(samples)
+            silence_samples = _trailing_silence(states, detector.frame_length, silence_samples)
+
+            if silence_samples >= endpoint_samples or utterance_samples >= max_samples:
+                reason = "trailing silence" if silence_samples >= endpoint_samples else "max utterance length"
+                text = decoder.finalize()
+                if heard is not None and not _is_command(text):
+                    decoder, events = _fall_back_to_open(decoder, heard)
+                    heard = None
+                    # A segment finalized during replay is followed by whatever the tail decodes to
+                    texts = [t for kind, t in events if kind == "result" and t]
+                    texts.append(decoder.finalize())
+                    text = " ".join(t for t in texts if t)
+                logger.info(f"Endpoint ({reason}) after {utterance_samples / RATE:.2f}s - Recognized: {text}")
+                yield TranscriptUpdate(text, True)
+                return
 
     except OSError as e:
         logger.error(f"Audio input error: {e}")
@@ -65,43 +340,68 @@ def transcribe_audio():
         logger.error(f"Transcription error: {e}")
         raise
     finally:
-        # Clean up resources in reverse order of creation
-        if stream is not None:
-            try:
-                stream.stop_stream()
-                stream.close()
-            except Exception as e:
-                logger.warning(f"Error closing audio stream: {e}")
-        if audio is not None:
-            try:
-                audio.terminate()
-            except Exception as e:
-                logger.warning(f"Error terminating PyAudio: {e}")
+        if decoder is not None:
+            decoder.close()
 
 
-def has_voice_activity(timeout_seconds: float = 10.0, energy_threshold: int = 500) -> bool:
+def transcribe_audio(endpoint_silence_ms: int | None = None,
+                     max_utterance_seconds: float | None = None,
+                     commands_only: bool | None = None):
     """
-    Detect voice activity using energy-based VAD.
+    Captures audio from the microphone and transcribes it to text using Vosk.
+
+    Blocking wrapper around stream_transcription() that discards partials.
+
+    Returns:
+        str: Transcribed text from the audio input (empty if an endpoint fired with nothing recognized).
+
+    Raises:
+        Exception: If audio capture or transcription fails.
+    """
+    text = ""
+    for update in stream_transcription(endpoint_silence_ms, max_utterance_seconds, commands_only):
+        if update.is_final:
+            text = update.text
+    return text
+
+
+def has_voice_activity(timeout_seconds: float = 10.0, energy_threshold: int = 500,
+                       start_position: int | None = None, stop_event: threading.Event | None = None) -> bool:
+    """
+    Detect voice activity using the adaptive multi-feature VAD.
 
     Listens for audio activity and returns True if voice is detected within
     the timeout period, False if timeout expires without detecting voice.
+    The detector's noise floor is re-seeded from the last second of captured
+    audio before listening, and `energy_threshold` acts as an absolute floor
+    under the adaptive gate for this call only; the shared detector's own
+    threshold is restored on return.
 
     Args:
         timeout_seconds: Maximum time to wait for voice activity (default: 10.0s)
-        energy_threshold: Energy level threshold for voice detection (default: 500)
+        energy_threshold: Minimum energy level for voice detection (default: 500)
+        start_position: Capture position to start listening from instead of the
+            live edge, e.g. the end of the wake word; the transcription pre-roll
+            never reaches back past it either (default: None)
+        stop_event: Stop listening and return False once this is set, e.g.
+            when the playback being monitored for barge-in ends (default: None)
 
     Returns:
         True if voice activity detected, False if timeout expires without voice
     """
-    audio = pyaudio.PyAudio()
-    stream = audio.open(format=FORMAT,
-                       channels=CHANNELS,
-                       rate=RATE,
-                       input=True,
-                       frames_per_buffer=CHUNK)
-
+    detector = get_detector()
+    previous_threshold = detector.energy_threshold
     try:
-        logger.debug(f"Waiting for voice activity (timeout: {timeout_seconds}s, threshold: {energy_threshold})")
+        capture = get_capture()
+        detector.energy_threshold = energy_threshold
+        detector.reset()
+        detector.calibrate(capture.recent(int(capture.rate * VAD_CALIBRATION_SECONDS)))
+
+        cursor = capture.open_cursor()
+        if start_position is not None:
+            cursor.seek(start_position)
+        logger.debug(f"Waiting for voice activity (timeout: {timeout_seconds}s, threshold: {energy_threshold}, "
+                     f"noise floor: {detector.noise_floor:.1f})")
         start_time = time.time()
 
         while True:
@@ -111,27 +411,22 @@ def has_voice_activity(timeout_seconds: float = 10.0, energy_threshold: int = 50
                 logger.debug(f"Voice activity timeout after {elapsed:.1f}s")
                 return False
 
-            # Read audio chunk with overflow protection
-            data = stream.read(CHUNK, exception_on_overflow=False)
-
-            # Convert bytes to numpy array
-            audio_array = np.frombuffer(data, dtype=np.int16)
-
-            # Calculate RMS energy
-            energy = np.abs(audio_array).mean()
+            if stop_event is not None and stop_event.is_set():
+                logger.debug("Voice activity monitoring stopped")
+                return False
 
-            logger.debug(f"Energy level: {energy:.1f} (threshold: {energy_threshold})")
+            # Wait for the next chunk, but never past the timeout (or so long a stop request goes unseen)
+            audio_array = cursor.read(CHUNK, timeout=min(timeout_seconds - elapsed, CAPTURE_STALL_SECONDS))
+            if audio_array is None:
+                continue
 
-            # Check if energy exceeds threshold
-            if energy > energy_threshold:
-                logger.info(f"Voice activity detected (energy: {energy:.1f})")
+            if detector.is_speech(audio_array):
+                logger.info(f"Voice activity detected (noise floor: {detector.noise_floor:.1f})")
+                mark_speech_start(cursor.position - len(audio_array), floor=start_position)
                 return True
 
     except Exception as e:
         logger.error(f"Error in voice activity detection: {e}")
         return False
-
     finally:
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+        detector.energy_threshold = previous_threshold
@@ -0,0 +1,143 @@
+"""
+Resident Vosk model and recognizer pool.
+
+Kept free of audio-device imports so offline tools and the decoding worker
+process can load the model without PortAudio installed.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+
+from vosk import Model, KaldiRecognizer
+
+logger = logging.getLogger(__name__)
+
+# Path to your Vosk model
+MODEL_PATH = "models/vosk-model-small-en-us-0.15"
+
+SAMPLE_RATE = 16000  # Matches the shared capture rate
+
+
+def _current_rss_kb() -> int:
+    """Return the resident set size of this process in KiB."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # Fall back to peak RSS where /proc is unavailable (macOS reports bytes)
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _grammar_key(grammar: list[str] | None) -> str | None:
+    """Vosk grammar JSON for a phrase list (also the recognizer pool key)."""
+    if grammar is None:
+        return None
+    return json.dumps(sorted(set(grammar)) + ["[unk]"])
+
+
+class STTEngine:
+    """
+    Process-wide Vosk engine.
+
+    Loads the model once and recycles recognizers between utterances so a
+    conversation turn never pays the model load or its allocation spike.
+    """
+
+    def __init__(self, model_path: str = MODEL_PATH, sample_rate: int = SAMPLE_RATE):
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.load_seconds = None
+        self.load_rss_kb = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._load_thread = None
+        self._idle_recognizers = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Model:
+        """Load the Vosk model if needed and return it."""
+        with self._lock:
+            if self._model is None:
+                rss_before = _current_rss_kb()
+                start = time.perf_counter()
+                self._model = Model(self.model_path)
+                self.load_seconds = time.perf_counter() - start
+                self.load_rss_kb = max(_current_rss_kb() - rss_before, 0)
+                logger.info(
+                    f"Vosk model loaded in {self.load_seconds:.2f}s "
+                    f"(+{self.load_rss_kb / 1024:.1f} MiB RSS)"
+                )
+            return self._model
+
+    def preload(self, background: bool = True) -> None:
+        """
+        Load the model ahead of the first utterance.
+
+        Args:
+            background: Load on a daemon thread instead of blocking the caller
+        """
+        if not background:
+            self.load()
+            return
+        if self._load_thread is None:
+            self._load_thread = threading.Thread(
+                target=self._load_quietly, name="stt-preload", daemon=True
+            )
+            self._load_thread.start()
+
+    def _load_quietly(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Background Vosk model load failed: {e}")
+
+    def acquire_recognizer(self, grammar: list[str] | None = None) -> KaldiRecognizer:
+        """
+        Return a clean recognizer, reusing one from a previous utterance if possible.
+
+        Args:
+            grammar: Restrict decoding to these phrases (plus "[unk]"); None for open vocabulary
+        """
+        model = self.load()
+        key = _grammar_key(grammar)
+        with self._lock:
+            pool = self._idle_recognizers.get(key)
+            if pool:
+                return pool.pop()
+        if key is None:
+            return KaldiRecognizer(model, self.sample_rate)
+        return KaldiRecognizer(model, self.sample_rate, key)
+
+    def release_recognizer(self, recognizer: KaldiRecognizer, grammar: list[str] | None = None) -> None:
+        """Reset a recognizer and return it to the pool for the next utterance."""
+        try:
+            recognizer.Reset()
+        except Exception as e:
+            logger.warning(f"Discarding recognizer that failed to reset: {e}")
+            return
+        with self._lock:
+            self._idle_recognizers.setdefault(_grammar_key(grammar), []).append(recognizer)
+
+    def stats(self) -> dict:
+        """Report model load time and memory footprint."""
+        return {
+            "loaded": self.is_loaded,
+            "load_seconds": self.load_seconds,
+            "load_rss_kb": self.load_rss_kb,
+            "rss_kb": _current_rss_kb(),
+            "idle_recognizers": sum(len(pool) for pool in self._idle_recognizers.values()),
+        }
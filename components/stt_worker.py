@@ -0,0 +1,339 @@
+"""
+Out-of-process Vosk decoding.
+
+The parent copies PCM frames into a shared-memory ring buffer and signals the
+worker; the worker process owns the resident Vosk model, decodes on its own
+core and posts partial and final results back over a queue. Audio reading in
+the parent therefore never waits on Kaldi.
+
+Control messages (parent -> worker):
+    ("start", utterance_id, start_pos)  begin decoding at an absolute ring position
+    ("finalize", utterance_id)          drain pending audio and post the final result
+    ("cancel", utterance_id)            drop the utterance without a result
+    ("stop",)                           shut the worker down
+
+Result messages (worker -> parent), all shaped (utterance_id, kind, text):
+    "partial"  current PartialResult() text, posted when it changes
+    "result"   a segment Vosk finalized on its own (Result())
+    "final"    the FinalResult() answering a "finalize" request
+    "error"    decoding failed; text holds the message
+"""
+
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_HEADER_BYTES = 8  # int64 absolute write position
+
+
+class SharedPCMRing:
+    """
+    Single-writer int16 ring buffer in shared memory.
+
+    The first 8 bytes hold the absolute write position; readers in another
+    process track their own position and detect overruns against it.
+    """
+
+    def __init__(self, capacity: int, name: str | None = None):
+        self.capacity = capacity
+        size = _HEADER_BYTES + capacity * 2
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._header = np.ndarray((1,), dtype=np.int64, buffer=self._shm.buf, offset=0)
+        self._data = np.ndarray((capacity,), dtype=np.int16, buffer=self._shm.buf, offset=_HEADER_BYTES)
+        if self._owner:
+            self._header[0] = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def write_pos(self) -> int:
+        return int(self._header[0])
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples; publishes the new write position after the data is in place."""
+        count = len(samples)
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+        pos = int(self._header[0]) + count - len(samples)
+        start = pos % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < len(samples):
+            self._data[:len(samples) - first] = samples[first:]
+        self._header[0] = pos + len(samples)
+
+    def read(self, position: int, end: int) -> tuple[np.ndarray, int]:
+        """
+        Copy samples in [position, end), skipping anything already overwritten.
+
+        Returns:
+            (samples, position actually read from)
+        """
+        position = max(position, end - self.capacity)
+        count = end - position
+        out = np.empty(count, dtype=np.int16)
+        start = position % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        if first < count:
+            out[first:] = self._data[:count - first]
+        return out, position
+
+    def close(self) -> None:
+        # Drop numpy views before closing, otherwise the mmap cannot be released
+        self._header = None
+        self._data = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _serve(ring: SharedPCMRing, engine, control, results, data_ready) -> None:
+    """Worker loop: decode ring audio for the active utterance until told to stop."""
+    recognizer = None
+    utterance_id = None
+    read_pos = 0
+    last_partial = ""
+
+    def drain():
+        nonlocal read_pos, last_partial
+        end = ring.write_pos
+        if utterance_id is None or end <= read_pos:
+            return
+        samples, start = ring.read(read_pos, end)
+        if start != read_pos:
+            logger.warning(f"STT worker overrun, skipped {start - read_pos} samples")
+        read_pos = end
+        if recognizer.AcceptWaveform(samples.tobytes()):
+            text = json.loads(recognizer.Result()).get("text", "")
+            last_partial = ""
+            results.put((utterance_id, "result", text))
+        else:
+            partial = json.loads(recognizer.PartialResult()).get("partial", "")
+            if partial != last_partial:
+                last_partial = partial
+                results.put((utterance_id, "partial", partial))
+
+    while True:
+        try:
+            message = control.get_nowait()
+        except queue.Empty:
+            message = None
+
+        try:
+            if message is not None:
+                kind = message[0]
+                if kind == "stop":
+                    break
+                if kind == "start":
+                    if recognizer is not None:
+                        engine.release_recognizer(recognizer)
+                    _, utterance_id, read_pos = message
+                    recognizer = engine.acquire_recognizer()
+                    last_partial = ""
+                    drain()
+                elif kind in ("finalize", "cancel") and message[1] == utterance_id:
+                    if kind == "finalize":
+                        drain()
+                        text = json.loads(recognizer.FinalResult()).get("text", "")
+                        results.put((utterance_id, "final", text))
+                    engine.release_recognizer(recognizer)
+                    recognizer = None
+                    utterance_id = None
+                continue
+
+            # Clear before draining so a write that lands mid-drain re-arms the event
+            if data_ready.wait(timeout=0.05):
+                data_ready.clear()
+                drain()
+        except Exception as e:
+            logger.error(f"STT worker decode error: {e}")
+            results.put((utterance_id, "error", str(e)))
+            recognizer = None
+            utterance_id = None
+
+    if recognizer is not None:
+        engine.release_recognizer(recognizer)
+
+
+def _worker_main(ring_name: str, capacity: int, model_path: str, control, results, data_ready) -> None:
+    """Process entry point: attach to the ring, load the model once and serve."""
+    from components.stt_engine import STTEngine
+
+    ring = SharedPCMRing(capacity, name=ring_name)
+    try:
+        engine = STTEngine(model_path=model_path)
+        engine.load()
+        results.put((None, "ready", ""))
+        _serve(ring, engine, control, results, data_ready)
+    except Exception as e:
+        results.put((None, "error", str(e)))
+    finally:
+        ring.close()
+
+
+class WorkerSession:
+    """One utterance decoded by the worker; mirrors the in-process decoder interface."""
+
+    def __init__(self, worker: "STTWorker", utterance_id: int):
+        self._worker = worker
+        self.utterance_id = utterance_id
+        self._done = False
+
+    def accept(self, samples: np.ndarray) -> list[tuple[str, str]]:
+        """Publish samples to the worker and return any results it has posted since."""
+        self._worker.ring.write(samples)
+        self._worker.data_ready.set()
+        return self._worker.collect(self.utterance_id)
+
+    def finalize(self, timeout: float = 5.0) -> str:
+        """
+        Ask the worker for FinalResult() after it has decoded everything published so far.
+
+        A lagging worker can hit Vosk's own endpoint while draining the last
+        audio, so segments it finalized before FinalResult() are joined in front.
+        """
+        self._done = True
+        self._worker.control.put(("finalize", self.utterance_id))
+        self._worker.data_ready.set()
+        earlier = []
+        event = self._worker.wait_for(self.utterance_id, "final", timeout, earlier)
+        texts = [text for kind, text in earlier if kind == "result" and text]
+        if event and event[1]:
+            texts.append(event[1])
+        return " ".join(texts)
+
+    def close(self) -> None:
+        if not self._done:
+            self._done = True
+            self._worker.control.put(("cancel", self.utterance_id))
+
+
+class STTWorker:
+    """Parent-side handle for the decoding process."""
+
+    def __init__(self, model_path: str, sample_rate: int = 16000, buffer_seconds: float = 10.0):
+        self.model_path = model_path
+        self.capacity = int(sample_rate * buffer_seconds)
+        self.ring = None
+        self.control = None
+        self.data_ready = None
+        self._results = None
+        self._process = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self, ready_timeout: float = 60.0) -> None:
+        """Spawn the worker and wait until its model is loaded."""
+        if self.running:
+            return
+        # Spawn rather than fork: the parent already runs audio threads
+        ctx = multiprocessing.get_context("spawn")
+        self.ring = SharedPCMRing(self.capacity)
+        self.control = ctx.Queue()
+        self._results = ctx.Queue()
+        self.data_ready = ctx.Event()
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.capacity, self.model_path,
+                  self.control, self._results, self.data_ready),
+            name="stt-worker",
+            daemon=True,
+        )
+        self._process.start()
+        try:
+            _, kind, text = self._results.get(timeout=ready_timeout)
+        except queue.Empty:
+            self.stop()
+            raise RuntimeError("STT worker did not become ready in time")
+        if kind != "ready":
+            self.stop()
+            raise RuntimeError(f"STT worker failed to start: {text}")
+        logger.info(f"STT worker process started (pid {self._process.pid})")
+
+    def begin(self) -> WorkerSession:
+        """Start a new utterance at the current end of the shared ring."""
+        if not self.running:
+            raise RuntimeError("STT worker is not running")
+        with self._lock:
+            self._next_id += 1
+            utterance_id = self._next_id
+        self.control.put(("start", utterance_id, self.ring.write_pos))
+        return WorkerSession(self, utterance_id)
+
+    @staticmethod
+    def _check_error(result_id, kind: str, text: str, utterance_id: int) -> None:
+        """Raise for errors about `utterance_id` or the worker as a whole (no id)."""
+        if kind == "error" and result_id in (utterance_id, None):
+            raise RuntimeError(f"STT worker error: {text}")
+
+    def collect(self, utterance_id: int) -> list[tuple[str, str]]:
+        """
+        Return (kind, text) results posted for `utterance_id` without blocking.
+
+        Results and errors left over from earlier (e.g. cancelled) utterances
+        are dropped.
+        """
+        events = []
+        while True:
+            try:
+                result_id, kind, text = self._results.get_nowait()
+            except queue.Empty:
+                return events
+            self._check_error(result_id, kind, text, utterance_id)
+            if result_id == utterance_id:
+                events.append((kind, text))
+
+    def wait_for(self, utterance_id: int, kind: str, timeout: float,
+                 earlier: list | None = None) -> tuple[str, str] | None:
+        """
+        Block until a result of `kind` arrives for `utterance_id`.
+
+        Args:
+            earlier: If given, other (kind, text) results for the utterance
+                that arrive first are appended to it instead of being dropped
+        """
+        while True:
+            try:
+                result_id, result_kind, text = self._results.get(timeout=timeout)
+            except queue.Empty:
+                logger.warning(f"STT worker did not answer '{kind}' within {timeout}s")
+                return None
+            self._check_error(result_id, result_kind, text, utterance_id)
+            if result_id != utterance_id:
+                continue
+            if result_kind == kind:
+                return result_kind, text
+            if earlier is not None:
+                earlier.append((result_kind, text))
+
+    def stop(self) -> None:
+        """Stop the worker process and release the shared memory."""
+        if self._process is not None:
+            if self._process.is_alive():
+                self.control.put(("stop",))
+                self._process.join(timeout=2.0)
+                if self._process.is_alive():
+                    self._process.terminate()
+            self._process = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -0,0 +1,145 @@
+"""
+Sentence segmentation for streaming speech synthesis.
+
+Splits text into sentences, and over-long sentences into clauses, so each piece
+can be synthesized and played while the next one is still being produced.
+Text can be fed incrementally (e.g. as it arrives from the LLM); a segment is
+only emitted once the text after it shows the boundary is real.
+"""
+
+import re
+
+# Words ending in "." that do not end a sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "approx", "no",
+}
+
+_SENTENCE_END = re.compile(r"([.!?]+[\"')\]]*)\s+")
+_CLAUSE_END = re.compile(r"[,;:—]\s+")
+
+
+class SentenceSegmenter:
+    """
+    Incremental sentence splitter.
+
+    Args:
+        max_chars: Sentences longer than this are split at the last clause
+            boundary (or space) before the limit
+    """
+
+    def __init__(self, max_chars: int = 160):
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        """
+        Add text and return the segments it completed.
+
+        Args:
+            text: Next piece of text, of any length
+
+        Returns:
+            Completed segments, stripped, in order
+        """
+        self._buffer += text
+        segments = []
+        while True:
+            segment = self._next_segment()
+            if segment is None:
+                return segments
+            if segment:
+                segments.append(segment)
+
+    def flush(self) -> list[str]:
+        """Return whatever text is left as final segments."""
+        segments = []
+        rest = self._buffer.strip()
+        self._buffer = ""
+        while len(rest) > self.max_chars:
+            cut = self._clause_cut(rest)
+            segments.append(rest[:cut].strip())
+            rest = rest[cut:].strip()
+        if rest:
+            segments.append(rest)
+        return segments
+
+    def _next_segment(self) -> str | None:
+        """Pop one complete segment off the buffer, or None if none is complete yet."""
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if match.start() > self.max_chars:
+                break
+            if not self._is_abbreviation(match.start()):
+                segment = self._buffer[:match.end()]
+                self._buffer = self._buffer[match.end():]
+                return segment.strip()
+
+        if len(self._buffer) > self.max_chars:
+            cut = self._clause_cut(self._buffer)
+            segment = self._buffer[:cut]
+            self._buffer = self._buffer[cut:]
+            return segment.strip()
+        return None
+
+    def _is_abbreviation(self, dot_pos: int) -> bool:
+        if self._buffer[dot_pos] != ".":
+            return False
+        word = self._buffer[:dot_pos].rsplit(None, 1)[-1] if self._buffer[:dot_pos].strip() else ""
+        word = word.lower().lstrip("(\"'")
+        return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+    def _clause_cut(self, text: str) -> int:
+        """Index to cut an over-long sentence at, preferring clause punctuation."""
+        window = text[:self.max_chars + 1]
+        clauses = list(_CLAUSE_END.finditer(window))
+        if clauses:
+            return clauses[-1].end()
+        space = window.rfind(" ")
+        return space + 1 if space > 0 else self.max_chars
+
+
+def split_sentences(text: str, max_chars: int = 160) -> list[str]:
+    """
+    Split complete text into sentence (or clause) segments.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum segment length before clause splitting
+
+    Returns:
+        Non-empty segments in order
+    """
+    segmenter = SentenceSegmenter(max_chars=max_chars)
+    return segmenter.feed(text) + segmenter.flush()
+
+
+def segment_stream(pieces, max_chars: int = 160, cancel=None):
+    """
+    Turn a stream of text pieces into a stream of sentence (or clause) segments.
+
+    Each segment is yielded as soon as the text after it shows it is complete.
+    Closing the returned generator closes `pieces` too, so whatever produces
+    the text can stop.
+
+    Args:
+        pieces: Iterable of text fragments, e.g. LLM tokens
+        max_chars: Maximum segment length before clause splitting
+        cancel: threading.Event checked for every piece; once set, the stream
+            ends (without the unfinished segment) and `pieces` is closed
+
+    Yields:
+        Non-empty segments in order
+    """
+    segmenter = SentenceSegmenter(max_chars=max_chars)
+    cancelled = cancel.is_set if cancel is not None else lambda: False
+    try:
+        for piece in pieces:
+            if cancelled():
+                return
+            yield from segmenter.feed(piece)
+            # Checked again before waiting on the next piece, so no more text is pulled
+            if cancelled():
+                return
+        yield from segmenter.flush()
+    finally:
+        if hasattr(pieces, "close"):
+            pieces.close()
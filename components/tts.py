@@ -1,14 +1,30 @@
-
 import pvorca
 import pyaudio
-import struct
+import queue
 import sys
 import os
+import threading
 
 # Add the parent directory to sys.path for module discovery
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from config import PICOVOICE_ACCESS_KEY
+from config import (
+    AUDIO_OUTPUT_BUFFER_MS,
+    AUDIO_OUTPUT_CALLBACK,
+    AUDIO_OUTPUT_FRAMES_PER_BUFFER,
+    AUDIO_OUTPUT_TARGET_LATENCY_MS,
+    PICOVOICE_ACCESS_KEY,
+    TTS_CACHE_DIR,
+    TTS_CACHE_DISK_MB,
+    TTS_CACHE_ENABLED,
+    TTS_CACHE_MAX_CHARS,
+    TTS_CACHE_MEMORY_MB,
+    TTS_STREAMING,
+)
+from components.audio_output import AudioOutput
+from components.pcm import pcm_to_bytes
+from components.text_segmenter import split_sentences
+from components.tts_cache import TTSCache
 
 # Path to the Orca model file
 ORCA_MODEL_PATH = "models/picovoice/orca_params_en_female.pv"
@@ -19,93 +35,484 @@ def list_audio_devices(pyaudio_instance):
         dev = pyaudio_instance.get_device_info_by_index(i)
         print(f"  {i}: {dev['name']} (Input channels: {dev['maxInputChannels']}), (Output channels: {dev['maxOutputChannels']})")
 
-def speak_text(text):
+
+def _resolve_pcm(result):
+    """Extract the raw PCM buffer from the synth result regardless of the container type."""
+    if isinstance(result, (bytes, bytearray)):
+        return result
+    if isinstance(result, dict):
+        for key in ("pcm", "audio", "linear_pcm"):
+            if key in result:
+                return result[key]
+    if isinstance(result, tuple) and result:
+        resolved = _resolve_pcm(result[0])
+        if resolved is not None:
+            return resolved
+    if hasattr(result, "pcm"):
+        return getattr(result, "pcm")
+    return result
+
+
+class TTSEngine:
     """
-    Synthesizes text to speech using Picovoice Orca and plays it.
+    Long-lived Orca synthesizer with a pooled output stream.
+
+    The Orca engine, the PyAudio instance and the output stream are created on
+    first use and reused for every utterance; they are only released by
+    shutdown(). A stream that fails mid-write is closed and reopened on the
+    next call. With a cache, phrases up to `cache_max_chars` long are played
+    from stored PCM after the first time they are synthesized.
+
+    With `callback_output`, audio goes through a callback-mode AudioOutput
+    with a jitter buffer of `target_latency_ms` instead of blocking writes.
     """
-    orca = None
-    pa = None
-    audio_stream = None
 
-    try:
-        orca = pvorca.create(
-            access_key=PICOVOICE_ACCESS_KEY,
-            model_path=ORCA_MODEL_PATH
-        )
+    def __init__(self, access_key: str = PICOVOICE_ACCESS_KEY, model_path: str = ORCA_MODEL_PATH,
+                 frames_per_buffer: int = 1024, cache: TTSCache | None = None, cache_max_chars: int = 200,
+                 callback_output: bool = False, target_latency_ms: float = 150, buffer_ms: float = 2000):
+        self.access_key = access_key
+        self.model_path = model_path
+        self.frames_per_buffer = frames_per_buffer
+        self.callback_output = callback_output
+        self.target_latency_ms = target_latency_ms
+        self.buffer_ms = buffer_ms
+        self.cache = cache
+        self.cache_max_chars = cache_max_chars
+        self.orca = None
+        self.pyaudio_instance = None
+        self._stream = None
+        # Serializes playback so utterances from different threads never interleave
+        self._lock = threading.RLock()
+        # Serializes calls into the Orca handle, which is not thread-safe; separate
+        # from the playback lock so synthesis never waits on a write
+        self._orca_lock = threading.Lock()
+
+    @property
+    def sample_rate(self) -> int:
+        return self.start().sample_rate
+
+    def start(self):
+        """Create the Orca engine if needed and return it."""
+        if self.orca is not None:
+            return self.orca
+        with self._orca_lock:
+            if self.orca is None:
+                self.orca = pvorca.create(
+                    access_key=self.access_key,
+                    model_path=self.model_path
+                )
+                print(f"Orca sample rate: {self.orca.sample_rate}, type: {type(self.orca.sample_rate)}")
+            return self.orca
 
-        pa = pyaudio.PyAudio()
-        list_audio_devices(pa)
-        print(f"Orca sample rate: {orca.sample_rate}, type: {type(orca.sample_rate)}")
-        audio_stream = pa.open(
-            rate=orca.sample_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=False,
-            output=True,
-            frames_per_buffer=1024)
-
-        synth_result = orca.synthesize(text)
-
-        # Extract the raw PCM buffer from the synth result regardless of the container type.
-        def _resolve_pcm(result):
-            if isinstance(result, (bytes, bytearray)):
-                return result
-            if isinstance(result, dict):
-                for key in ("pcm", "audio", "linear_pcm"):
-                    if key in result:
-                        return result[key]
-            if isinstance(result, tuple) and result:
-                resolved = _resolve_pcm(result[0])
-                if resolved is not None:
-                    return resolved
-            if hasattr(result, "pcm"):
-                return getattr(result, "pcm")
-            return result
-
-        pcm = _resolve_pcm(synth_result)
+    def _output_stream(self):
+        """Return the pooled output stream, opening it on first use."""
+        if self._stream is None:
+            if self.pyaudio_instance is None:
+                self.pyaudio_instance = pyaudio.PyAudio()
+            if self.callback_output:
+                self._stream = AudioOutput(
+                    self.pyaudio_instance,
+                    rate=self.start().sample_rate,
+                    frames_per_buffer=self.frames_per_buffer,
+                    target_latency_ms=self.target_latency_ms,
+                    buffer_ms=self.buffer_ms)
+                return self._stream
+            self._stream = self.pyaudio_instance.open(
+                rate=self.start().sample_rate,
+                channels=1,
+                format=pyaudio.paInt16,
+                input=False,
+                output=True,
+                frames_per_buffer=self.frames_per_buffer)
+        return self._stream
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+    def synthesize(self, text: str) -> bytes:
+        """
+        Synthesize text to 16-bit PCM bytes at `sample_rate`.
+
+        Raises:
+            ValueError: If Orca returned no PCM data
+        """
+        orca = self.start()
+        with self._orca_lock:
+            result = orca.synthesize(text)
+        pcm = _resolve_pcm(result)
         if pcm is None:
             raise ValueError("Orca synth result did not include PCM audio data")
+        return pcm_to_bytes(pcm)
 
-        # Picovoice returns PCM samples as 16-bit values but they may not be Python ints.
-        if isinstance(pcm, (bytes, bytearray)):
-            audio_stream.write(pcm)
-        else:
-            def _flatten(items):
-                if isinstance(items, dict):
-                    for value in items.values():
-                        yield from _flatten(value)
+    def play(self, audio_bytes: bytes, cancel: threading.Event | None = None) -> None:
+        """
+        Write PCM bytes to the pooled output stream, blocking until queued.
+
+        Args:
+            audio_bytes: 16-bit PCM at `sample_rate`
+            cancel: When given, audio is written one buffer at a time and
+                playback stops at the next buffer boundary once it is set
+        """
+        if not audio_bytes:
+            return
+        with self._lock:
+            try:
+                stream = self._output_stream()
+                if isinstance(stream, AudioOutput):
+                    stream.write(audio_bytes, cancel)
                     return
-                for sample in items:
-                    if isinstance(sample, (list, tuple)):
-                        yield from _flatten(sample)
-                    else:
-                        yield sample
-
-            # Handle numpy arrays without importing numpy explicitly.
-            sequence = pcm.tolist() if hasattr(pcm, "tolist") else pcm
-            pcm_ints = []
-            for sample in _flatten(sequence):
-                if isinstance(sample, (bytes, bytearray)):
-                    # Interpret 2-byte chunks as signed shorts.
-                    pcm_ints.extend(struct.unpack("<" + "h" * (len(sample) // 2), sample))
-                else:
-                    try:
-                        pcm_ints.append(int(sample))
-                    except (TypeError, ValueError):
-                        continue
-
-            if pcm_ints:
-                audio_bytes = struct.pack("<" + "h" * len(pcm_ints), *pcm_ints)
-                audio_stream.write(audio_bytes)
+                if cancel is None:
+                    stream.write(audio_bytes)
+                    return
+                step = self.frames_per_buffer * 2
+                for offset in range(0, len(audio_bytes), step):
+                    if cancel.is_set():
+                        return
+                    stream.write(audio_bytes[offset:offset + step])
+            except Exception:
+                # Drop a broken stream (e.g. device unplugged) so the next call reopens it
+                self._close_stream()
+                raise
+
+    def finish(self, cancel: threading.Event | None = None) -> None:
+        """
+        Wait until queued audio has played, or drop it if `cancel` is set.
+
+        Blocking writes return once the device has the audio, so this only
+        has work to do with callback output, where play() returns as soon as
+        the audio is in the jitter buffer.
+        """
+        with self._lock:
+            stream = self._stream
+            if not isinstance(stream, AudioOutput):
+                return
+            underruns = stream.underruns
+            try:
+                stream.drain(cancel)
+            except Exception:
+                self._close_stream()
+                raise
+            if stream.underruns > underruns:
+                print(f"Audio output underrun ({stream.underruns} total, target latency "
+                      f"{stream.stats()['target_latency_ms']:.0f} ms); consider raising "
+                      f"AUDIO_OUTPUT_TARGET_LATENCY_MS")
+
+    def speak(self, text: str) -> None:
+        """Synthesize text and play it."""
+        self.play(self.synthesize(text))
+        self.finish()
+
+    def synthesize_stream(self, chunks, cancel: threading.Event | None = None):
+        """
+        Yield PCM bytes for successive text chunks.
+
+        Uses Orca's streaming synthesis when the installed version has it, so
+        prosody carries across chunk boundaries; otherwise each chunk is
+        synthesized on its own. Once `cancel` is set nothing more is
+        synthesized.
+        """
+        cancelled = cancel.is_set if cancel is not None else lambda: False
+        orca = self.start()
+        if not hasattr(orca, "stream_open"):
+            for chunk in chunks:
+                if cancelled():
+                    return
+                yield self.synthesize(chunk)
+            return
+
+        with self._orca_lock:
+            stream = orca.stream_open()
+        try:
+            for chunk in chunks:
+                if cancelled():
+                    return
+                with self._orca_lock:
+                    pcm = stream.synthesize(chunk + " ")
+                if pcm is not None and len(pcm):
+                    yield pcm_to_bytes(pcm)
+            if cancelled():
+                return
+            with self._orca_lock:
+                pcm = stream.flush()
+            if pcm is not None and len(pcm):
+                yield pcm_to_bytes(pcm)
+        finally:
+            with self._orca_lock:
+                stream.close()
+
+    def speak_stream(self, chunks, max_pending: int = 2, played: list | None = None,
+                     cancel: threading.Event | None = None) -> None:
+        """
+        Play text chunks while the following ones are still being synthesized.
+
+        Synthesis runs on a background thread, at most `max_pending` chunks
+        ahead of playback, so audio starts after the first chunk instead of
+        after the whole text. Returns without waiting for that thread once
+        playback stops; it winds down on its own at the next chunk.
+
+        Args:
+            chunks: Iterable of text pieces, e.g. sentences; may be a generator
+            max_pending: Synthesized chunks buffered ahead of playback
+            played: If given, every PCM chunk is appended to it after playing
+            cancel: Stops playback and synthesis when set; a generator of
+                chunks is closed so whatever produces the text can stop too.
+                Pass the same event to the text producer so it stops within
+                one token rather than at the end of the next chunk.
+        """
+        audio = queue.Queue(maxsize=max_pending)
+        stop = threading.Event()
+        cancel = cancel or threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    audio.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce():
+            pieces = self.synthesize_stream(chunks, cancel)
+            try:
+                for pcm in pieces:
+                    if stop.is_set() or cancel.is_set():
+                        break
+                    put(pcm)
+            except Exception as e:
+                put(e)
+            finally:
+                pieces.close()
+                if (cancel.is_set() or stop.is_set()) and hasattr(chunks, "close"):
+                    chunks.close()
+                put(None)
+
+        producer = threading.Thread(target=produce, name="tts-synthesis", daemon=True)
+        producer.start()
+        try:
+            while not cancel.is_set():
+                try:
+                    item = audio.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                self.play(item, cancel)
+                if played is not None:
+                    played.append(item)
+            self.finish(cancel)
+        finally:
+            stop.set()
+
+    def _cacheable(self, text: str) -> bool:
+        return self.cache is not None and len(text.strip()) <= self.cache_max_chars
+
+    def say(self, text: str, streaming: bool = True, cancel: threading.Event | None = None) -> None:
+        """
+        Speak text, from the cache when possible.
+
+        Args:
+            text: Text to speak
+            streaming: Synthesize sentence by sentence, overlapped with playback
+            cancel: Stops playback (and any synthesis still running) when set
+        """
+        cacheable = self._cacheable(text)
+        if cacheable:
+            cached = self.cache.get(text, self.model_path, self.sample_rate)
+            if cached is not None:
+                self.play(cached, cancel)
+                self.finish(cancel)
+                return
+
+        played = []
+        if streaming:
+            self.speak_stream(split_sentences(text), played=played, cancel=cancel)
+        else:
+            audio = self.synthesize(text)
+            self.play(audio, cancel)
+            self.finish(cancel)
+            played.append(audio)
+
+        # Never store a phrase that was cut off
+        if cacheable and not (cancel is not None and cancel.is_set()):
+            self.cache.put(text, self.model_path, self.sample_rate, b"".join(played))
+
+    def warm_cache(self, phrases) -> int:
+        """
+        Synthesize phrases that are not cached yet, without playing them.
+
+        Returns:
+            Number of phrases synthesized
+        """
+        if self.cache is None:
+            return 0
+        synthesized = 0
+        for phrase in phrases:
+            if not self._cacheable(phrase) or self.cache.contains(phrase, self.model_path, self.sample_rate):
+                continue
+            self.cache.put(phrase, self.model_path, self.sample_rate, self.synthesize(phrase), persist=True)
+            synthesized += 1
+        return synthesized
+
+    def shutdown(self) -> None:
+        """Release the output stream, PyAudio and the Orca engine."""
+        with self._lock, self._orca_lock:
+            self._close_stream()
+            if self.pyaudio_instance is not None:
+                self.pyaudio_instance.terminate()
+                self.pyaudio_instance = None
+            if self.orca is not None:
+                self.orca.delete()
+                self.orca = None
 
+
+class Playback:
+    """
+    Speech playing on a background thread.
+
+    Created by start_speaking(); interrupt() stops the audio at the next
+    output buffer and cancels synthesis that is still in flight. It sets
+    `cancel`, which the producer of streamed text can watch as well.
+    """
+
+    def __init__(self, engine: TTSEngine, text, streaming: bool, cancel: threading.Event | None = None):
+        self._cancel = cancel or threading.Event()
+        self.done = threading.Event()
+        self.error = None
+        self._thread = threading.Thread(
+            target=self._run, args=(engine, text, streaming), name="tts-playback", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, engine, text, streaming):
+        try:
+            if isinstance(text, str):
+                engine.say(text, streaming=streaming, cancel=self._cancel)
+            else:
+                engine.speak_stream(text, cancel=self._cancel)
+        except Exception as e:
+            self.error = e
+            print(f"An unexpected error occurred: {e}")
+        finally:
+            self.done.set()
+
+    @property
+    def interrupted(self) -> bool:
+        return self._cancel.is_set()
+
+    def interrupt(self) -> None:
+        """Stop playback and any synthesis still running."""
+        self._cancel.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until playback has finished or stopped; returns False on timeout."""
+        return self.done.wait(timeout)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_tts_engine() -> TTSEngine:
+    """Return the process-wide TTS engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            cache = None
+            if TTS_CACHE_ENABLED:
+                cache = TTSCache(
+                    max_memory_bytes=int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+                    directory=None if TTS_CACHE_DIR.lower() == "none" else TTS_CACHE_DIR,
+                    max_disk_bytes=int(TTS_CACHE_DISK_MB * 1024 * 1024),
+                )
+            _engine = TTSEngine(
+                frames_per_buffer=AUDIO_OUTPUT_FRAMES_PER_BUFFER,
+                cache=cache,
+                cache_max_chars=TTS_CACHE_MAX_CHARS,
+                callback_output=AUDIO_OUTPUT_CALLBACK,
+                target_latency_ms=AUDIO_OUTPUT_TARGET_LATENCY_MS,
+                buffer_ms=AUDIO_OUTPUT_BUFFER_MS,
+            )
+        return _engine
+
+
+def preload_tts(phrases=()) -> None:
+    """
+    Create the Orca engine and open the output stream before the first reply.
+
+    Args:
+        phrases: Fixed phrases to pre-synthesize into the cache; only phrases
+            missing from the on-disk store are synthesized
+    """
+    try:
+        engine = get_tts_engine()
+        with engine._lock:
+            engine._output_stream()
+        warmed = engine.warm_cache(phrases)
+        if warmed:
+            print(f"Pre-synthesized {warmed} fixed phrase(s) into the TTS cache")
     except pvorca.OrcaError as e:
         print(f"Orca error: {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
-    finally:
-        if audio_stream is not None:
-            audio_stream.close()
-        if pa is not None:
-            pa.terminate()
-        if orca is not None:
-            orca.delete()
+
+
+def shutdown_tts() -> None:
+    """Tear down the TTS engine; called once at shutdown."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown()
+            _engine = None
+
+
+def speak_text(text, streaming=None):
+    """
+    Synthesizes text to speech using Picovoice Orca and plays it.
+
+    In streaming mode the text is split into sentences and each one plays
+    while the next is synthesized. Short phrases that were spoken before are
+    played from the TTS cache.
+
+    Args:
+        text: Text to speak, or an iterable of text chunks (e.g. sentences
+            as they are generated), which is always streamed
+        streaming: Synthesize sentence by sentence (default: config.TTS_STREAMING)
+    """
+    if streaming is None:
+        streaming = TTS_STREAMING
+    try:
+        engine = get_tts_engine()
+        if isinstance(text, str):
+            engine.say(text, streaming=streaming)
+        else:
+            engine.speak_stream(text)
+    except pvorca.OrcaError as e:
+        print(f"Orca error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+def start_speaking(text, streaming=None, cancel=None) -> Playback:
+    """
+    Speak without blocking.
+
+    Args:
+        text: Text to speak, or an iterable of text chunks (e.g. sentences
+            as they are generated)
+        streaming: Synthesize sentence by sentence (default: config.TTS_STREAMING)
+        cancel: Event that interrupt() sets; share it with whatever produces
+            `text` so generation stops as soon as the user barges in
+
+    Returns:
+        Playback handle that can be waited on or interrupted
+    """
+    if streaming is None:
+        streaming = TTS_STREAMING
+    return Playback(get_tts_engine(), text, streaming, cancel)
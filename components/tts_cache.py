@@ -0,0 +1,170 @@
+"""
+Synthesized speech cache.
+
+Keeps PCM for phrases that are spoken again and again (greeting, farewells,
+error messages) so they play without running Orca. Entries are keyed by
+text, model and sample rate and held in a size-bounded in-memory LRU. Only
+phrases known to repeat (pre-synthesized fixed phrases, or ones spoken a
+second time) are persisted as raw PCM files so they survive restarts;
+one-off replies never reach the disk.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Two-level PCM cache: in-memory LRU in front of an on-disk store.
+
+    Args:
+        max_memory_bytes: Bound on the PCM bytes held in memory
+        directory: Directory for .pcm files, or None for memory only
+        max_disk_bytes: Bound on the on-disk store; oldest files are removed first
+    """
+
+    def __init__(self, max_memory_bytes: int, directory: str | None = None, max_disk_bytes: int = 0):
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = Path(directory) if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._persisted = set()  # Keys known to have a file in the on-disk store
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, model: str, sample_rate: int) -> str:
+        """Stable cache key for a phrase rendered by a given voice model and rate."""
+        payload = json.dumps([text.strip(), os.path.basename(model), int(sample_rate)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pcm"
+
+    def _remember(self, key: str, pcm: bytes) -> None:
+        """Insert into the LRU and evict least recently used entries over the bound."""
+        if len(pcm) > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._entries[key] = pcm
+            self._memory_bytes += len(pcm)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, text: str, model: str, sample_rate: int) -> bytes | None:
+        """
+        Look up cached PCM.
+
+        Returns:
+            PCM bytes, or None on a miss
+        """
+        key = self.key(text, model, sample_rate)
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                repeated = key not in self._persisted
+        if pcm is not None:
+            # Spoken a second time: worth keeping across restarts
+            if repeated:
+                self._write(key, pcm)
+            return pcm
+
+        if self.directory is not None:
+            try:
+                pcm = self._path(key).read_bytes()
+            except FileNotFoundError:
+                pcm = None
+            except OSError as e:
+                logger.warning(f"Failed to read TTS cache entry: {e}")
+                pcm = None
+            if pcm is not None:
+                self.disk_hits += 1
+                with self._lock:
+                    self._persisted.add(key)
+                self._remember(key, pcm)
+                return pcm
+
+        self.misses += 1
+        return None
+
+    def put(self, text: str, model: str, sample_rate: int, pcm: bytes, persist: bool = False) -> None:
+        """
+        Store PCM in memory and, with `persist`, on disk.
+
+        Args:
+            persist: Also write the entry to the on-disk store, for phrases
+                known to repeat. Other entries are written once they are
+                served from memory a second time.
+        """
+        if not pcm:
+            return
+        key = self.key(text, model, sample_rate)
+        self._remember(key, pcm)
+        if persist:
+            self._write(key, pcm)
+
+    def _write(self, key: str, pcm: bytes) -> None:
+        """Write an entry to the on-disk store, if configured, and keep the store bounded."""
+        if self.directory is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            # Write then rename so a crash never leaves a truncated entry behind
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(pcm)
+            os.replace(tmp, path)
+            with self._lock:
+                self._persisted.add(key)
+            self._prune_disk()
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry: {e}")
+
+    def _prune_disk(self) -> None:
+        """Delete the least recently written files until the store fits its bound."""
+        if not self.max_disk_bytes:
+            return
+        files = sorted(self.directory.glob("*.pcm"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.max_disk_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self._persisted.discard(path.stem)
+
+    def contains(self, text: str, model: str, sample_rate: int) -> bool:
+        """True if the phrase is cached in memory or on disk (does not count as a hit)."""
+        key = self.key(text, model, sample_rate)
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.directory is not None and self._path(key).exists()
+
+    def stats(self) -> dict:
+        """Report hit/miss counters and memory use."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,171 @@
+"""
+Adaptive voice activity detection.
+
+Scores fixed-size frames on three features computed with NumPy over the whole
+block at once:
+
+- energy: mean absolute amplitude, gated against a continuously tracked
+  noise floor (and never below the configured absolute threshold)
+- zero-crossing rate: rejects hiss and other broadband noise
+- speech-band energy ratio: share of spectral energy between 300 and 3400 Hz,
+  rejects hum, rumble and DC offsets
+
+Frame decisions are smoothed with an onset requirement (a few consecutive
+speech frames to start) and a hangover (speech state held for a while after
+the last speech frame) so short pauses do not split an utterance.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SPEECH_BAND_HZ = (300.0, 3400.0)
+
+
+class VoiceActivityDetector:
+    """Stateful multi-feature VAD with an adaptive noise floor."""
+
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 frame_length: int = 256,
+                 energy_threshold: float = 500,
+                 snr_ratio: float = 3.0,
+                 max_zcr: float = 0.35,
+                 min_band_ratio: float = 0.5,
+                 onset_ms: float = 32,
+                 hangover_ms: float = 200):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.energy_threshold = energy_threshold
+        self.snr_ratio = snr_ratio
+        self.max_zcr = max_zcr
+        self.min_band_ratio = min_band_ratio
+        frame_ms = 1000.0 * frame_length / sample_rate
+        self.onset_frames = max(1, round(onset_ms / frame_ms))
+        self.hangover_frames = max(0, round(hangover_ms / frame_ms))
+
+        freqs = np.fft.rfftfreq(frame_length, d=1.0 / sample_rate)
+        self._band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+        self._window = np.hanning(frame_length).astype(np.float32)
+
+        # Until the floor has been learned the absolute threshold alone gates speech
+        self.noise_floor = 0.0
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._speech_run = 0
+        self._hangover_left = 0
+        self.in_speech = False
+
+    def reset(self) -> None:
+        """Forget onset/hangover state and partial frames, keeping the learned noise floor."""
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._speech_run = 0
+        self._hangover_left = 0
+        self.in_speech = False
+
+    def features(self, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute per-frame features for a (n_frames, frame_length) int16 block.
+
+        Returns:
+            (energy, zero_crossing_rate, band_ratio), each of shape (n_frames,)
+        """
+        x = frames.astype(np.float32)
+        energy = np.abs(x).mean(axis=1)
+        zcr = np.count_nonzero(np.diff(np.signbit(x), axis=1), axis=1) / (self.frame_length - 1)
+        power = np.abs(np.fft.rfft(x * self._window, axis=1)) ** 2
+        band_ratio = power[:, self._band].sum(axis=1) / (power.sum(axis=1) + 1e-9)
+        return energy, zcr, band_ratio
+
+    def _gate(self) -> float:
+        return max(self.energy_threshold, self.noise_floor * self.snr_ratio)
+
+    def calibrate(self, samples: np.ndarray, percentile: float = 10.0) -> None:
+        """
+        Seed the noise floor from recent audio.
+
+        A low percentile of frame energies is used so speech (or our own TTS)
+        in the window does not inflate the estimate.
+        """
+        usable = len(samples) - len(samples) % self.frame_length
+        if usable == 0:
+            return
+        energy, _, _ = self.features(samples[:usable].reshape(-1, self.frame_length))
+        self.noise_floor = float(np.percentile(energy, percentile))
+        logger.debug(f"VAD noise floor calibrated to {self.noise_floor:.1f}")
+
+    def classify(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Run the detector over a block of samples.
+
+        Samples that do not fill a whole frame are kept and prepended to the
+        next block, so callers may pass blocks of any length.
+
+        Returns:
+            Boolean smoothed speech state for each completed frame
+        """
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        usable = len(samples) - len(samples) % self.frame_length
+        self._pending = samples[usable:].copy()
+        if usable == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:usable].reshape(-1, self.frame_length)
+        energy, zcr, band_ratio = self.features(frames)
+        spectral = (zcr <= self.max_zcr) & (band_ratio >= self.min_band_ratio)
+
+        states = np.empty(len(frames), dtype=bool)
+        for i in range(len(frames)):
+            raw = energy[i] > self._gate() and spectral[i]
+            self._update_noise_floor(energy[i], raw)
+
+            self._speech_run = self._speech_run + 1 if raw else 0
+            if self._speech_run >= self.onset_frames:
+                self.in_speech = True
+                self._hangover_left = self.hangover_frames
+            elif self.in_speech and not raw:
+                if self._hangover_left > 0:
+                    self._hangover_left -= 1
+                else:
+                    self.in_speech = False
+            states[i] = self.in_speech
+        return states
+
+    def _update_noise_floor(self, energy: float, is_speech: bool) -> None:
+        # Follow drops quickly and rises slowly; creep up even during "speech"
+        # so a sustained new noise source is absorbed instead of firing forever
+        if energy < self.noise_floor:
+            rate = 0.2
+        elif is_speech:
+            rate = 0.002
+        else:
+            rate = 0.02
+        self.noise_floor += rate * (energy - self.noise_floor)
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        """Return True if any completed frame in `samples` is in the speech state."""
+        return bool(self.classify(samples).any())
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector() -> VoiceActivityDetector:
+    """Return the process-wide detector so the noise floor persists across turns."""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = VoiceActivityDetector(
+                energy_threshold=config.VAD_ENERGY_THRESHOLD,
+                snr_ratio=config.VAD_SNR_RATIO,
+                max_zcr=config.VAD_MAX_ZCR,
+                min_band_ratio=config.VAD_MIN_BAND_RATIO,
+                hangover_ms=config.VAD_HANGOVER_MS,
+            )
+        return _detector
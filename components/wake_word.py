@@ -1,10 +1,15 @@
 # components/wake_word.py
 
+import json
+import logging
 import os
 import pvporcupine
-import pyaudio
-import struct
+import re
 import sys
+from ctypes import POINTER, byref, c_int, c_short
+from typing import NamedTuple
+
+import numpy as np
 
 # Add the parent directory to sys.path for module discovery
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -12,80 +17,402 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config import (
     PICOVOICE_ACCESS_KEY,
     WAKE_WORD_CUSTOM_PATH,
+    WAKE_VERIFY,
+    WAKE_VERIFY_MIN_CONFIDENCE,
+    WAKE_VERIFY_WINDOW_MS,
     WAKE_WORD_NAME,
+    WAKE_WORDS,
 )
+from components.audio_capture import get_capture
 
+logger = logging.getLogger(__name__)
 
-def list_audio_devices(pyaudio_instance):
-    print("Available audio devices:")
-    for i in range(pyaudio_instance.get_device_count()):
-        dev = pyaudio_instance.get_device_info_by_index(i)
-        print(f"  {i}: {dev['name']} (Input channels: {dev['maxInputChannels']})")
 
-def wait_for_wake_word():
+# What a wake word starts: the full LLM conversation or local-only command handling
+WAKE_MODES = ("conversation", "command")
+
+
+class WakeKeyword(NamedTuple):
+    """One Porcupine keyword and the mode it routes to."""
+    label: str
+    path: str
+    mode: str = "conversation"
+
+
+def _builtin_keyword_path(name):
+    """Return the path of one of Porcupine's built-in keywords."""
+    builtin_path = pvporcupine.KEYWORD_PATHS.get(name.lower())
+    if builtin_path is None:
+        raise ValueError(
+            f"Wake word '{name}' is not available in Porcupine's built-in keywords. "
+            "Set WAKE_WORD_CUSTOM_PATH in config.py to the path of your custom .ppn file."
+        )
+    return builtin_path
+
+
+def _custom_keyword_path(path):
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Configured wake word file does not exist: {path}")
+    return path
+
+
+def parse_wake_words(spec):
+    """
+    Parse a WAKE_WORDS specification.
+
+    Entries are comma-separated "keyword=mode" pairs, where keyword is a
+    built-in Porcupine keyword or a path to a .ppn file and mode is one of
+    WAKE_MODES (default "conversation"), e.g. "jarvis=conversation,computer=command".
+
+    Returns:
+        list[WakeKeyword]: Keywords in Porcupine index order
     """
-    Listens for the configured wake word and returns when it is detected.
+    keywords = []
+    for entry in spec.split(","):
+        name, _, mode = entry.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        mode = mode.strip().lower() or "conversation"
+        if mode not in WAKE_MODES:
+            raise ValueError(f"Unknown wake word mode '{mode}' for '{name}', expected one of {WAKE_MODES}")
+        if name.lower().endswith(".ppn"):
+            label = os.path.splitext(os.path.basename(name))[0]
+            path = _custom_keyword_path(name)
+        else:
+            label = name
+            path = _builtin_keyword_path(name)
+        keywords.append(WakeKeyword(label, path, mode))
+    if not keywords:
+        raise ValueError("WAKE_WORDS does not name any keyword")
+    return keywords
+
+
+def configured_keywords():
     """
-    if PICOVOICE_ACCESS_KEY == "YOUR_PICOVOICE_ACCESS_KEY_HERE":
-        print(
-            "Warning: PICOVOICE_ACCESS_KEY is not set in config.py. Wake word detection will not work."
-        )
-        return
+    Return the keywords to listen for.
 
-    wake_word_label = (WAKE_WORD_NAME or "").strip() or "wake word"
+    WAKE_WORDS takes precedence; otherwise the single WAKE_WORD_NAME /
+    WAKE_WORD_CUSTOM_PATH keyword starts a conversation.
+    """
+    if WAKE_WORDS:
+        return parse_wake_words(WAKE_WORDS)
 
-    keyword_paths = None
+    label = (WAKE_WORD_NAME or "").strip() or "wake word"
     if WAKE_WORD_CUSTOM_PATH:
-        if not os.path.isfile(WAKE_WORD_CUSTOM_PATH):
-            raise FileNotFoundError(
-                f"Configured wake word file does not exist: {WAKE_WORD_CUSTOM_PATH}"
-            )
-        keyword_paths = [WAKE_WORD_CUSTOM_PATH]
-    else:
-        builtin_key = wake_word_label.lower()
-        builtin_path = pvporcupine.KEYWORD_PATHS.get(builtin_key)
-        if builtin_path is None:
-            raise ValueError(
-                f"Wake word '{wake_word_label}' is not available in Porcupine's built-in keywords. "
-                "Set WAKE_WORD_CUSTOM_PATH in config.py to the path of your custom .ppn file."
+        return [WakeKeyword(label, _custom_keyword_path(WAKE_WORD_CUSTOM_PATH))]
+    return [WakeKeyword(label, _builtin_keyword_path(label))]
+
+
+class WakeWordDetector:
+    """
+    Long-lived Porcupine detector reading from the shared capture.
+
+    The Porcupine instance is created once and kept for the life of the
+    process. arm() starts listening at the live edge of the capture and
+    disarm() stops consuming audio, so re-arming after a conversation costs
+    nothing and leaves no deaf window.
+    """
+
+    def __init__(self, access_key, keywords):
+        self.keywords = list(keywords)
+        self._access_key = access_key
+        self._porcupine = None
+        self._cursor = None
+        self._frame = None
+        self._process_frame = None
+        self.last_detection_pos = None
+
+    @property
+    def label(self):
+        return " / ".join(keyword.label for keyword in self.keywords)
+
+    @property
+    def armed(self):
+        return self._cursor is not None
+
+    def _ensure_created(self):
+        if self._porcupine is None:
+            self._porcupine = pvporcupine.create(
+                access_key=self._access_key,
+                keyword_paths=[keyword.path for keyword in self.keywords],
             )
-        keyword_paths = [builtin_path]
+            self._bind_frame()
+        return self._porcupine
 
-    porcupine = None
-    pa = None
-    audio_stream = None
+    def _bind_frame(self):
+        """
+        Preallocate the frame buffer and bind Porcupine's C entry point to it.
 
-    try:
-        porcupine = pvporcupine.create(
-            access_key=PICOVOICE_ACCESS_KEY,
-            keyword_paths=keyword_paths,
-        )
+        Porcupine.process() copies every frame into a fresh ctypes array. The
+        idle loop runs ~31 frames a second for the life of the process, so we
+        call the native function directly on a pointer to our own int16 buffer
+        and skip the per-frame allocations. Anything other than a real
+        Porcupine instance, or a pvporcupine version whose internals differ,
+        goes through the public process() method.
+        """
+        porcupine = self._porcupine
+        self._frame = np.zeros(porcupine.frame_length, dtype=np.int16)
 
-        pa = pyaudio.PyAudio()
-        list_audio_devices(pa)
+        native = isinstance(porcupine, pvporcupine.Porcupine) and all(
+            hasattr(porcupine, name) for name in ("_process_func", "_handle", "PicovoiceStatuses")
+        ) and hasattr(porcupine.PicovoiceStatuses, "SUCCESS")
+        if not native:
+            if isinstance(porcupine, pvporcupine.Porcupine):
+                logger.warning("Porcupine internals not found; using process() for wake word frames")
+            self._process_frame = lambda: porcupine.process(self._frame)
+            return
 
-        audio_stream = pa.open(
-            rate=porcupine.sample_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=True,
-            frames_per_buffer=porcupine.frame_length,
-        )
+        process_func = porcupine._process_func
+        handle = porcupine._handle
+        success = porcupine.PicovoiceStatuses.SUCCESS
+        frame_ptr = self._frame.ctypes.data_as(POINTER(c_short))
+        result = c_int()
+        result_ref = byref(result)
 
-        print(f"Listening for wake word: '{wake_word_label}'...")
+        def process_frame():
+            if process_func(handle, frame_ptr, result_ref) is not success:
+                # Let the public method raise the matching Porcupine exception
+                return porcupine.process(self._frame)
+            return result.value
+
+        self._process_frame = process_frame
+
+    def arm(self):
+        """Start listening from the current end of the shared capture."""
+        porcupine = self._ensure_created()
+        capture = get_capture()
+        if capture.rate != porcupine.sample_rate:
+            raise ValueError(
+                f"Capture rate {capture.rate} Hz does not match Porcupine's {porcupine.sample_rate} Hz"
+            )
+        self._cursor = capture.open_cursor()
+
+    def disarm(self):
+        """Stop consuming audio until the next arm()."""
+        self._cursor = None
+
+    def wait(self):
+        """
+        Block until a keyword is detected.
+
+        Returns:
+            int: Index of the detected keyword
+        """
+        if not self.armed:
+            self.arm()
+        cursor = self._cursor
+        frame = self._frame
+        process_frame = self._process_frame
 
         while True:
-            pcm = audio_stream.read(porcupine.frame_length)
-            pcm = struct.unpack_from("h" * porcupine.frame_length, pcm)
+            # Frames are copied straight from the capture ring into the bound buffer
+            if not cursor.read_into(frame, timeout=2.0):
+                raise OSError("No audio received from the capture device")
 
-            keyword_index = porcupine.process(pcm)
+            keyword_index = process_frame()
 
             if keyword_index >= 0:
-                print(f"Wake word '{wake_word_label}' detected!")
-                return
+                self.last_detection_pos = cursor.position
+                return keyword_index
             # else:
             #     print(".", end="", flush=True) # Uncomment for verbose listening indication
 
+    def delete(self):
+        """Release the Porcupine instance."""
+        self.disarm()
+        if self._porcupine is not None:
+            self._porcupine.delete()
+            self._porcupine = None
+            self._process_frame = None
+
+
+class WakeWordVerifier:
+    """
+    Second-stage check of a Porcupine hit against the buffered audio.
+
+    Decodes the window of audio that ended at the detection with a Vosk
+    grammar restricted to the keyword's words, and accepts the hit only if one
+    of them is recognized with at least `min_confidence`. Accept and reject
+    counts are kept for tuning the threshold. Words missing from the Vosk
+    model's vocabulary are left out of the grammar; a keyword with none of its
+    words in the vocabulary cannot be verified and is always accepted.
+    """
+
+    def __init__(self, window_ms=1000, min_confidence=0.6):
+        self.window_ms = window_ms
+        self.min_confidence = min_confidence
+        self.accepted = 0
+        self.rejected = 0
+        self._known_words = {}  # keyword label -> its words in the Vosk vocabulary
+
+    @staticmethod
+    def keyword_words(keyword):
+        """Words Vosk should hear for a keyword label, e.g. "hey-buddy" -> ["hey", "buddy"]."""
+        return [word for word in re.split(r"[\s_\-]+", keyword.label.lower()) if word]
+
+    def _window(self, end_position):
+        capture = get_capture()
+        cursor = capture.open_cursor()
+        cursor.seek(end_position - int(capture.rate * self.window_ms / 1000))
+        count = max(0, end_position - cursor.position)
+        return cursor.read(count, timeout=0) if count else None
+
+    def _vocabulary_words(self, engine, keyword):
+        """Keyword words the Vosk model knows, looked up once per keyword."""
+        if keyword.label not in self._known_words:
+            words = self.keyword_words(keyword)
+            model = engine.load()
+            known = [word for word in words if model.vosk_model_find_word(word) != -1]
+            missing = [word for word in words if word not in known]
+            if not known:
+                logger.warning(f"None of the words of wake word '{keyword.label}' are in the Vosk vocabulary; "
+                               f"accepting its detections without verification")
+            elif missing:
+                logger.warning(f"Wake word '{keyword.label}' verified without {missing}: "
+                               f"not in the Vosk vocabulary")
+            self._known_words[keyword.label] = known
+        return self._known_words[keyword.label]
+
+    def _best_confidence(self, samples, keyword):
+        """
+        Highest confidence Vosk gives any keyword word in `samples`.
+
+        Returns:
+            The confidence, or None if no keyword word is in the vocabulary
+        """
+        from components.stt import get_engine
+
+        engine = get_engine()
+        words = self._vocabulary_words(engine, keyword)
+        if not words:
+            return None
+        grammar = [" ".join(words)] + words
+        recognizer = engine.acquire_recognizer(grammar)
+        try:
+            recognizer.SetWords(True)
+            recognizer.AcceptWaveform(samples.tobytes())
+            result = json.loads(recognizer.FinalResult())
+        finally:
+            engine.release_recognizer(recognizer, grammar)
+        confidences = [entry.get("conf", 0.0) for entry in result.get("result", []) if entry.get("word") in words]
+        return max(confidences, default=0.0)
+
+    def verify(self, keyword, end_position):
+        """
+        Decide whether a Porcupine detection was real.
+
+        Args:
+            keyword: The WakeKeyword Porcupine reported
+            end_position: Capture position where the keyword ended
+
+        Returns:
+            bool: True to accept the wake-up. Verification errors accept, so a
+            broken STT model never locks the user out.
+        """
+        try:
+            samples = self._window(end_position)
+            if samples is None:
+                accepted, confidence = True, None
+            else:
+                confidence = self._best_confidence(samples, keyword)
+                accepted = confidence is None or confidence >= self.min_confidence
+        except Exception as e:
+            logger.warning(f"Wake word verification failed, accepting detection: {e}")
+            accepted, confidence = True, None
+
+        if accepted:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        score = f"{confidence:.2f}" if confidence is not None else "n/a"
+        logger.info(f"Wake word '{keyword.label}' {'accepted' if accepted else 'rejected'} "
+                    f"(confidence {score}, threshold {self.min_confidence}); "
+                    f"accepted {self.accepted}, rejected {self.rejected}")
+        return accepted
+
+
+_detector = None
+_verifier = None
+
+
+def get_wake_word_detector():
+    """Return the process-wide wake word detector, creating it on first use."""
+    global _detector
+    if _detector is None:
+        _detector = WakeWordDetector(PICOVOICE_ACCESS_KEY, configured_keywords())
+    return _detector
+
+
+def get_wake_word_verifier():
+    """Return the second-stage verifier, or None if WAKE_VERIFY is off."""
+    global _verifier
+    if WAKE_VERIFY and _verifier is None:
+        _verifier = WakeWordVerifier(WAKE_VERIFY_WINDOW_MS, WAKE_VERIFY_MIN_CONFIDENCE)
+    return _verifier
+
+
+def get_wake_keyword(index):
+    """
+    Return the WakeKeyword for a detected index.
+
+    Args:
+        index: Value returned by wait_for_wake_word()
+
+    Returns:
+        WakeKeyword, or None if nothing was detected
+    """
+    if index is None or _detector is None or not 0 <= index < len(_detector.keywords):
+        return None
+    return _detector.keywords[index]
+
+
+def shutdown_wake_word():
+    """Release the wake word detector if one was created."""
+    global _detector
+    if _detector is not None:
+        _detector.delete()
+        _detector = None
+
+
+def get_detection_position():
+    """
+    Return the capture position at the end of the last detected wake word.
+
+    Returns:
+        int, or None if no wake word has been detected yet
+    """
+    return _detector.last_detection_pos if _detector is not None else None
+
+
+def wait_for_wake_word():
+    """
+    Listens for the configured wake words and returns when one is detected.
+
+    Returns:
+        int: Index of the detected keyword (see get_wake_keyword()), or None on error
+    """
+    if PICOVOICE_ACCESS_KEY == "YOUR_PICOVOICE_ACCESS_KEY_HERE":
+        print(
+            "Warning: PICOVOICE_ACCESS_KEY is not set in config.py. Wake word detection will not work."
+        )
+        return
+
+    detector = get_wake_word_detector()
+
+    try:
+        detector.arm()
+        print(f"Listening for wake word: '{detector.label}'...")
+        verifier = get_wake_word_verifier()
+        while True:
+            keyword_index = detector.wait()
+            keyword = detector.keywords[keyword_index]
+            # Stay armed and keep listening when the buffered audio does not confirm the hit
+            if verifier is None or verifier.verify(keyword, detector.last_detection_pos):
+                break
+        print(f"Wake word '{keyword.label}' detected!")
+        return keyword_index
+
     except pvporcupine.PorcupineActivationError as e:
         print(f"Porcupine activation error: {e}")
     except pvporcupine.PorcupineError as e:
@@ -93,13 +420,9 @@ def wait_for_wake_word():
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
     finally:
-        if audio_stream is not None:
-            audio_stream.close()
-        if pa is not None:
-            pa.terminate()
-        if porcupine is not None:
-            porcupine.delete()
+        detector.disarm()
 
 
 if __name__ == "__main__":
     wait_for_wake_word()
+    shutdown_wake_word()
@@ -22,18 +22,71 @@ PICOVOICE_ACCESS_KEY = _env("PICOVOICE_ACCESS_KEY", "rGn8kk49k1Dr5RAnkO0uVSpn+ko
 
 OLLAMA_API_URL = _env("OLLAMA_API_URL", "http://localhost:11434/api/generate")
 OLLAMA_MODEL_NAME = _env("OLLAMA_MODEL_NAME", "granite3.2:2b") # Ensure this matches the name of your pulled Ollama model
+OLLAMA_CONNECT_TIMEOUT = float(_env("OLLAMA_CONNECT_TIMEOUT", "3.0"))  # Seconds to wait for a connection to Ollama
+OLLAMA_READ_TIMEOUT = float(_env("OLLAMA_READ_TIMEOUT", "60.0"))  # Seconds to wait for the next bytes of a reply (the whole reply when not streaming)
+OLLAMA_MAX_RETRIES = int(_env("OLLAMA_MAX_RETRIES", "2"))  # Retries when Ollama cannot be reached or answers 502/503/504
+OLLAMA_RETRY_BACKOFF = float(_env("OLLAMA_RETRY_BACKOFF", "0.5"))  # Delay before the first retry, doubled for each further one
+OLLAMA_KEEP_ALIVE = _env("OLLAMA_KEEP_ALIVE", "5m")  # Sent with every request: how long the model stays loaded after it, e.g. "10m", seconds, or -1 for always
+OLLAMA_WARMUP = _env_bool("OLLAMA_WARMUP", True)  # Load the model in the background as soon as the wake word fires
+OLLAMA_REUSE_CONTEXT = _env_bool("OLLAMA_REUSE_CONTEXT", True)  # Continue from Ollama's context tokens so each turn evaluates only the new message
+LLM_STREAMING = _env_bool("LLM_STREAMING", True)  # Stream the reply from Ollama and speak each sentence as soon as it is complete
 
 # Wake word configuration
 WAKE_WORD_NAME = _env("WAKE_WORD_NAME", "jarvis")  # Friendly name used for logging
 # Provide the absolute path to your custom Porcupine keyword (.ppn) file if using a non-built-in wake word.
 # Example: WAKE_WORD_CUSTOM_PATH = "models/picovoice/hey-buddy_en_mac_v3_0_0.ppn"
 WAKE_WORD_CUSTOM_PATH = _env("WAKE_WORD_CUSTOM_PATH", None)
+# Several keywords in one Porcupine instance, each routed to a mode: "conversation" (LLM) or "command" (local only).
+# Example: WAKE_WORDS = "jarvis=conversation,computer=command". Overrides WAKE_WORD_NAME / WAKE_WORD_CUSTOM_PATH.
+WAKE_WORDS = _env("WAKE_WORDS", None)
+WAKE_FOLLOW_ON = _env_bool("WAKE_FOLLOW_ON", True)  # Treat speech right after the wake word as the first request and skip the greeting
+WAKE_FOLLOW_ON_WINDOW_MS = int(_env("WAKE_FOLLOW_ON_WINDOW_MS", "700"))  # Speech must start this soon after the wake word
+WAKE_VERIFY = _env_bool("WAKE_VERIFY", False)  # Re-check each Porcupine hit with a Vosk grammar pass before waking up
+WAKE_VERIFY_WINDOW_MS = int(_env("WAKE_VERIFY_WINDOW_MS", "1000"))  # Buffered audio before the hit that is re-checked
+WAKE_VERIFY_MIN_CONFIDENCE = float(_env("WAKE_VERIFY_MIN_CONFIDENCE", "0.6"))  # Minimum Vosk word confidence to accept
 
 # Conversation Settings (Phase 1)
 MAX_HISTORY_TURNS = int(_env("MAX_HISTORY_TURNS", "10"))  # Maximum turns to keep in conversation history (1 turn = user + assistant pair)
 AWAITING_TIMEOUT = float(_env("AWAITING_TIMEOUT", "10.0"))  # Seconds to wait for next user turn before ending conversation
 MAX_RESPONSE_TOKENS = int(_env("MAX_RESPONSE_TOKENS", "100"))  # Maximum tokens for LLM response (~15-20 seconds of speech)
 VAD_ENERGY_THRESHOLD = int(_env("VAD_ENERGY_THRESHOLD", "500"))  # Energy level threshold for voice activity detection
+VAD_SNR_RATIO = float(_env("VAD_SNR_RATIO", "3.0"))  # Speech must be this many times louder than the tracked noise floor
+VAD_MAX_ZCR = float(_env("VAD_MAX_ZCR", "0.35"))  # Frames with a higher zero-crossing rate are treated as hiss
+VAD_MIN_BAND_RATIO = float(_env("VAD_MIN_BAND_RATIO", "0.5"))  # Minimum share of energy in the 300-3400 Hz speech band
+VAD_HANGOVER_MS = int(_env("VAD_HANGOVER_MS", "200"))  # Keep the speech state this long after the last speech frame
+
+# Audio capture
+AUDIO_BUFFER_SECONDS = float(_env("AUDIO_BUFFER_SECONDS", "20.0"))  # History kept in the shared microphone ring buffer
+
+# Speech-to-text
+STT_PRELOAD = _env_bool("STT_PRELOAD", True)  # Load the Vosk model in the background at startup instead of on the first turn
+STT_PREROLL_MS = int(_env("STT_PREROLL_MS", "300"))  # Audio before the VAD trigger that is fed to the recognizer
+STT_ENDPOINTING = _env_bool("STT_ENDPOINTING", True)  # Force a final result on trailing silence or max utterance length
+STT_ENDPOINT_SILENCE_MS = int(_env("STT_ENDPOINT_SILENCE_MS", "800"))  # Trailing silence that ends an utterance
+STT_MAX_UTTERANCE_SECONDS = float(_env("STT_MAX_UTTERANCE_SECONDS", "15.0"))  # Hard cap on a single utterance
+STT_COMMAND_GRAMMAR = _env_bool("STT_COMMAND_GRAMMAR", False)  # Try a grammar of registered command phrases before open decoding
+STT_WORKER_PROCESS = _env_bool("STT_WORKER_PROCESS", False)  # Decode in a separate process fed through shared memory
+
+# Text-to-speech
+BARGE_IN = _env_bool("BARGE_IN", False)  # Keep listening while speaking and stop as soon as the user talks over a reply
+BARGE_IN_ENERGY_THRESHOLD = int(_env("BARGE_IN_ENERGY_THRESHOLD", "1500"))  # VAD floor during playback, above the speaker's echo
+TTS_STREAMING = _env_bool("TTS_STREAMING", True)  # Play each sentence while the next one is synthesized
+TTS_CACHE_ENABLED = _env_bool("TTS_CACHE_ENABLED", True)  # Reuse synthesized audio for repeated phrases
+TTS_CACHE_DIR = _env("TTS_CACHE_DIR", "data/tts_cache")  # On-disk PCM store; set to "none" to keep the cache in memory only
+TTS_CACHE_MEMORY_MB = float(_env("TTS_CACHE_MEMORY_MB", "16"))  # Bound on PCM held in the in-memory LRU
+TTS_CACHE_DISK_MB = float(_env("TTS_CACHE_DISK_MB", "64"))  # Bound on the on-disk store; oldest entries are removed first
+TTS_CACHE_MAX_CHARS = int(_env("TTS_CACHE_MAX_CHARS", "200"))  # Only phrases up to this length are cached
+AUDIO_OUTPUT_CALLBACK = _env_bool("AUDIO_OUTPUT_CALLBACK", True)  # Feed the speaker from a PortAudio callback instead of blocking writes
+AUDIO_OUTPUT_FRAMES_PER_BUFFER = int(_env("AUDIO_OUTPUT_FRAMES_PER_BUFFER", "512"))  # Frames per output buffer / callback
+AUDIO_OUTPUT_TARGET_LATENCY_MS = float(_env("AUDIO_OUTPUT_TARGET_LATENCY_MS", "150"))  # Audio queued before an utterance starts playing
+AUDIO_OUTPUT_BUFFER_MS = float(_env("AUDIO_OUTPUT_BUFFER_MS", "2000"))  # Jitter buffer capacity; synthesis waits when it is full
+
+# Response cache
+RESPONSE_CACHE_ENABLED = _env_bool("RESPONSE_CACHE_ENABLED", False)  # Answer repeated questions from a cache instead of the LLM
+RESPONSE_CACHE_TTL_SECONDS = float(_env("RESPONSE_CACHE_TTL_SECONDS", "3600"))  # Cached replies older than this are regenerated
+RESPONSE_CACHE_MAX_ENTRIES = int(_env("RESPONSE_CACHE_MAX_ENTRIES", "256"))  # Least recently used replies are evicted beyond this
+RESPONSE_CACHE_CONTEXT_MESSAGES = int(_env("RESPONSE_CACHE_CONTEXT_MESSAGES", "0"))  # Also key on this many preceding messages; 0 = question only
+RESPONSE_CACHE_DB_PATH = _env("RESPONSE_CACHE_DB_PATH", "none")  # SQLite file to persist the cache in, e.g. data/response_cache.db; "none" = memory only
 
 # Conversation Logging
 LOGGING_ENABLED = _env_bool('LOGGING_ENABLED', True)  # Enable conversation logging to database
@@ -3,12 +3,34 @@
 
 import logging
 import sys
+import threading
 import config
-from components.wake_word import wait_for_wake_word
-from components.stt import transcribe_audio, has_voice_activity
-from components.llm import generate_response
-from components.tts import speak_text
-from components import conversation
+from components.wake_word import (
+    get_detection_position,
+    get_wake_keyword,
+    shutdown_wake_word,
+    wait_for_wake_word,
+)
+from components.stt import (
+    transcribe_audio,
+    has_voice_activity,
+    preload_model,
+    register_command_phrases,
+    shutdown_worker,
+)
+from components.llm import (
+    ERROR_RESPONSES,
+    generate_response,
+    get_last_context,
+    shutdown_llm,
+    stream_response,
+    warm_up_llm,
+)
+from components.tts import list_audio_devices, preload_tts, shutdown_tts, speak_text, start_speaking
+from components import commands, conversation
+from components.text_segmenter import segment_stream
+from components.audio_capture import get_capture, shutdown_capture
+from components.response_cache import get_response_cache, shutdown_response_cache
 
 # Conditionally import database manager for conversation logging
 if config.LOGGING_ENABLED:
@@ -21,8 +43,115 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Fixed phrases; pre-synthesized into the TTS cache at startup
+GREETING = "Hello! I'm ready to talk. What would you like to know?"
+TIMEOUT_FAREWELL = "It seems you're not saying anything. Goodbye!"
+ENDING_FAREWELL = "Goodbye! Thanks for chatting!"
+EMPTY_RESPONSE_MESSAGE = "Sorry, I couldn't generate a response. Please try again."
+TURN_ERROR_MESSAGE = "Sorry, something went wrong. Let's try again."
+INTERRUPT_FAREWELL = "Goodbye!"
+UNKNOWN_COMMAND_MESSAGE = "Sorry, I don't know that command."
+COMMAND_ERROR_MESSAGE = "Sorry, something went wrong."
+FIXED_PHRASES = [
+    GREETING,
+    TIMEOUT_FAREWELL,
+    ENDING_FAREWELL,
+    EMPTY_RESPONSE_MESSAGE,
+    TURN_ERROR_MESSAGE,
+    INTERRUPT_FAREWELL,
+    UNKNOWN_COMMAND_MESSAGE,
+    COMMAND_ERROR_MESSAGE,
+]
+
+
+def speech_follows_wake_word() -> bool:
+    """
+    Check whether the user kept talking right after the wake word.
+
+    Looks at the audio captured since the end of the wake word. On success the
+    speech start is marked, so the next transcribe_audio() call picks up the
+    request ("Jarvis, what time is it") without waiting for another turn.
+    """
+    if not config.WAKE_FOLLOW_ON:
+        return False
+    position = get_detection_position()
+    if position is None:
+        return False
+    return has_voice_activity(
+        timeout_seconds=config.WAKE_FOLLOW_ON_WINDOW_MS / 1000,
+        energy_threshold=config.VAD_ENERGY_THRESHOLD,
+        start_position=position
+    )
+
+
+def speak_with_barge_in(text, cancel: threading.Event | None = None) -> bool:
+    """
+    Speak while listening for the user to interrupt.
+
+    Playback runs in the background while VAD monitors the microphone. If the
+    user starts talking, playback and any synthesis still in flight are
+    cancelled and the speech start is marked, so the next transcribe_audio()
+    call picks up the new utterance.
 
-def run_conversation() -> None:
+    Args:
+        text: Text to speak, or an iterable of text chunks
+        cancel: Event set when the user interrupts, shared with whatever
+            generates `text` so it stops too
+
+    Returns:
+        True if the user interrupted (speech is pending), False otherwise
+    """
+    if not config.BARGE_IN:
+        speak_text(text)
+        return False
+
+    playback = start_speaking(text, cancel=cancel)
+    interrupted = has_voice_activity(
+        timeout_seconds=float("inf"),
+        energy_threshold=config.BARGE_IN_ENERGY_THRESHOLD,
+        stop_event=playback.done
+    )
+    if interrupted:
+        logger.info("User barged in - stopping playback")
+        playback.interrupt()
+    playback.wait()
+    return interrupted
+
+
+def speak_streamed_response(prompt: str, context: list | None = None) -> tuple[str, bool]:
+    """
+    Stream the LLM reply and speak each sentence as soon as it is complete.
+
+    Args:
+        prompt: Prompt for the LLM
+        context: Ollama context tokens the prompt continues from
+
+    Returns:
+        The reply text that was generated (partial if the user interrupted)
+        and whether the user interrupted
+    """
+    sentences = []
+    # Set on barge-in; generation stops at the next token instead of the next sentence
+    cancel = threading.Event()
+
+    def reply():
+        for sentence in segment_stream(stream_response(prompt, context, cancel), cancel=cancel):
+            sentences.append(sentence)
+            yield sentence
+
+    interrupted = speak_with_barge_in(reply(), cancel)
+    return " ".join(sentences), interrupted
+
+
+def response_cache_context() -> list:
+    """Texts of the messages before the user's question that cached replies are keyed on."""
+    count = config.RESPONSE_CACHE_CONTEXT_MESSAGES
+    if count <= 0:
+        return []
+    return [msg["content"] for msg in conversation.get_history()[:-1][-count:]]
+
+
+def run_conversation(speech_pending: bool = False) -> None:
     """
     Run a multi-turn conversation loop.
 
@@ -30,37 +159,57 @@ def run_conversation() -> None:
     - User says goodbye/quit/exit
     - Timeout waiting for next turn (no voice activity)
     - LLM error
+
+    Args:
+        speech_pending: The user is already speaking (they continued right
+            after the wake word); skip the greeting and transcribe immediately.
+            If nothing is transcribed, the greeting is spoken after all.
     """
     logger.info("Starting new conversation")
     conversation.clear_history()
     turn_count = 0
+    # The greeting is still owed until the follow-on speech yields a request
+    greeting_owed = speech_pending
 
-    # Initial greeting
-    greeting = "Hello! I'm ready to talk. What would you like to know?"
-    logger.info(f"Assistant: {greeting}")
-    speak_text(greeting)
-    conversation.add_assistant_message(greeting)
+    if not speech_pending:
+        # Initial greeting
+        logger.info(f"Assistant: {GREETING}")
+        conversation.add_assistant_message(GREETING)
+        speech_pending = speak_with_barge_in(GREETING)
 
     while True:
         turn_count += 1
         logger.info(f"Conversation turn {turn_count}: Waiting for user input...")
 
-        # Wait for voice activity with timeout
-        has_activity = has_voice_activity(
-            timeout_seconds=config.AWAITING_TIMEOUT,
-            energy_threshold=config.VAD_ENERGY_THRESHOLD
-        )
+        if speech_pending:
+            # Speech was already detected (after the wake word or over a reply)
+            has_activity = True
+            speech_pending = False
+        else:
+            # Wait for voice activity with timeout
+            has_activity = has_voice_activity(
+                timeout_seconds=config.AWAITING_TIMEOUT,
+                energy_threshold=config.VAD_ENERGY_THRESHOLD
+            )
 
         if not has_activity:
             logger.info("No voice activity detected - ending conversation")
-            farewell = "It seems you're not saying anything. Goodbye!"
-            logger.info(f"Assistant: {farewell}")
-            speak_text(farewell)
+            logger.info(f"Assistant: {TIMEOUT_FAREWELL}")
+            speak_text(TIMEOUT_FAREWELL)
             break
 
         # Transcribe user input
         try:
             user_input = transcribe_audio()
+            if not user_input and greeting_owed:
+                # The follow-on VAD fired on a cough, echo or the tail of the wake word
+                logger.info("Nothing transcribed after the wake word - greeting instead")
+                greeting_owed = False
+                logger.info(f"Assistant: {GREETING}")
+                conversation.add_assistant_message(GREETING)
+                speech_pending = speak_with_barge_in(GREETING)
+                continue
+            greeting_owed = False
             if not user_input:
                 logger.warning("Transcription returned empty - skipping turn")
                 continue
@@ -71,25 +220,45 @@ def run_conversation() -> None:
             # Check if user wants to end conversation
             if conversation.is_conversation_ending():
                 logger.info("User requested conversation end")
-                farewell = "Goodbye! Thanks for chatting!"
-                logger.info(f"Assistant: {farewell}")
-                speak_text(farewell)
+                logger.info(f"Assistant: {ENDING_FAREWELL}")
+                speak_text(ENDING_FAREWELL)
                 break
 
-            # Generate response from LLM
-            logger.info("Generating LLM response...")
-            prompt = conversation.format_for_llm()
-            llm_response = generate_response(prompt)
+            # Repeated questions are answered from the response cache
+            cache = get_response_cache()
+            cache_context = response_cache_context()
+            cached = cache.get(user_input, cache_context) if cache is not None else None
+            if cache is not None:
+                logger.info(f"Response cache {'hit' if cached is not None else 'miss'}: {cache.stats()}")
+
+            if cached is not None:
+                llm_response = cached
+                speech_pending = speak_with_barge_in(cached)
+            else:
+                # Generate response from LLM
+                logger.info("Generating LLM response...")
+                prompt, context = conversation.prompt_for_llm()
+                if config.LLM_STREAMING:
+                    llm_response, speech_pending = speak_streamed_response(prompt, context)
+                else:
+                    llm_response = generate_response(prompt, context)
+                    if llm_response:
+                        speech_pending = speak_with_barge_in(llm_response)
 
             if not llm_response:
                 logger.error("LLM returned empty response")
-                error_msg = "Sorry, I couldn't generate a response. Please try again."
-                speak_text(error_msg)
+                speak_text(EMPTY_RESPONSE_MESSAGE)
                 continue
 
             logger.info(f"Assistant (turn {turn_count}): {llm_response}")
             conversation.add_assistant_message(llm_response)
-            speak_text(llm_response)
+            if cached is None:
+                # A cached reply is not in Ollama's context; the next turn sends it as text
+                conversation.set_llm_context(get_last_context())
+                # A streamed reply cut off by the user is incomplete
+                interrupted = config.LLM_STREAMING and speech_pending
+                if cache is not None and not interrupted and llm_response not in ERROR_RESPONSES:
+                    cache.put(user_input, llm_response, cache_context)
 
             # Log successful conversation turn
             if config.LOGGING_ENABLED:
@@ -100,13 +269,11 @@ def run_conversation() -> None:
 
         except KeyboardInterrupt:
             logger.info("Conversation interrupted by user (Ctrl+C)")
-            farewell = "Goodbye!"
-            speak_text(farewell)
+            speak_text(INTERRUPT_FAREWELL)
             break
         except Exception as e:
             logger.error(f"Error in conversation turn {turn_count}: {e}", exc_info=True)
-            error_msg = "Sorry, something went wrong. Let's try again."
-            speak_text(error_msg)
+            speak_text(TURN_ERROR_MESSAGE)
 
             # Log failed conversation turn
             if config.LOGGING_ENABLED:
@@ -122,6 +289,53 @@ def run_conversation() -> None:
     logger.info(f"Conversation ended after {turn_count} turns")
 
 
+def run_command(speech_pending: bool = False) -> None:
+    """
+    Handle a single local command without the LLM.
+
+    Entered from a wake word routed to "command" mode: listens for one
+    utterance, decodes it against the command grammar and answers it on the
+    device.
+
+    Args:
+        speech_pending: The command followed the wake word in the same breath
+    """
+    logger.info("Starting command mode")
+
+    has_activity = speech_pending or has_voice_activity(
+        timeout_seconds=config.AWAITING_TIMEOUT,
+        energy_threshold=config.VAD_ENERGY_THRESHOLD
+    )
+    if not has_activity:
+        logger.info("No voice activity detected - leaving command mode")
+        return
+
+    try:
+        user_input = transcribe_audio(commands_only=True)
+        if not user_input:
+            logger.warning("Transcription returned empty - leaving command mode")
+            return
+
+        logger.info(f"User (command): {user_input}")
+        reply = commands.handle_command(user_input)
+        if reply is None:
+            logger.info("No local command matched")
+            reply = UNKNOWN_COMMAND_MESSAGE
+
+        logger.info(f"Assistant (command): {reply}")
+        speak_text(reply)
+
+        if config.LOGGING_ENABLED:
+            try:
+                db_manager.save_conversation(user_input, reply, 'completed')
+            except Exception as log_error:
+                print(f"Warning: Failed to log command: {log_error}", file=sys.stderr)
+
+    except Exception as e:
+        logger.error(f"Error in command mode: {e}", exc_info=True)
+        speak_text(COMMAND_ERROR_MESSAGE)
+
+
 def main():
     """
     The main loop of the voice assistant.
@@ -135,12 +349,39 @@ def main():
                 f"AWAITING_TIMEOUT={config.AWAITING_TIMEOUT}s, "
                 f"VAD_ENERGY_THRESHOLD={config.VAD_ENERGY_THRESHOLD}")
 
+    # Fixed phrases that the grammar-constrained command mode recognizes quickly
+    register_command_phrases(conversation.ENDING_PHRASES)
+    register_command_phrases(commands.get_phrases())
+
+    if config.STT_PRELOAD:
+        preload_model(background=True)
+
     try:
+        # Open the microphone once; wake word, VAD and STT all read from this capture
+        capture = get_capture()
+        list_audio_devices(capture.pyaudio_instance)
+        # Create Orca and open the output stream once; every reply reuses them.
+        # Fixed phrases missing from the TTS cache are synthesized now.
+        preload_tts(FIXED_PHRASES)
+
         while True:
             logger.info("Waiting for wake word...")
-            wait_for_wake_word()
-            logger.info(f"Wake word '{config.WAKE_WORD_NAME}' detected!")
-            run_conversation()
+            keyword = get_wake_keyword(wait_for_wake_word())
+            command_mode = keyword is not None and keyword.mode == "command"
+            if not command_mode:
+                # Load the model in the background while the follow-on check,
+                # the greeting and the user's request take their time
+                warm_up_llm()
+            speech_pending = keyword is not None and speech_follows_wake_word()
+            if speech_pending:
+                logger.info("Speech continues after the wake word - skipping the greeting")
+            if command_mode:
+                logger.info(f"Wake word '{keyword.label}' detected - command mode")
+                run_command(speech_pending)
+            else:
+                label = keyword.label if keyword is not None else config.WAKE_WORD_NAME
+                logger.info(f"Wake word '{label}' detected!")
+                run_conversation(speech_pending)
             logger.info("Returned to wake word detection")
 
     except KeyboardInterrupt:
@@ -148,6 +389,12 @@ def main():
     except Exception as e:
         logger.error(f"Fatal error in main loop: {e}", exc_info=True)
     finally:
+        shutdown_wake_word()
+        shutdown_tts()
+        shutdown_llm()
+        shutdown_response_cache()
+        shutdown_worker()
+        shutdown_capture()
         logger.info("Voice Assistant stopped")
 
 
@@ -0,0 +1,200 @@
+"""
+Unit tests for audio_capture.py module (shared microphone ring buffer).
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import audio_capture
+
+
+class TestRingBuffer:
+    """Tests for the preallocated ring buffer."""
+
+    def test_write_and_read(self):
+        """Test that samples read back in order."""
+        ring = audio_capture.RingBuffer(8)
+        ring.write(np.arange(5, dtype=np.int16))
+
+        out = np.empty(5, dtype=np.int16)
+        ring.read_into(0, out)
+
+        assert out.tolist() == [0, 1, 2, 3, 4]
+        assert ring.write_pos == 5
+
+    def test_wraparound(self):
+        """Test that reads spanning the end of the buffer are stitched together."""
+        ring = audio_capture.RingBuffer(8)
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.write(np.arange(6, 12, dtype=np.int16))
+
+        out = np.empty(6, dtype=np.int16)
+        ring.read_into(6, out)
+
+        assert out.tolist() == [6, 7, 8, 9, 10, 11]
+        assert ring.oldest_pos == 4
+
+    def test_oversized_write_keeps_newest(self):
+        """Test that a write larger than the buffer keeps only the newest samples."""
+        ring = audio_capture.RingBuffer(4)
+        ring.write(np.arange(10, dtype=np.int16))
+
+        out = np.empty(4, dtype=np.int16)
+        ring.read_into(6, out)
+
+        assert out.tolist() == [6, 7, 8, 9]
+        assert ring.write_pos == 10
+
+    def test_read_overwritten_range_raises(self):
+        """Test that reading data that has been overwritten is rejected."""
+        ring = audio_capture.RingBuffer(4)
+        ring.write(np.arange(10, dtype=np.int16))
+
+        with pytest.raises(ValueError):
+            ring.read_into(0, np.empty(2, dtype=np.int16))
+
+    def test_invalid_capacity(self):
+        """Test that a zero-sized buffer is rejected."""
+        with pytest.raises(ValueError):
+            audio_capture.RingBuffer(0)
+
+
+class TestCaptureCursor:
+    """Tests for independent cursors over the ring buffer."""
+
+    def test_cursors_are_independent(self):
+        """Test that two stages read the same samples without stealing from each other."""
+        ring = audio_capture.RingBuffer(16)
+        first = audio_capture.CaptureCursor(ring, 0)
+        second = audio_capture.CaptureCursor(ring, 0)
+        ring.write(np.arange(4, dtype=np.int16))
+
+        assert first.read(4, timeout=0).tolist() == [0, 1, 2, 3]
+        assert second.read(4, timeout=0).tolist() == [0, 1, 2, 3]
+
+    def test_read_times_out(self):
+        """Test that read returns None if the capture thread does not deliver in time."""
+        ring = audio_capture.RingBuffer(16)
+        cursor = audio_capture.CaptureCursor(ring, 0)
+
+        assert cursor.read(4, timeout=0.01) is None
+        assert cursor.position == 0
+
+    def test_read_waits_for_writer(self):
+        """Test that read blocks until the writer has produced enough samples."""
+        ring = audio_capture.RingBuffer(16)
+        cursor = audio_capture.CaptureCursor(ring, 0)
+
+        writer = threading.Timer(0.05, ring.write, args=(np.ones(4, dtype=np.int16),))
+        writer.start()
+        samples = cursor.read(4, timeout=2.0)
+        writer.join()
+
+        assert samples.tolist() == [1, 1, 1, 1]
+
+    def test_overrun_skips_to_oldest(self):
+        """Test that a cursor a full buffer behind resumes at the oldest sample."""
+        ring = audio_capture.RingBuffer(4)
+        cursor = audio_capture.CaptureCursor(ring, 0)
+        ring.write(np.arange(10, dtype=np.int16))
+
+        assert cursor.read(2, timeout=0).tolist() == [6, 7]
+        assert cursor.overruns == 1
+
+    def test_seek_is_clamped(self):
+        """Test that seeking outside the buffered range is clamped."""
+        ring = audio_capture.RingBuffer(4)
+        ring.write(np.arange(10, dtype=np.int16))
+        cursor = audio_capture.CaptureCursor(ring, 10)
+
+        cursor.seek(0)
+        assert cursor.position == ring.oldest_pos
+        cursor.seek(100)
+        assert cursor.position == ring.write_pos
+
+    def test_read_bytes(self):
+        """Test that read_bytes returns little-endian int16 PCM."""
+        ring = audio_capture.RingBuffer(4)
+        cursor = audio_capture.CaptureCursor(ring, 0)
+        ring.write(np.array([1, -1], dtype=np.int16))
+
+        assert cursor.read_bytes(2, timeout=0) == np.array([1, -1], dtype=np.int16).tobytes()
+
+
+class TestAudioCapture:
+    """Tests for the capture thread and device handling."""
+
+    @patch('components.audio_capture.pyaudio.PyAudio')
+    def test_device_opened_once(self, mock_pyaudio):
+        """Test that one stream is opened with the shared audio settings and fills the ring."""
+        mock_stream = MagicMock()
+        mock_stream.read.return_value = np.full(512, 7, dtype=np.int16).tobytes()
+        mock_pyaudio.return_value.open.return_value = mock_stream
+
+        capture = audio_capture.AudioCapture(buffer_seconds=1.0)
+        capture.start()
+        capture.start()
+        try:
+            cursor = capture.open_cursor()
+            samples = cursor.read(512, timeout=2.0)
+        finally:
+            capture.stop()
+
+        assert samples.tolist() == [7] * 512
+        assert mock_pyaudio.call_count == 1
+        call_kwargs = mock_pyaudio.return_value.open.call_args[1]
+        assert call_kwargs['format'] == audio_capture.FORMAT
+        assert call_kwargs['channels'] == audio_capture.CHANNELS
+        assert call_kwargs['rate'] == audio_capture.RATE
+        assert call_kwargs['input'] is True
+        assert mock_stream.close.called
+        assert mock_pyaudio.return_value.terminate.called
+
+    @patch('components.audio_capture.pyaudio.PyAudio')
+    def test_open_failure_releases_pyaudio(self, mock_pyaudio):
+        """Test that PortAudio is terminated if the input stream cannot be opened."""
+        mock_pyaudio.return_value.open.side_effect = OSError("no input device")
+
+        capture = audio_capture.AudioCapture(buffer_seconds=1.0)
+        with pytest.raises(OSError):
+            capture.start()
+
+        assert mock_pyaudio.return_value.terminate.called
+        assert not capture.running
+
+    @patch('components.audio_capture.pyaudio.PyAudio')
+    def test_capture_error_surfaces_on_open_cursor(self, mock_pyaudio):
+        """Test that a dead capture thread is reported to the next reader."""
+        mock_stream = MagicMock()
+        mock_stream.read.side_effect = OSError("device unplugged")
+        mock_pyaudio.return_value.open.return_value = mock_stream
+
+        capture = audio_capture.AudioCapture(buffer_seconds=1.0)
+        capture.start()
+        try:
+            deadline = time.monotonic() + 2.0
+            while capture.running and time.monotonic() < deadline:
+                time.sleep(0.01)
+            with pytest.raises(OSError):
+                capture.open_cursor()
+        finally:
+            capture.stop()
+
+    @patch('components.audio_capture.pyaudio.PyAudio')
+    def test_open_cursor_lookback(self, mock_pyaudio):
+        """Test that a cursor can start in the recent past."""
+        capture = audio_capture.AudioCapture(buffer_seconds=1.0)
+        capture.ring.write(np.arange(100, dtype=np.int16))
+
+        cursor = capture.open_cursor(lookback_samples=10)
+
+        assert cursor.position == 90
+        assert cursor.read(10, timeout=0).tolist() == list(range(90, 100))
@@ -0,0 +1,163 @@
+"""
+Unit tests for audio_output.py module (callback-mode output with a jitter buffer).
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+import numpy as np
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import audio_output
+from components.audio_output import AudioOutput
+
+
+def _pcm(*samples):
+    return np.asarray(samples, dtype=np.int16).tobytes()
+
+
+def _pull(output, frames, status=0):
+    """Run one PortAudio callback and return the samples it produced."""
+    data, flag = output._callback(None, frames, {}, status)
+    assert flag == audio_output.pyaudio.paContinue
+    return np.frombuffer(data, dtype=np.int16).tolist()
+
+
+@pytest.fixture
+def output():
+    """An output at 1 kHz with a 4-sample target latency and a 10-sample buffer."""
+    pa = MagicMock()
+    out = AudioOutput(pa, rate=1000, frames_per_buffer=2, target_latency_ms=4, buffer_ms=10)
+    out.pa = pa
+    return out
+
+
+class TestJitterBuffer:
+    """Tests for the callback and its buffer."""
+
+    def test_opens_callback_stream(self, output):
+        """Test that the stream is opened in callback mode."""
+        kwargs = output.pa.open.call_args.kwargs
+        assert kwargs["stream_callback"] == output._callback
+        assert kwargs["output"] is True
+        assert kwargs["frames_per_buffer"] == 2
+
+    def test_waits_for_target_latency(self, output):
+        """Test that playback starts only once the target latency is buffered."""
+        output.write(_pcm(1, 2, 3))
+        assert _pull(output, 2) == [0, 0]
+
+        output.write(_pcm(4))
+        assert _pull(output, 2) == [1, 2]
+        assert _pull(output, 2) == [3, 4]
+
+    def test_underrun_counted_mid_utterance(self, output):
+        """Test that running dry before the end of an utterance is an underrun."""
+        output.write(_pcm(1, 2, 3, 4))
+        _pull(output, 2)
+        _pull(output, 2)
+
+        assert _pull(output, 2) == [0, 0]
+        assert output.underruns == 1
+
+    def test_end_of_utterance_is_not_underrun(self, output):
+        """Test that a drained utterance plays out without counting an underrun."""
+        output.write(_pcm(1, 2, 3))
+        done = threading.Thread(target=output.drain)
+        done.start()
+        while not output._ending:
+            time.sleep(0.001)
+
+        samples = _pull(output, 2) + _pull(output, 2)
+        done.join(timeout=2.0)
+
+        assert samples == [1, 2, 3, 0]
+        assert not done.is_alive()
+        assert output.underruns == 0
+
+    def test_wraps_around_ring(self, output):
+        """Test that samples come out in order across the end of the ring."""
+        capacity = output.capacity
+        first = list(range(1, capacity + 1))
+        output.write(_pcm(*first))
+        played = []
+        for _ in range(capacity // 2 - 1):
+            played += _pull(output, 2)
+        output.write(_pcm(101, 102))
+        while output.buffered:
+            played += _pull(output, 2)
+
+        assert played == first + [101, 102]
+
+    def test_flush_drops_queued_audio(self, output):
+        """Test that flushing silences the next callback."""
+        output.write(_pcm(1, 2, 3, 4, 5, 6))
+        _pull(output, 2)
+
+        output.flush()
+
+        assert output.buffered == 0
+        assert _pull(output, 2) == [0, 0]
+        assert output.underruns == 0
+
+    def test_device_underflow_counted(self, output):
+        """Test that PortAudio's own underflow flag is counted separately."""
+        _pull(output, 2, status=audio_output.pyaudio.paOutputUnderflow)
+
+        assert output.device_underflows == 1
+        assert output.stats()["device_underflows"] == 1
+
+
+class TestWriters:
+    """Tests for blocking writes and draining."""
+
+    def test_write_blocks_until_space(self, output):
+        """Test that a write larger than the buffer waits for the device."""
+        samples = list(range(1, 15))
+        writer = threading.Thread(target=output.write, args=(_pcm(*samples),))
+        writer.start()
+        played = []
+        while writer.is_alive() or output.buffered:
+            played += _pull(output, 2)
+        writer.join()
+
+        assert [s for s in played if s] == samples
+
+    def test_cancel_stops_blocked_write(self, output):
+        """Test that a write waiting on a full buffer returns when cancelled."""
+        cancel = threading.Event()
+        cancel.set()
+
+        assert output.write(_pcm(*range(1, 30)), cancel) is False
+        assert output.buffered == output.capacity
+
+    def test_cancelled_drain_flushes(self, output):
+        """Test that cancelling a drain drops what was left."""
+        output.write(_pcm(1, 2, 3, 4))
+        cancel = threading.Event()
+        cancel.set()
+
+        assert output.drain(cancel) is False
+        assert output.buffered == 0
+
+    def test_stalled_device_raises(self, output):
+        """Test that a device that stops pulling audio surfaces as an OSError."""
+        output.write(_pcm(1, 2))
+
+        with patch('components.audio_output.STALL_SECONDS', 0.1):
+            with pytest.raises(OSError):
+                output.drain()
+
+    def test_close_stops_stream(self, output):
+        """Test that close stops and closes the PortAudio stream."""
+        stream = output.pa.open.return_value
+
+        output.close()
+
+        stream.stop_stream.assert_called_once()
+        stream.close.assert_called_once()
@@ -0,0 +1,128 @@
+"""
+Unit tests for tools/batch_transcribe.py (offline WAV corpus transcription).
+"""
+
+import pytest
+import sys
+import os
+import json
+import wave
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+# Add parent directory to path to import tools
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools import batch_transcribe
+
+
+def _write_wav(path: Path, seconds: float = 1.0, rate: int = 16000, channels: int = 1):
+    samples = np.zeros(int(seconds * rate) * channels, dtype=np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+
+
+@pytest.fixture
+def fake_vosk():
+    """Replace the per-process engine and recognizer with fakes."""
+    recognizer = MagicMock()
+    recognizer.AcceptWaveform.side_effect = [True, False, False, False, False]
+    recognizer.Result.return_value = '{"text": "hello"}'
+    recognizer.FinalResult.return_value = '{"text": "world"}'
+    with patch('tools.batch_transcribe.STTEngine') as mock_engine, \
+         patch('tools.batch_transcribe.KaldiRecognizer', return_value=recognizer) as mock_recognizer:
+        batch_transcribe._recognizers.clear()
+        yield mock_engine, mock_recognizer, recognizer
+        batch_transcribe._recognizers.clear()
+        batch_transcribe._engine = None
+
+
+def test_runs_without_audio_devices():
+    """Test that the offline tool starts on a machine without PyAudio/PortAudio."""
+    import subprocess
+    root = Path(__file__).parent.parent
+    script = (
+        "import sys, runpy; sys.modules['pyaudio'] = None; "
+        "sys.argv = ['batch_transcribe.py', '--help']; "
+        "runpy.run_path('tools/batch_transcribe.py', run_name='__main__')"
+    )
+
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert "usage" in result.stdout
+
+
+def test_find_wav_files_recursive_and_sorted(tmp_path):
+    """Test that WAV files are found in subdirectories and returned in order."""
+    (tmp_path / "b").mkdir()
+    _write_wav(tmp_path / "b" / "two.wav")
+    _write_wav(tmp_path / "one.WAV")
+    (tmp_path / "notes.txt").write_text("not audio")
+
+    files = batch_transcribe.find_wav_files(tmp_path)
+
+    assert files == [tmp_path / "b" / "two.wav", tmp_path / "one.WAV"]
+
+
+def test_transcribe_file_reports_timing(tmp_path, fake_vosk):
+    """Test that a file is decoded into text with decode time and real-time factor."""
+    _, _, recognizer = fake_vosk
+    path = tmp_path / "utt.wav"
+    _write_wav(path, seconds=1.0)
+    batch_transcribe._init_worker("model-dir")
+
+    result = batch_transcribe.transcribe_file(path)
+
+    assert result["text"] == "hello world"
+    assert result["audio_seconds"] == 1.0
+    assert result["decode_seconds"] >= 0
+    assert result["rtf"] == pytest.approx(result["decode_seconds"] / 1.0, abs=1e-3)
+
+
+def test_recognizer_reused_across_files(tmp_path, fake_vosk):
+    """Test that each worker builds one recognizer per sample rate and resets it per file."""
+    _, mock_recognizer, recognizer = fake_vosk
+    recognizer.AcceptWaveform.side_effect = None
+    recognizer.AcceptWaveform.return_value = False
+    batch_transcribe._init_worker("model-dir")
+    for name in ("a.wav", "b.wav", "c.wav"):
+        _write_wav(tmp_path / name, seconds=0.1)
+        batch_transcribe.transcribe_file(tmp_path / name)
+
+    assert mock_recognizer.call_count == 1
+    assert recognizer.Reset.call_count == 2
+
+
+def test_rejects_stereo(tmp_path, fake_vosk):
+    """Test that non-mono audio is reported instead of mis-decoded."""
+    path = tmp_path / "stereo.wav"
+    _write_wav(path, channels=2)
+    batch_transcribe._init_worker("model-dir")
+
+    result = batch_transcribe.transcribe_file(path)
+
+    assert "error" in result
+
+
+def test_main_writes_jsonl(tmp_path, fake_vosk):
+    """Test the CLI end to end in single-process mode."""
+    _, _, recognizer = fake_vosk
+    recognizer.AcceptWaveform.side_effect = None
+    recognizer.AcceptWaveform.return_value = False
+    _write_wav(tmp_path / "a.wav", seconds=0.5)
+    (tmp_path / "broken.wav").write_bytes(b"not a wav file")
+    output = tmp_path / "out.jsonl"
+
+    with patch.object(sys, "argv", ["batch_transcribe.py", str(tmp_path), "-o", str(output), "-j", "1"]):
+        batch_transcribe.main()
+
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(lines) == 2
+    by_name = {Path(line["file"]).name: line for line in lines}
+    assert by_name["a.wav"]["text"] == "world"
+    assert "error" in by_name["broken.wav"]
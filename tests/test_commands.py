@@ -0,0 +1,40 @@
+"""
+Unit tests for commands.py module (local command handling).
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import commands
+
+
+class TestHandleCommand:
+    """Tests for matching recognized text to commands."""
+
+    def test_builtin_time(self):
+        """Test that the time command answers without any network access."""
+        assert commands.handle_command("What time is it?").startswith("It's ")
+
+    def test_phrase_inside_longer_utterance(self):
+        """Test that filler words around a command phrase are tolerated."""
+        assert commands.handle_command("um what day is it today").startswith("Today is ")
+
+    def test_unknown_returns_none(self):
+        """Test that unmatched text is reported as no command."""
+        assert commands.handle_command("tell me a story") is None
+
+    def test_register_command(self):
+        """Test that registered phrases are matched and exposed for the grammar."""
+        handler = MagicMock(return_value="Lights on.")
+        commands.register_command(["Turn on the lights"], handler)
+        try:
+            assert "turn on the lights" in commands.get_phrases()
+            assert commands.handle_command("turn on the lights") == "Lights on."
+            handler.assert_called_once_with("turn on the lights")
+        finally:
+            commands._commands.pop("turn on the lights")
@@ -234,3 +234,80 @@ def test_conversation_flow():
     # Clear for next conversation
     conversation.clear_history()
     assert len(conversation.get_history()) == 0
+
+
+def test_prompt_for_llm_first_turn_is_full():
+    """Test that without a context the whole transcript is sent."""
+    conversation.add_assistant_message("Hello!")
+    conversation.add_user_message("What is 2+2?")
+
+    prompt, context = conversation.prompt_for_llm()
+
+    assert context is None
+    assert prompt == conversation.format_for_llm("ollama")
+
+
+def test_prompt_for_llm_continues_from_context():
+    """Test that with a context only the new message is sent."""
+    conversation.add_user_message("What is 2+2?")
+    conversation.prompt_for_llm()
+    conversation.add_assistant_message("4.")
+    conversation.set_llm_context([1, 2, 3])
+    conversation.add_user_message("And times 3?")
+
+    prompt, context = conversation.prompt_for_llm()
+
+    assert context == [1, 2, 3]
+    assert prompt == "User: And times 3?\nAssistant:"
+
+
+def test_prompt_for_llm_after_failed_reply_is_full():
+    """Test that a reply without a context falls back to the full transcript."""
+    conversation.add_user_message("What is 2+2?")
+    conversation.prompt_for_llm()
+    conversation.add_assistant_message("4.")
+    conversation.set_llm_context([1, 2, 3])
+    conversation.add_user_message("And times 3?")
+    conversation.prompt_for_llm()
+    conversation.add_assistant_message("Sorry, an unexpected error occurred.")
+    conversation.set_llm_context(None)
+    conversation.add_user_message("Try again")
+
+    prompt, context = conversation.prompt_for_llm()
+
+    assert context is None
+    assert "User: What is 2+2?" in prompt
+
+
+def test_prompt_for_llm_after_prune_is_full(monkeypatch):
+    """Test that pruning drops the context, since it still holds the dropped messages."""
+    monkeypatch.setattr(conversation.config, "MAX_HISTORY_TURNS", 1)
+    conversation.add_user_message("First")
+    conversation.prompt_for_llm()
+    conversation.add_assistant_message("One.")
+    conversation.set_llm_context([1, 2, 3])
+    conversation.add_user_message("Second")
+
+    prompt, context = conversation.prompt_for_llm()
+
+    assert context is None
+    assert "First" not in prompt
+    assert "User: Second" in prompt
+
+
+def test_context_from_reply_pruned_during_turn_discarded(monkeypatch):
+    """Test that a context is not stored if the history was pruned after its prompt was built."""
+    monkeypatch.setattr(conversation.config, "MAX_HISTORY_TURNS", 1)
+    conversation.add_user_message("First")
+    conversation.prompt_for_llm()
+    conversation.add_assistant_message("One.")
+    conversation.add_user_message("Second")
+    conversation.prompt_for_llm()
+    conversation.add_assistant_message("Two.")
+    conversation.set_llm_context([4, 5, 6])
+    conversation.add_user_message("Third")
+
+    prompt, context = conversation.prompt_for_llm()
+
+    assert context is None
+    assert prompt.startswith("You are a helpful voice assistant")
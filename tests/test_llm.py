@@ -0,0 +1,303 @@
+"""
+Unit tests for llm.py module (Ollama requests).
+"""
+
+import pytest
+import sys
+import os
+import json
+import requests
+import threading
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import config
+from components import llm
+
+
+def _ndjson_response(*chunks):
+    """A streamed Ollama response whose lines are the given JSON objects."""
+    response = MagicMock()
+    response.status_code = 200
+    response.iter_lines.return_value = iter([json.dumps(chunk).encode() for chunk in chunks])
+    return response
+
+
+@pytest.fixture
+def mock_post():
+    """Patch the pooled session's post method and start from a fresh client."""
+    llm.shutdown_llm()
+    with patch('components.llm.requests.Session') as mock_session, \
+         patch('components.llm.time.sleep') as mock_sleep:
+        post = mock_session.return_value.post
+        post.sleep = mock_sleep
+        yield post
+    llm.shutdown_llm()
+
+
+class TestStreamResponse:
+    """Tests for streaming NDJSON responses."""
+
+    def test_yields_text_as_it_arrives(self, mock_post):
+        """Test that each NDJSON line's text is yielded in order."""
+        mock_post.return_value = _ndjson_response(
+            {"response": "Hel", "done": False},
+            {"response": "lo.", "done": False},
+            {"response": "", "done": True},
+        )
+
+        assert list(llm.stream_response("Hi")) == ["Hel", "lo."]
+        assert mock_post.call_args.kwargs["json"]["stream"] is True
+        assert mock_post.call_args.kwargs["stream"] is True
+        mock_post.return_value.close.assert_called_once()
+
+    def test_stops_at_done(self, mock_post):
+        """Test that lines after the final chunk are ignored."""
+        mock_post.return_value = _ndjson_response(
+            {"response": "Done.", "done": True},
+            {"response": "extra", "done": False},
+        )
+
+        assert list(llm.stream_response("Hi")) == ["Done."]
+
+    def test_close_stops_generation(self, mock_post):
+        """Test that closing the generator closes the HTTP response."""
+        mock_post.return_value = _ndjson_response(
+            {"response": "One.", "done": False},
+            {"response": "Two.", "done": False},
+        )
+
+        stream = llm.stream_response("Hi")
+        assert next(stream) == "One."
+        stream.close()
+
+        mock_post.return_value.close.assert_called_once()
+
+    def test_cancel_closes_connection(self, mock_post):
+        """Test that a set cancel event stops reading tokens and closes the response."""
+        mock_post.return_value = _ndjson_response(
+            *[{"response": f"word{i} ", "done": False} for i in range(40)]
+        )
+        cancel = threading.Event()
+
+        stream = llm.stream_response("Hi", cancel=cancel)
+        assert next(stream) == "word0 "
+        cancel.set()
+
+        assert list(stream) == []
+        mock_post.return_value.close.assert_called_once()
+
+    def test_connection_error_spoken(self, mock_post):
+        """Test that a connection failure yields the usual apology."""
+        mock_post.side_effect = requests.exceptions.ConnectionError("refused")
+
+        assert list(llm.stream_response("Hi")) == [
+            "Sorry, I'm having trouble connecting to the language model."
+        ]
+
+    def test_error_after_text_ends_quietly(self, mock_post):
+        """Test that an error mid-stream keeps what was said without an apology."""
+        mock_post.return_value = _ndjson_response(
+            {"response": "Partial", "done": False},
+            {"error": "model crashed"},
+        )
+
+        assert list(llm.stream_response("Hi")) == ["Partial"]
+
+
+class TestOllamaClient:
+    """Tests for the pooled client."""
+
+    def test_session_reused(self, mock_post):
+        """Test that every request goes through the same session with timeouts."""
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {"response": "Hi."}
+
+        assert llm.generate_response("One") == "Hi."
+        assert llm.generate_response("Two") == "Hi."
+
+        assert mock_post.call_count == 2
+        assert mock_post.call_args.kwargs["timeout"] == (config.OLLAMA_CONNECT_TIMEOUT, config.OLLAMA_READ_TIMEOUT)
+
+    def test_connection_error_retried_with_backoff(self, mock_post):
+        """Test that a refused connection is retried with doubling delays."""
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"response": "Back."}
+        mock_post.side_effect = [
+            requests.exceptions.ConnectionError("refused"),
+            requests.exceptions.ConnectionError("refused"),
+            ok,
+        ]
+        client = llm.OllamaClient(max_retries=2, backoff=0.5)
+
+        assert client.generate("Hi")["response"] == "Back."
+        assert [c.args[0] for c in mock_post.sleep.call_args_list] == [0.5, 1.0]
+        assert client.last_latency["attempts"] == 3
+
+    def test_retries_bounded(self, mock_post):
+        """Test that the error surfaces once retries are exhausted."""
+        mock_post.side_effect = requests.exceptions.ConnectionError("refused")
+
+        assert llm.generate_response("Hi") == "Sorry, I'm having trouble connecting to the language model."
+        assert mock_post.call_count == config.OLLAMA_MAX_RETRIES + 1
+
+    def test_unavailable_status_retried(self, mock_post):
+        """Test that a 503 is retried and a 200 afterwards is used."""
+        busy = MagicMock(status_code=503)
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"response": "Ready."}
+        mock_post.side_effect = [busy, ok]
+
+        assert llm.OllamaClient(max_retries=1).generate("Hi")["response"] == "Ready."
+        busy.close.assert_called_once()
+
+    def test_read_timeout_not_retried(self, mock_post):
+        """Test that a generation that timed out is not started again."""
+        mock_post.side_effect = requests.exceptions.ReadTimeout("slow")
+
+        assert llm.generate_response("Hi") == "Sorry, I'm having trouble connecting to the language model."
+        assert mock_post.call_count == 1
+
+    def test_stream_latency_reported(self, mock_post):
+        """Test that time to first token and Ollama's own timings are recorded."""
+        mock_post.return_value = _ndjson_response(
+            {"response": "Hi.", "done": False},
+            {"response": "", "done": True, "load_duration": 2_000_000, "eval_count": 3},
+        )
+        client = llm.get_llm_client()
+
+        list(llm.stream_response("Hi"))
+
+        latency = client.last_latency
+        assert latency["first_token_ms"] is not None
+        assert latency["total_ms"] >= latency["first_token_ms"]
+        assert latency["load_ms"] == 2.0
+        assert latency["eval_count"] == 3
+
+
+class TestWarmUp:
+    """Tests for model warm-up and keep_alive."""
+
+    def test_keep_alive_sent_with_every_request(self, mock_post):
+        """Test that the configured keep_alive is part of each payload."""
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {"response": "Hi."}
+        client = llm.OllamaClient(keep_alive="10m")
+
+        client.generate("Hi")
+        list(client.stream("Hi"))
+
+        for call_args in mock_post.call_args_list:
+            assert call_args.kwargs["json"]["keep_alive"] == "10m"
+
+    @pytest.mark.parametrize("setting,expected", [
+        ("10m", "10m"), ("300", 300), ("-1", -1), ("1.5", 1.5), ("", None), (None, None),
+    ])
+    def test_keep_alive_values(self, setting, expected):
+        """Test that bare numbers are sent as seconds and durations as strings."""
+        assert llm._keep_alive_value(setting) == expected
+
+    def test_warm_up_sends_empty_prompt(self, mock_post):
+        """Test that warm-up asks Ollama to load the model without generating."""
+        mock_post.return_value.status_code = 200
+        client = llm.OllamaClient(keep_alive="5m")
+
+        client.warm_up()
+
+        payload = mock_post.call_args.kwargs["json"]
+        assert payload["prompt"] == ""
+        assert payload["stream"] is False
+        assert payload["keep_alive"] == "5m"
+
+    def test_warm_up_runs_in_background(self, mock_post):
+        """Test that warm_up_llm returns at once and does not start a second load."""
+        release = threading.Event()
+
+        def slow_post(*args, **kwargs):
+            release.wait(timeout=2.0)
+            return MagicMock(status_code=200)
+
+        mock_post.side_effect = slow_post
+        with patch('components.llm.OLLAMA_WARMUP', True):
+            thread = llm.warm_up_llm()
+            assert thread is not None and thread.is_alive()
+            assert llm.warm_up_llm() is None
+            release.set()
+            thread.join(timeout=2.0)
+
+        assert mock_post.call_count == 1
+
+    def test_warm_up_disabled(self, mock_post):
+        """Test that nothing is sent when warm-up is off."""
+        with patch('components.llm.OLLAMA_WARMUP', False):
+            assert llm.warm_up_llm() is None
+
+        mock_post.assert_not_called()
+
+    def test_warm_up_error_printed(self, mock_post, capsys):
+        """Test that a failed warm-up is reported and not raised."""
+        mock_post.side_effect = requests.exceptions.ConnectionError("refused")
+        with patch('components.llm.OLLAMA_WARMUP', True):
+            llm.warm_up_llm().join(timeout=2.0)
+
+        assert "warm-up failed" in capsys.readouterr().out
+
+
+class TestContextReuse:
+    """Tests for continuing from Ollama's context tokens."""
+
+    def test_context_sent_and_recorded(self, mock_post):
+        """Test that a given context is sent and the returned one is kept."""
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {"response": "12.", "context": [7, 8, 9]}
+
+        assert llm.generate_response("User: And times 3?\nAssistant:", context=[1, 2, 3]) == "12."
+
+        assert mock_post.call_args.kwargs["json"]["context"] == [1, 2, 3]
+        assert llm.get_last_context() == [7, 8, 9]
+
+    def test_no_context_omitted(self, mock_post):
+        """Test that a first turn does not send an empty context."""
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {"response": "Hi."}
+
+        llm.generate_response("Hi")
+
+        assert "context" not in mock_post.call_args.kwargs["json"]
+
+    def test_stream_context_from_final_chunk(self, mock_post):
+        """Test that a completed stream leaves the context of its final chunk."""
+        mock_post.return_value = _ndjson_response(
+            {"response": "Hi.", "done": False},
+            {"response": "", "done": True, "context": [4, 5]},
+        )
+
+        list(llm.stream_response("Hi", context=[1]))
+
+        assert mock_post.call_args.kwargs["json"]["context"] == [1]
+        assert llm.get_last_context() == [4, 5]
+
+    def test_interrupted_stream_leaves_no_context(self, mock_post):
+        """Test that a reply cut short does not leave a context behind."""
+        mock_post.return_value = _ndjson_response(
+            {"response": "One.", "done": False},
+            {"response": "", "done": True, "context": [4, 5]},
+        )
+        llm.get_llm_client().last_context = [1]
+
+        stream = llm.stream_response("Hi")
+        next(stream)
+        stream.close()
+
+        assert llm.get_last_context() is None
+
+    def test_failed_request_clears_context(self, mock_post):
+        """Test that an error drops the previous context."""
+        mock_post.side_effect = requests.exceptions.ReadTimeout("slow")
+        llm.get_llm_client().last_context = [1]
+
+        llm.generate_response("Hi", context=[1])
+
+        assert llm.get_last_context() is None
@@ -15,6 +15,13 @@ import config
 from components import conversation
 
 
+@pytest.fixture(autouse=True)
+def blocking_llm():
+    """Run the conversation tests against generate_response; streaming has its own tests."""
+    with patch.object(config, 'LLM_STREAMING', False):
+        yield
+
+
 class TestConversationFlow:
     """Tests for the conversation flow logic."""
 
@@ -184,6 +191,387 @@ class TestConversationFlow:
         assert any("couldn't generate" in msg.lower() for msg in error_messages)
 
 
+class TestOneBreath:
+    """Tests for speech that continues straight after the wake word."""
+
+    @patch('main.speak_text')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_pending_speech_skips_greeting(self, mock_vad, mock_transcribe, mock_llm, mock_speak):
+        """Test that the first request is transcribed without a greeting or VAD wait."""
+        mock_vad.return_value = False
+        mock_transcribe.return_value = "what is the capital of France"
+        mock_llm.return_value = "Paris."
+
+        from main import run_conversation
+        conversation.clear_history()
+        run_conversation(speech_pending=True)
+
+        spoken = [call_args[0][0] for call_args in mock_speak.call_args_list]
+        assert not any("ready to talk" in msg for msg in spoken)
+        assert spoken[0] == "Paris."
+        # VAD only runs for the second turn, which times out
+        assert mock_vad.call_count == 1
+        assert conversation.get_history()[0] == {"role": "user", "content": "what is the capital of France"}
+
+    @patch('main.speak_text')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_empty_follow_on_falls_back_to_greeting(self, mock_vad, mock_transcribe, mock_llm, mock_speak):
+        """Test that a false follow-on trigger still acknowledges the wake word and listens."""
+        mock_vad.side_effect = [True, False]
+        mock_transcribe.side_effect = ["", "what is the capital of France"]
+        mock_llm.return_value = "Paris."
+
+        from main import run_conversation
+        conversation.clear_history()
+        with patch.object(config, 'BARGE_IN', False):
+            run_conversation(speech_pending=True)
+
+        spoken = [call_args[0][0] for call_args in mock_speak.call_args_list]
+        assert "ready to talk" in spoken[0]
+        assert spoken[1] == "Paris."
+        # After the greeting the normal listen loop waits for the request
+        assert mock_vad.call_args_list[0].kwargs["timeout_seconds"] == config.AWAITING_TIMEOUT
+        assert mock_transcribe.call_count == 2
+
+    @patch('main.has_voice_activity')
+    @patch('main.get_detection_position')
+    def test_follow_on_listens_from_wake_word_end(self, mock_position, mock_vad):
+        """Test that follow-on speech is checked from where the wake word ended."""
+        mock_position.return_value = 48000
+        mock_vad.return_value = True
+
+        from main import speech_follows_wake_word
+        with patch.object(config, 'WAKE_FOLLOW_ON', True):
+            assert speech_follows_wake_word() is True
+
+        assert mock_vad.call_args.kwargs["start_position"] == 48000
+        assert mock_vad.call_args.kwargs["timeout_seconds"] == config.WAKE_FOLLOW_ON_WINDOW_MS / 1000
+
+    @patch('main.has_voice_activity')
+    @patch('main.get_detection_position')
+    def test_follow_on_disabled(self, mock_position, mock_vad):
+        """Test that the greeting flow is kept when follow-on is disabled."""
+        mock_position.return_value = 48000
+
+        from main import speech_follows_wake_word
+        with patch.object(config, 'WAKE_FOLLOW_ON', False):
+            assert speech_follows_wake_word() is False
+
+        mock_vad.assert_not_called()
+
+
+class TestBargeIn:
+    """Tests for interrupting the assistant while it speaks."""
+
+    @patch('main.start_speaking')
+    @patch('main.has_voice_activity')
+    def test_speech_during_playback_interrupts(self, mock_vad, mock_start):
+        """Test that detected speech stops playback and reports pending speech."""
+        playback = MagicMock()
+        mock_start.return_value = playback
+        mock_vad.return_value = True
+
+        from main import speak_with_barge_in
+        with patch.object(config, 'BARGE_IN', True):
+            assert speak_with_barge_in("A long answer.") is True
+
+        playback.interrupt.assert_called_once()
+        assert mock_vad.call_args.kwargs["stop_event"] is playback.done
+        assert mock_vad.call_args.kwargs["energy_threshold"] == config.BARGE_IN_ENERGY_THRESHOLD
+
+    @patch('main.start_speaking')
+    @patch('main.has_voice_activity')
+    def test_playback_completes_without_speech(self, mock_vad, mock_start):
+        """Test that playback that ends on its own is not interrupted."""
+        playback = MagicMock()
+        mock_start.return_value = playback
+        mock_vad.return_value = False
+
+        from main import speak_with_barge_in
+        with patch.object(config, 'BARGE_IN', True):
+            assert speak_with_barge_in("Short.") is False
+
+        playback.interrupt.assert_not_called()
+        playback.wait.assert_called_once()
+
+    @patch('main.speak_with_barge_in')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_interrupted_reply_goes_to_next_turn(self, mock_vad, mock_transcribe, mock_llm, mock_speak):
+        """Test that speech over a reply is transcribed without another VAD wait."""
+        mock_speak.side_effect = [False, True]
+        mock_vad.return_value = True
+        mock_transcribe.side_effect = ["Tell me a long story", "Stop"]
+        mock_llm.return_value = "Once upon a time..."
+
+        from main import run_conversation
+        conversation.clear_history()
+        with patch('main.speak_text'):
+            run_conversation()
+
+        # Only the first turn waited for VAD; the second was already speaking
+        assert mock_vad.call_count == 1
+        assert mock_transcribe.call_count == 2
+
+
+class TestStreamedReply:
+    """Tests for speaking the LLM reply while it is generated."""
+
+    @patch('main.speak_text')
+    @patch('main.stream_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_sentences_spoken_as_generated(self, mock_vad, mock_transcribe, mock_stream, mock_speak):
+        """Test that TTS receives sentences in the order the tokens form them."""
+        mock_vad.side_effect = [True, False]
+        mock_transcribe.return_value = "Tell me about Paris"
+        mock_stream.return_value = iter(["Paris is the cap", "ital of France. It is", " known for art."])
+        spoken = []
+        mock_speak.side_effect = lambda text: spoken.append(text if isinstance(text, str) else list(text))
+
+        from main import run_conversation
+        conversation.clear_history()
+        with patch.object(config, 'LLM_STREAMING', True):
+            run_conversation()
+
+        assert spoken[1] == ["Paris is the capital of France.", "It is known for art."]
+        assert conversation.get_history()[-1] == {
+            "role": "assistant", "content": "Paris is the capital of France. It is known for art."
+        }
+
+    @patch('main.speak_text')
+    @patch('main.stream_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_empty_stream_reported(self, mock_vad, mock_transcribe, mock_stream, mock_speak):
+        """Test that a stream with no text falls back to the empty-response message."""
+        mock_vad.side_effect = [True, False]
+        mock_transcribe.return_value = "Hello"
+        mock_stream.return_value = iter([])
+        spoken = []
+        mock_speak.side_effect = lambda text: spoken.append(text if isinstance(text, str) else list(text))
+
+        from main import run_conversation
+        conversation.clear_history()
+        with patch.object(config, 'LLM_STREAMING', True):
+            run_conversation()
+
+        assert spoken[1] == []
+        assert spoken[2] == "Sorry, I couldn't generate a response. Please try again."
+
+
+class TestStreamedBargeIn:
+    """Tests for interrupting a reply that is still being generated."""
+
+    @patch('main.has_voice_activity')
+    @patch('main.start_speaking')
+    @patch('main.stream_response')
+    def test_barge_in_stops_generation(self, mock_stream, mock_start, mock_vad):
+        """Test that the LLM stream stops at the next token once the user interrupts."""
+        consumed = []
+
+        def tokens(prompt, context, cancel):
+            for i in range(40):
+                consumed.append(i)
+                yield f"Sentence {i}. "
+
+        def start(text, cancel=None):
+            sentences = iter(text)
+            next(sentences)
+            # The user talks over the first sentence
+            cancel.set()
+            list(sentences)
+            return MagicMock()
+
+        mock_stream.side_effect = tokens
+        mock_start.side_effect = start
+        mock_vad.return_value = True
+
+        from main import speak_streamed_response
+        with patch.object(config, 'BARGE_IN', True):
+            reply, interrupted = speak_streamed_response("Tell me a story")
+
+        assert interrupted
+        assert reply == "Sentence 0."
+        # No token past the interrupted sentence is read
+        assert consumed == [0]
+
+
+class TestContextReuse:
+    """Tests for continuing the LLM context across turns."""
+
+    @patch('main.get_last_context')
+    @patch('main.speak_text')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_second_turn_sends_only_new_message(self, mock_vad, mock_transcribe, mock_llm, mock_speak, mock_context):
+        """Test that the second turn continues from the first reply's context."""
+        mock_vad.side_effect = [True, True, False]
+        mock_transcribe.side_effect = ["What is 2+2?", "And times 3?"]
+        mock_llm.side_effect = ["4.", "12."]
+        mock_context.side_effect = [[1, 2, 3], [1, 2, 3, 4, 5]]
+
+        from main import run_conversation
+        conversation.clear_history()
+        with patch.object(config, 'OLLAMA_REUSE_CONTEXT', True):
+            run_conversation()
+
+        first, second = mock_llm.call_args_list
+        assert first.args[1] is None
+        assert "What is 2+2?" in first.args[0]
+        assert second.args == ("User: And times 3?\nAssistant:", [1, 2, 3])
+
+
+class TestResponseCache:
+    """Tests for answering repeated questions from the cache."""
+
+    @patch('main.speak_text')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_repeated_question_skips_llm(self, mock_vad, mock_transcribe, mock_llm, mock_speak):
+        """Test that the second time a question is asked the LLM is not called."""
+        from components.response_cache import ResponseCache
+        mock_vad.side_effect = [True, True, False]
+        mock_transcribe.side_effect = ["Tell me a joke", "tell me a joke!"]
+        mock_llm.return_value = "Knock knock."
+        cache = ResponseCache()
+
+        from main import run_conversation
+        conversation.clear_history()
+        with patch('main.get_response_cache', return_value=cache):
+            run_conversation()
+
+        assert mock_llm.call_count == 1
+        spoken = [call_args[0][0] for call_args in mock_speak.call_args_list]
+        assert spoken.count("Knock knock.") == 2
+        assert cache.stats()["hits"] == 1
+
+    @patch('main.speak_text')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_error_reply_not_cached(self, mock_vad, mock_transcribe, mock_llm, mock_speak):
+        """Test that an apology for a failed request is not stored."""
+        from components.llm import CONNECTION_ERROR_MESSAGE
+        from components.response_cache import ResponseCache
+        mock_vad.side_effect = [True, True, False]
+        mock_transcribe.side_effect = ["Tell me a joke", "Tell me a joke"]
+        mock_llm.side_effect = [CONNECTION_ERROR_MESSAGE, "Knock knock."]
+
+        from main import run_conversation
+        conversation.clear_history()
+        with patch('main.get_response_cache', return_value=ResponseCache()):
+            run_conversation()
+
+        assert mock_llm.call_count == 2
+
+
+class TestCommandMode:
+    """Tests for the local-only command mode."""
+
+    @patch('main.speak_text')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_command_answered_without_llm(self, mock_vad, mock_transcribe, mock_llm, mock_speak):
+        """Test that a known command is answered locally."""
+        mock_vad.return_value = True
+        mock_transcribe.return_value = "what time is it"
+
+        from main import run_command
+        run_command()
+
+        mock_transcribe.assert_called_once_with(commands_only=True)
+        mock_llm.assert_not_called()
+        assert mock_speak.call_args[0][0].startswith("It's ")
+
+    @patch('main.speak_text')
+    @patch('main.generate_response')
+    @patch('main.transcribe_audio')
+    @patch('main.has_voice_activity')
+    def test_unknown_command_not_sent_to_llm(self, mock_vad, mock_transcribe, mock_llm, mock_speak):
+        """Test that unmatched input in command mode still skips the LLM."""
+        mock_vad.return_value = True
+        mock_transcribe.return_value = "tell me about black holes"
+
+        from main import run_command
+        run_command()
+
+        mock_llm.assert_not_called()
+        assert "don't know" in mock_speak.call_args[0][0]
+
+    @patch('main.warm_up_llm')
+    @patch('main.run_conversation')
+    @patch('main.run_command')
+    @patch('main.get_wake_keyword')
+    @patch('main.wait_for_wake_word')
+    @patch('main.list_audio_devices')
+    @patch('main.get_capture')
+    @patch('main.preload_tts')
+    @patch('main.shutdown_tts')
+    @patch('main.shutdown_capture')
+    @patch('main.shutdown_worker')
+    @patch('main.shutdown_wake_word')
+    @patch('main.preload_model')
+    def test_wake_word_routes_by_mode(self, _preload, _shutdown_wake, _shutdown_worker, _shutdown_capture,
+                                      _shutdown_tts, _preload_tts, _capture, _devices, mock_wait, mock_keyword, mock_command, mock_conversation,
+                                      mock_warm_up):
+        """Test that each wake word starts the mode it is configured for."""
+        from components.wake_word import WakeKeyword
+        import main
+
+        mock_wait.side_effect = [0, 1, KeyboardInterrupt]
+        mock_keyword.side_effect = [
+            WakeKeyword("jarvis", "jarvis.ppn", "conversation"),
+            WakeKeyword("computer", "computer.ppn", "command"),
+        ]
+
+        main.main()
+
+        assert mock_conversation.call_count == 1
+        assert mock_command.call_count == 1
+        # Only the conversation wake word needs the model loaded
+        assert mock_warm_up.call_count == 1
+
+    @patch('main.warm_up_llm')
+    @patch('main.speech_follows_wake_word')
+    @patch('main.run_conversation')
+    @patch('main.get_wake_keyword')
+    @patch('main.wait_for_wake_word')
+    @patch('main.list_audio_devices')
+    @patch('main.get_capture')
+    @patch('main.preload_tts')
+    @patch('main.shutdown_tts')
+    @patch('main.shutdown_capture')
+    @patch('main.shutdown_worker')
+    @patch('main.shutdown_wake_word')
+    @patch('main.preload_model')
+    def test_warm_up_starts_before_follow_on_check(self, _preload, _shutdown_wake, _shutdown_worker,
+                                                   _shutdown_capture, _shutdown_tts, _preload_tts, _capture,
+                                                   _devices, mock_wait, mock_keyword, _conversation,
+                                                   mock_follows, mock_warm_up):
+        """Test that the model starts loading before the follow-on window is waited out."""
+        from components.wake_word import WakeKeyword
+        import main
+
+        order = []
+        mock_wait.side_effect = [0, KeyboardInterrupt]
+        mock_keyword.return_value = WakeKeyword("jarvis", "jarvis.ppn", "conversation")
+        mock_warm_up.side_effect = lambda: order.append("warm_up")
+        mock_follows.side_effect = lambda: order.append("follow_on") or False
+
+        main.main()
+
+        assert order == ["warm_up", "follow_on"]
+
+
 class TestConfigIntegration:
     """Tests for config integration with conversation."""
 
@@ -0,0 +1,76 @@
+"""
+Unit tests for pcm.py module (vectorized PCM conversion).
+"""
+
+import pytest
+import sys
+import os
+import struct
+import numpy as np
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import pcm
+
+
+class TestToInt16:
+    """Tests for converting synthesizer output to int16."""
+
+    def test_list_of_ints(self):
+        """Test the common Orca case of a flat list of Python ints."""
+        result = pcm.to_int16([1, -2, 32767, -32768])
+
+        assert result.dtype == np.dtype("<i2")
+        assert result.tolist() == [1, -2, 32767, -32768]
+
+    def test_int16_array_not_copied(self):
+        """Test that a contiguous int16 array is passed through as is."""
+        samples = np.arange(10, dtype=np.int16)
+
+        assert pcm.to_int16(samples) is samples
+
+    def test_wider_and_strided_arrays(self):
+        """Test that other dtypes and non-contiguous views come back contiguous."""
+        samples = np.arange(20, dtype=np.int32)[::2]
+
+        result = pcm.to_int16(samples)
+
+        assert result.flags.c_contiguous
+        assert result.tolist() == list(range(0, 20, 2))
+
+    def test_out_of_range_clipped(self):
+        """Test that values beyond 16 bits clip instead of wrapping."""
+        assert pcm.to_int16([40000, -40000, 1.7]).tolist() == [32767, -32768, 1]
+
+    def test_nested_containers(self):
+        """Test that nested lists, dicts and byte chunks are flattened in order."""
+        nested = {"first": [[1, 2], [3]], "second": [struct.pack("<hh", 4, 5)]}
+
+        assert pcm.to_int16(nested).tolist() == [1, 2, 3, 4, 5]
+
+    def test_ragged_and_invalid_items(self):
+        """Test that ragged nesting works and unconvertible items are skipped."""
+        assert pcm.to_int16([1, [2, 3]]).tolist() == [1, 2, 3]
+        assert pcm.to_int16(["x", 5, None]).tolist() == [5]
+
+    def test_empty(self):
+        """Test that empty input yields an empty buffer."""
+        assert pcm.to_int16([]).size == 0
+
+
+class TestPcmToBytes:
+    """Tests for producing playback bytes."""
+
+    def test_matches_struct_pack(self):
+        """Test that the output is identical to the old struct-based conversion."""
+        samples = list(range(-500, 500, 7))
+
+        assert pcm.pcm_to_bytes(samples) == struct.pack("<" + "h" * len(samples), *samples)
+
+    def test_bytes_pass_through(self):
+        """Test that raw PCM bytes are returned unchanged."""
+        data = b"\x01\x00\x02\x00"
+
+        assert pcm.pcm_to_bytes(data) is data
+        assert pcm.pcm_to_bytes(bytearray(data)) == data
@@ -0,0 +1,109 @@
+"""
+Unit tests for response_cache.py module (cached LLM replies).
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import response_cache
+from components.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Tests for the in-memory cache."""
+
+    def test_normalized_questions_match(self):
+        """Test that case, punctuation and spacing do not matter."""
+        cache = ResponseCache()
+        cache.put("Tell me a joke!", "Why did the chicken cross the road?")
+
+        assert cache.get("  tell me a JOKE ") == "Why did the chicken cross the road?"
+        assert cache.stats()["hits"] == 1
+
+    def test_miss_counted(self):
+        """Test that an unknown question is a miss."""
+        cache = ResponseCache()
+
+        assert cache.get("What's the weather like?") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_context_is_part_of_key(self):
+        """Test that the same question after different messages is a different entry."""
+        cache = ResponseCache()
+        cache.put("Why?", "Because it is blue.", context=["The sky is blue."])
+
+        assert cache.get("Why?", context=["The sky is blue."]) == "Because it is blue."
+        assert cache.get("Why?", context=["Grass is green."]) is None
+        assert cache.get("Why?") is None
+
+    def test_entries_expire(self):
+        """Test that entries older than the TTL are not used."""
+        cache = ResponseCache(ttl_seconds=60)
+        with patch('components.response_cache.time.time', return_value=1000.0):
+            cache.put("Tell me a joke", "Knock knock.")
+        with patch('components.response_cache.time.time', return_value=1061.0):
+            assert cache.get("Tell me a joke") is None
+
+        assert cache.stats()["expired"] == 1
+        assert cache.stats()["entries"] == 0
+
+    def test_least_recently_used_evicted(self):
+        """Test that the least recently used entry goes first."""
+        cache = ResponseCache(max_entries=2)
+        cache.put("one", "1")
+        cache.put("two", "2")
+        cache.get("one")
+        cache.put("three", "3")
+
+        assert cache.get("two") is None
+        assert cache.get("one") == "1"
+        assert cache.get("three") == "3"
+
+
+class TestPersistentCache:
+    """Tests for the SQLite backing."""
+
+    def test_entries_survive_restart(self, tmp_path):
+        """Test that a new cache on the same file sees stored replies."""
+        db_path = str(tmp_path / "cache" / "responses.db")
+        cache = ResponseCache(db_path=db_path)
+        cache.put("Tell me a joke", "Knock knock.")
+        cache.close()
+
+        reopened = ResponseCache(db_path=db_path)
+
+        assert reopened.get("tell me a joke") == "Knock knock."
+        reopened.close()
+
+    def test_expired_rows_ignored(self, tmp_path):
+        """Test that an expired row on disk is a miss and is removed."""
+        db_path = str(tmp_path / "responses.db")
+        cache = ResponseCache(ttl_seconds=60, db_path=db_path)
+        with patch('components.response_cache.time.time', return_value=1000.0):
+            cache.put("Tell me a joke", "Knock knock.")
+        cache.close()
+
+        reopened = ResponseCache(ttl_seconds=60, db_path=db_path)
+        with patch('components.response_cache.time.time', return_value=2000.0):
+            assert reopened.get("Tell me a joke") is None
+        assert reopened._db.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] == 0
+        reopened.close()
+
+    def test_disk_bounded(self, tmp_path):
+        """Test that the table keeps only max_entries rows."""
+        cache = ResponseCache(max_entries=2, db_path=str(tmp_path / "responses.db"))
+        for i in range(5):
+            cache.put(f"question {i}", f"answer {i}")
+
+        assert cache._db.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] == 2
+        cache.close()
+
+    def test_disabled_by_config(self):
+        """Test that no cache is created when it is disabled."""
+        with patch.object(response_cache.config, 'RESPONSE_CACHE_ENABLED', False):
+            assert response_cache.get_response_cache() is None
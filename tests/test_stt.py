@@ -5,13 +5,38 @@ Unit tests for stt.py module (Voice Activity Detection).
 import pytest
 import sys
 import os
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock
 import numpy as np
 
 # Add parent directory to path to import components
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from components import stt
+from components import stt, vad
+
+
+@pytest.fixture(autouse=True)
+def reset_vad():
+    """Give every test a fresh detector so noise-floor state does not leak."""
+    vad._detector = None
+    yield
+    vad._detector = None
+
+
+def _tone(mean_abs, samples=512, freq=440.0):
+    """Voice-band sine whose mean absolute amplitude is `mean_abs`."""
+    t = np.arange(samples) / 16000
+    return (np.sin(2 * np.pi * freq * t) * mean_abs * np.pi / 2).astype(np.int16)
+
+
+def _mock_capture(mock_get_capture):
+    """Wire a mocked shared capture engine and return its cursor."""
+    mock_cursor = MagicMock()
+    mock_get_capture.return_value.open_cursor.return_value = mock_cursor
+    mock_get_capture.return_value.rate = 16000
+    mock_get_capture.return_value.recent.return_value = np.zeros(0, dtype=np.int16)
+    return mock_cursor
 
 
 class TestVoiceActivityDetection:
@@ -22,108 +47,80 @@ class TestVoiceActivityDetection:
         assert hasattr(stt, 'has_voice_activity')
         assert callable(stt.has_voice_activity)
 
-    @patch('components.stt.pyaudio.PyAudio')
-    def test_has_voice_activity_timeout(self, mock_pyaudio):
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_timeout(self, mock_get_capture):
         """Test that function returns False after timeout with no voice activity."""
-        # Mock audio stream
-        mock_stream = MagicMock()
-        mock_audio = MagicMock()
-        mock_audio.open.return_value = mock_stream
+        mock_cursor = _mock_capture(mock_get_capture)
 
         # Return silent audio (low energy)
-        silent_chunk = np.zeros(512, dtype=np.int16).tobytes()
-        mock_stream.read.return_value = silent_chunk
-
-        mock_pyaudio.return_value = mock_audio
+        mock_cursor.read.return_value = np.zeros(512, dtype=np.int16)
 
         # Test with short timeout for speed
         result = stt.has_voice_activity(timeout_seconds=0.1, energy_threshold=500)
 
         assert result is False
-        assert mock_stream.stop_stream.called
-        assert mock_stream.close.called
-        assert mock_audio.terminate.called
+        assert mock_cursor.read.called
 
-    @patch('components.stt.pyaudio.PyAudio')
-    def test_has_voice_activity_detects_voice(self, mock_pyaudio):
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_detects_voice(self, mock_get_capture):
         """Test that function returns True when voice activity is detected."""
-        # Mock audio stream
-        mock_stream = MagicMock()
-        mock_audio = MagicMock()
-        mock_audio.open.return_value = mock_stream
-
-        # Create audio with high energy (simulating voice)
-        voice_chunk = np.ones(512, dtype=np.int16) * 1000  # High amplitude = voice
-        mock_stream.read.side_effect = [
-            np.zeros(512, dtype=np.int16).tobytes(),  # First chunk: silence
-            voice_chunk.tobytes(),  # Second chunk: voice activity
-        ]
+        mock_cursor = _mock_capture(mock_get_capture)
 
-        mock_pyaudio.return_value = mock_audio
+        # Create audio with high energy in the speech band (simulating voice)
+        voice_chunk = _tone(1000)  # High amplitude = voice
+        mock_cursor.read.side_effect = [
+            np.zeros(512, dtype=np.int16),  # First chunk: silence
+            voice_chunk,  # Second chunk: voice activity
+        ]
 
         result = stt.has_voice_activity(timeout_seconds=5.0, energy_threshold=500)
 
         assert result is True
-        assert mock_stream.stop_stream.called
-        assert mock_stream.close.called
-        assert mock_audio.terminate.called
+        assert mock_cursor.read.call_count == 2
 
-    @patch('components.stt.pyaudio.PyAudio')
-    def test_has_voice_activity_cleans_up_on_exception(self, mock_pyaudio):
-        """Test that function cleans up resources even if exception occurs."""
-        # Mock audio stream to raise exception
-        mock_stream = MagicMock()
-        mock_audio = MagicMock()
-        mock_audio.open.return_value = mock_stream
-        mock_stream.read.side_effect = Exception("Audio device error")
-
-        mock_pyaudio.return_value = mock_audio
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_returns_false_on_exception(self, mock_get_capture):
+        """Test that function returns False if the capture engine fails."""
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.side_effect = Exception("Audio device error")
 
         result = stt.has_voice_activity(timeout_seconds=5.0, energy_threshold=500)
 
         # Should return False on exception
         assert result is False
 
-        # Should still clean up
-        assert mock_stream.stop_stream.called
-        assert mock_stream.close.called
-        assert mock_audio.terminate.called
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_handles_capture_stall(self, mock_get_capture):
+        """Test that a capture read timing out still honours the VAD timeout."""
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = None
+
+        result = stt.has_voice_activity(timeout_seconds=0.1, energy_threshold=500)
 
-    @patch('components.stt.pyaudio.PyAudio')
-    def test_has_voice_activity_threshold_configurable(self, mock_pyaudio):
+        assert result is False
+
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_threshold_configurable(self, mock_get_capture):
         """Test that energy threshold is configurable."""
-        mock_stream = MagicMock()
-        mock_audio = MagicMock()
-        mock_audio.open.return_value = mock_stream
+        mock_cursor = _mock_capture(mock_get_capture)
 
         # Create audio with moderate energy
-        moderate_chunk = np.ones(512, dtype=np.int16) * 300
-        mock_stream.read.return_value = moderate_chunk.tobytes()
-
-        mock_pyaudio.return_value = mock_audio
+        moderate_chunk = _tone(300)
+        mock_cursor.read.return_value = moderate_chunk
 
         # Should detect with low threshold
         result = stt.has_voice_activity(timeout_seconds=5.0, energy_threshold=100)
         assert result is True
 
-        # Reset mock
-        mock_stream.reset_mock()
-        mock_audio.reset_mock()
-
         # Should not detect with high threshold
-        mock_stream.read.return_value = moderate_chunk.tobytes()
         result = stt.has_voice_activity(timeout_seconds=0.1, energy_threshold=1000)
         assert result is False
 
-    @patch('components.stt.pyaudio.PyAudio')
-    def test_has_voice_activity_default_parameters(self, mock_pyaudio):
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_default_parameters(self, mock_get_capture):
         """Test that default parameters are reasonable."""
-        mock_stream = MagicMock()
-        mock_audio = MagicMock()
-        mock_audio.open.return_value = mock_stream
-        mock_stream.read.return_value = np.zeros(512, dtype=np.int16).tobytes()
-
-        mock_pyaudio.return_value = mock_audio
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = np.zeros(512, dtype=np.int16)
 
         # Call with defaults
         result = stt.has_voice_activity()
@@ -131,39 +128,22 @@ class TestVoiceActivityDetection:
         # Should timeout after default timeout (we use 0.01s in test for speed, but defaults should be reasonable)
         assert isinstance(result, bool)
 
-    @patch('components.stt.pyaudio.PyAudio')
-    def test_has_voice_activity_format_and_rate(self, mock_pyaudio):
-        """Test that audio format and sample rate are configured correctly."""
-        mock_stream = MagicMock()
-        mock_audio = MagicMock()
-        mock_audio.open.return_value = mock_stream
-
-        silent_chunk = np.zeros(512, dtype=np.int16).tobytes()
-        mock_stream.read.return_value = silent_chunk
-
-        mock_pyaudio.return_value = mock_audio
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_reads_chunks_from_shared_capture(self, mock_get_capture):
+        """Test that VAD reads CHUNK-sized frames from the shared capture engine."""
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = np.zeros(512, dtype=np.int16)
 
         stt.has_voice_activity(timeout_seconds=0.01, energy_threshold=500)
 
-        # Verify PyAudio was opened with correct settings
-        mock_audio.open.assert_called()
-        call_kwargs = mock_audio.open.call_args[1]
-        assert call_kwargs['format'] == stt.FORMAT
-        assert call_kwargs['channels'] == stt.CHANNELS
-        assert call_kwargs['rate'] == stt.RATE
-        assert call_kwargs['input'] is True
+        mock_get_capture.return_value.open_cursor.assert_called()
+        assert mock_cursor.read.call_args[0][0] == stt.CHUNK
 
-    @patch('components.stt.pyaudio.PyAudio')
-    def test_has_voice_activity_multiple_calls(self, mock_pyaudio):
+    @patch('components.stt.get_capture')
+    def test_has_voice_activity_multiple_calls(self, mock_get_capture):
         """Test that function can be called multiple times without issues."""
-        mock_stream = MagicMock()
-        mock_audio = MagicMock()
-        mock_audio.open.return_value = mock_stream
-
-        silent_chunk = np.zeros(512, dtype=np.int16).tobytes()
-        mock_stream.read.return_value = silent_chunk
-
-        mock_pyaudio.return_value = mock_audio
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = np.zeros(512, dtype=np.int16)
 
         # Call multiple times
         result1 = stt.has_voice_activity(timeout_seconds=0.01, energy_threshold=500)
@@ -175,9 +155,397 @@ class TestVoiceActivityDetection:
         assert isinstance(result2, bool)
         assert isinstance(result3, bool)
 
-        # Audio should be cleaned up each time
-        assert mock_stream.stop_stream.call_count >= 3
-        assert mock_stream.close.call_count >= 3
+        # Each call gets its own cursor on the one shared capture
+        assert mock_get_capture.return_value.open_cursor.call_count == 3
+
+
+class TestPreRoll:
+    """Tests for handing the audio that triggered VAD to the recognizer."""
+
+    @pytest.fixture(autouse=True)
+    def reset_speech_start(self):
+        stt.mark_speech_start(None)
+        yield
+        stt.mark_speech_start(None)
+
+    @patch('components.stt.get_capture')
+    def test_vad_marks_speech_start(self, mock_get_capture):
+        """Test that VAD records the start of the chunk that crossed the threshold."""
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = _tone(1000)
+        mock_cursor.position = 4096
+
+        assert stt.has_voice_activity(timeout_seconds=1.0, energy_threshold=500) is True
+        assert stt._speech_start_pos == 4096 - 512
+
+    @patch('components.stt.get_capture')
+    def test_vad_from_start_position(self, mock_get_capture):
+        """Test that VAD can listen from an earlier capture position, e.g. the wake word's end."""
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = _tone(1000)
+
+        assert stt.has_voice_activity(timeout_seconds=1.0, energy_threshold=500, start_position=1234) is True
+        mock_cursor.seek.assert_called_once_with(1234)
+        assert stt._speech_start_floor == 1234
+
+    @patch('components.stt.get_capture')
+    def test_vad_stops_on_event(self, mock_get_capture):
+        """Test that monitoring ends without detection once the stop event is set."""
+        import threading
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = np.zeros(512, dtype=np.int16)
+        stop = threading.Event()
+        stop.set()
+
+        assert stt.has_voice_activity(timeout_seconds=5.0, stop_event=stop) is False
+        mock_cursor.read.assert_not_called()
+
+    @patch('components.stt.get_engine')
+    @patch('components.stt.get_capture')
+    def test_transcription_starts_at_preroll(self, mock_get_capture, mock_get_engine):
+        """Test that transcription is fed the pre-roll window before the VAD trigger."""
+        from components.audio_capture import AudioCapture
+
+        capture = AudioCapture(buffer_seconds=2.0)
+        capture.ring.write(np.arange(16000, dtype=np.int16))
+        mock_get_capture.return_value = capture
+
+        recognizer = MagicMock()
+        recognizer.AcceptWaveform.return_value = True
+        recognizer.Result.return_value = '{"text": "hello"}'
+        mock_get_engine.return_value.acquire_recognizer.return_value = recognizer
+
+        stt.mark_speech_start(12000)
+        with patch('config.STT_PREROLL_MS', 100):
+            text = stt.transcribe_audio()
+
+        assert text == "hello"
+        first_feed = np.frombuffer(recognizer.AcceptWaveform.call_args_list[0][0][0], dtype=np.int16)
+        # 100 ms at 16 kHz = 1600 samples before the trigger, through the live edge
+        assert first_feed[0] == 12000 - 1600
+        assert first_feed[-1] == 15999
+        assert stt._speech_start_pos is None
+        mock_get_engine.return_value.release_recognizer.assert_called_once_with(recognizer, None)
+
+    @patch('components.stt.get_engine')
+    @patch('components.stt.get_capture')
+    def test_preroll_stops_at_wake_word_end(self, mock_get_capture, mock_get_engine):
+        """Test that follow-on speech right after the wake word is not pre-rolled into it."""
+        from components.audio_capture import AudioCapture
+
+        capture = AudioCapture(buffer_seconds=2.0)
+        capture.ring.write(np.arange(16000, dtype=np.int16))
+        mock_get_capture.return_value = capture
+
+        recognizer = MagicMock()
+        recognizer.AcceptWaveform.return_value = True
+        recognizer.Result.return_value = '{"text": "hello"}'
+        mock_get_engine.return_value.acquire_recognizer.return_value = recognizer
+
+        # Speech 20 ms after the wake word ended at 12000; the 100 ms pre-roll would reach 11920
+        stt.mark_speech_start(12320, floor=12000)
+        with patch('config.STT_PREROLL_MS', 100):
+            stt.transcribe_audio()
+
+        first_feed = np.frombuffer(recognizer.AcceptWaveform.call_args_list[0][0][0], dtype=np.int16)
+        assert first_feed[0] == 12000
+        assert stt._speech_start_floor is None
+
+
+def _buffered_capture(*blocks):
+    """Build an unstarted capture whose ring already holds the given sample blocks."""
+    from components.audio_capture import AudioCapture
+
+    capture = AudioCapture(buffer_seconds=5.0)
+    for block in blocks:
+        capture.ring.write(block)
+    return capture
+
+
+class TestEndpointing:
+    """Tests for silence-based endpointing and the max-utterance cap."""
+
+    @pytest.fixture
+    def recognizer(self):
+        with patch('components.stt.get_engine') as mock_get_engine:
+            recognizer = MagicMock()
+            recognizer.AcceptWaveform.return_value = False
+            recognizer.FinalResult.return_value = '{"text": "turn on the lights"}'
+            recognizer.PartialResult.return_value = '{"partial": ""}'
+            mock_get_engine.return_value.acquire_recognizer.return_value = recognizer
+            yield recognizer
+
+    @patch('components.stt.get_capture')
+    def test_trailing_silence_forces_final_result(self, mock_get_capture, recognizer):
+        """Test that trailing silence ends the utterance even if Vosk never finalizes."""
+        speech = _tone(2000, samples=8000)
+        silence = np.zeros(16000, dtype=np.int16)
+        capture = _buffered_capture(speech, silence)
+        mock_get_capture.return_value = capture
+        stt.mark_speech_start(0)
+
+        text = stt.transcribe_audio(endpoint_silence_ms=500, max_utterance_seconds=30.0)
+
+        assert text == "turn on the lights"
+        recognizer.FinalResult.assert_called_once()
+
+    @patch('components.stt.get_capture')
+    def test_max_utterance_caps_continuous_noise(self, mock_get_capture, recognizer):
+        """Test that continuous noise is cut off at the max utterance length."""
+        noise = _tone(2000, samples=32000)
+        mock_get_capture.return_value = _buffered_capture(noise)
+        stt.mark_speech_start(0)
+
+        text = stt.transcribe_audio(endpoint_silence_ms=500, max_utterance_seconds=1.0)
+
+        assert text == "turn on the lights"
+        recognizer.FinalResult.assert_called_once()
+
+    @patch('components.stt.get_capture')
+    def test_barge_in_threshold_not_kept_for_next_turn(self, mock_get_capture, recognizer):
+        """Test that the raised barge-in floor does not endpoint the following utterance early."""
+        import config
+        from components.vad import get_detector
+
+        # Barge-in: the user talks over playback, detected above the raised floor
+        mock_cursor = _mock_capture(mock_get_capture)
+        mock_cursor.read.return_value = _tone(3000)
+        assert stt.has_voice_activity(timeout_seconds=1.0, energy_threshold=1500) is True
+        assert get_detector().energy_threshold == config.VAD_ENERGY_THRESHOLD
+
+        # The command that follows is quieter than the barge-in floor but well above the normal one
+        speech = _tone(1000, samples=16000)
+        silence = np.zeros(16000, dtype=np.int16)
+        mock_get_capture.return_value = _buffered_capture(speech, silence)
+        stt.mark_speech_start(0)
+        detector = get_detector()
+        detector.energy_threshold = 1500  # a floor left behind by an interrupted monitor
+        speech_frames = []
+        classify = detector.classify
+
+        def record(samples):
+            states = classify(samples)
+            speech_frames.append(int(states.sum()))
+            return states
+
+        with patch.object(detector, 'classify', side_effect=record):
+            stt.transcribe_audio(endpoint_silence_ms=500, max_utterance_seconds=30.0)
+
+        # The endpointer heard the whole command as speech rather than as silence to cut off at
+        assert sum(speech_frames) >= len(speech) // detector.frame_length
+
+    def test_trailing_silence_counts_after_last_speech_frame(self):
+        """Test that silence is measured from the end of the last speech frame."""
+        states = np.array([True, True, False, False, False])
+
+        assert stt._trailing_silence(states, 256, silence_so_far=0) == 256 * 3
+        assert stt._trailing_silence(np.zeros(2, dtype=bool), 256, 100) == 100 + 512
+
+    def test_endpoint_settings_in_config(self):
+        """Test that endpointing is configurable per room."""
+        import config
+
+        assert config.STT_ENDPOINT_SILENCE_MS > 0
+        assert config.STT_MAX_UTTERANCE_SECONDS > 0
+
+
+class TestStreamingTranscription:
+    """Tests for the partial-result iterator."""
+
+    @patch('components.stt.get_engine')
+    @patch('components.stt.get_capture')
+    def test_yields_partials_then_final(self, mock_get_capture, mock_get_engine):
+        """Test that changing partial hypotheses are yielded before the final text."""
+        from components.audio_capture import AudioCapture
+
+        capture = AudioCapture(buffer_seconds=1.0)
+        mock_get_capture.return_value = capture
+
+        recognizer = MagicMock()
+        recognizer.AcceptWaveform.side_effect = [False, False, False, True]
+        recognizer.PartialResult.side_effect = [
+            '{"partial": "what"}',
+            '{"partial": "what"}',
+            '{"partial": "what time"}',
+        ]
+        recognizer.Result.return_value = '{"text": "what time is it"}'
+        mock_get_engine.return_value.acquire_recognizer.return_value = recognizer
+
+        def feed():
+            time.sleep(0.05)  # let the transcription cursor open at the live edge first
+            for _ in range(4):
+                capture.ring.write(np.zeros(stt.CHUNK, dtype=np.int16))
+                time.sleep(0.01)
+
+        with patch('config.STT_ENDPOINTING', False):
+            writer = threading.Thread(target=feed)
+            writer.start()
+            updates = list(stt.stream_transcription())
+            writer.join()
+
+        assert updates == [
+            stt.TranscriptUpdate("what", False),
+            stt.TranscriptUpdate("what time", False),
+            stt.TranscriptUpdate("what time is it", True),
+        ]
+        mock_get_engine.return_value.release_recognizer.assert_called_once_with(recognizer, None)
+
+    @patch('components.stt.stream_transcription')
+    def test_transcribe_audio_returns_final_text(self, mock_stream):
+        """Test that the blocking API returns only the final update."""
+        mock_stream.return_value = iter([
+            stt.TranscriptUpdate("hel", False),
+            stt.TranscriptUpdate("hello", True),
+        ])
+
+        assert stt.transcribe_audio() == "hello"
+
+
+class TestCommandGrammar:
+    """Tests for grammar-constrained command recognition with open fallback."""
+
+    @pytest.fixture(autouse=True)
+    def phrases(self):
+        saved = stt._command_phrases.copy()
+        stt._command_phrases.clear()
+        stt.register_command_phrases(["Stop", "goodbye", "volume up", "stop"])
+        yield
+        stt._command_phrases[:] = saved
+
+    @pytest.fixture
+    def engine(self):
+        with patch('components.stt.get_engine') as mock_get_engine:
+            grammar_rec = MagicMock(name="grammar")
+            open_rec = MagicMock(name="open")
+            for rec in (grammar_rec, open_rec):
+                rec.AcceptWaveform.return_value = False
+                rec.PartialResult.return_value = '{"partial": ""}'
+            mock_get_engine.return_value.acquire_recognizer.side_effect = (
+                lambda grammar=None: grammar_rec if grammar else open_rec
+            )
+            yield mock_get_engine.return_value, grammar_rec, open_rec
+
+    def test_register_normalizes_and_dedupes(self):
+        """Test that registered phrases are lower-cased and unique."""
+        assert stt.get_command_phrases() == ["stop", "goodbye", "volume up"]
+
+    @patch('components.stt.get_capture')
+    def test_command_recognized_by_grammar(self, mock_get_capture, engine):
+        """Test that a matching command is returned without open decoding."""
+        mock_engine, grammar_rec, open_rec = engine
+        grammar_rec.FinalResult.return_value = '{"text": "volume up"}'
+        mock_get_capture.return_value = _buffered_capture(_tone(2000, samples=4000), np.zeros(16000, dtype=np.int16))
+        stt.mark_speech_start(0)
+
+        text = stt.transcribe_audio(endpoint_silence_ms=300, commands_only=True)
+
+        assert text == "volume up"
+        assert mock_engine.acquire_recognizer.call_args_list[0][0][0] == ["stop", "goodbye", "volume up"]
+        assert not open_rec.AcceptWaveform.called
+
+    @patch('components.stt.get_capture')
+    def test_unk_falls_back_to_open_decoding(self, mock_get_capture, engine):
+        """Test that [unk] replays the utterance into an open-vocabulary recognizer."""
+        mock_engine, grammar_rec, open_rec = engine
+        grammar_rec.FinalResult.return_value = '{"text": "[unk]"}'
+        open_rec.FinalResult.return_value = '{"text": "what is the weather like"}'
+        mock_get_capture.return_value = _buffered_capture(_tone(2000, samples=4000), np.zeros(16000, dtype=np.int16))
+        stt.mark_speech_start(0)
+
+        text = stt.transcribe_audio(endpoint_silence_ms=300, commands_only=True)
+
+        assert text == "what is the weather like"
+        replayed = sum(len(c[0][0]) for c in open_rec.AcceptWaveform.call_args_list) // 2
+        fed = sum(len(c[0][0]) for c in grammar_rec.AcceptWaveform.call_args_list) // 2
+        assert replayed == fed
+        mock_engine.release_recognizer.assert_any_call(grammar_rec, ["stop", "goodbye", "volume up"])
+
+    @patch('components.stt.get_capture')
+    def test_open_decoding_when_disabled(self, mock_get_capture, engine):
+        """Test that command mode is opt-in."""
+        mock_engine, grammar_rec, open_rec = engine
+        open_rec.FinalResult.return_value = '{"text": "stop"}'
+        mock_get_capture.return_value = _buffered_capture(_tone(2000, samples=4000), np.zeros(16000, dtype=np.int16))
+        stt.mark_speech_start(0)
+
+        assert stt.transcribe_audio(endpoint_silence_ms=300, commands_only=False) == "stop"
+        assert not grammar_rec.AcceptWaveform.called
+
+
+class TestSTTEngine:
+    """Tests for the resident Vosk engine."""
+
+    @patch('components.stt_engine.KaldiRecognizer')
+    @patch('components.stt_engine.Model')
+    def test_model_loaded_once(self, mock_model, mock_recognizer):
+        """Test that the model is loaded a single time across utterances."""
+        engine = stt.STTEngine(model_path="model-dir")
+
+        for _ in range(3):
+            recognizer = engine.acquire_recognizer()
+            engine.release_recognizer(recognizer)
+
+        mock_model.assert_called_once_with("model-dir")
+        assert engine.is_loaded
+
+    @patch('components.stt_engine.KaldiRecognizer')
+    @patch('components.stt_engine.Model')
+    def test_recognizer_recycled(self, mock_model, mock_recognizer):
+        """Test that released recognizers are reset and handed out again."""
+        engine = stt.STTEngine()
+
+        first = engine.acquire_recognizer()
+        engine.release_recognizer(first)
+        second = engine.acquire_recognizer()
+
+        assert first is second
+        first.Reset.assert_called_once()
+        assert mock_recognizer.call_count == 1
+
+    @patch('components.stt_engine.KaldiRecognizer')
+    @patch('components.stt_engine.Model')
+    def test_recognizer_dropped_when_reset_fails(self, mock_model, mock_recognizer):
+        """Test that a recognizer that cannot be reset is not reused."""
+        engine = stt.STTEngine()
+
+        broken = engine.acquire_recognizer()
+        broken.Reset.side_effect = RuntimeError("reset failed")
+        engine.release_recognizer(broken)
+
+        assert engine.stats()["idle_recognizers"] == 0
+
+    @patch('components.stt_engine.Model')
+    def test_background_preload(self, mock_model):
+        """Test that preload loads the model off the calling thread."""
+        engine = stt.STTEngine()
+
+        engine.preload(background=True)
+        engine._load_thread.join(timeout=5)
+
+        assert engine.is_loaded
+        stats = engine.stats()
+        assert stats["load_seconds"] is not None
+        assert stats["load_rss_kb"] >= 0
+
+    @patch('components.stt_engine.KaldiRecognizer')
+    @patch('components.stt_engine.Model')
+    def test_grammar_recognizers_pooled_separately(self, mock_model, mock_recognizer):
+        """Test that grammar recognizers get the phrase list plus [unk] and their own pool."""
+        mock_recognizer.side_effect = lambda *args: MagicMock()
+        engine = stt.STTEngine()
+
+        grammar_rec = engine.acquire_recognizer(["stop", "goodbye"])
+        engine.release_recognizer(grammar_rec, ["stop", "goodbye"])
+        open_rec = engine.acquire_recognizer()
+
+        assert mock_recognizer.call_args_list[0][0][2] == '["goodbye", "stop", "[unk]"]'
+        assert len(mock_recognizer.call_args_list[1][0]) == 2
+        assert engine.acquire_recognizer(["goodbye", "stop"]) is grammar_rec
+        assert open_rec is not grammar_rec
+
+    def test_get_engine_is_process_wide(self):
+        """Test that get_engine returns the same instance every time."""
+        assert stt.get_engine() is stt.get_engine()
 
 
 class TestAudioSettings:
@@ -0,0 +1,223 @@
+"""
+Unit tests for stt_worker.py module (out-of-process decoding).
+"""
+
+import pytest
+import sys
+import os
+import json
+import queue
+import threading
+from unittest.mock import MagicMock, patch
+import numpy as np
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import stt_worker
+
+
+@pytest.fixture
+def ring():
+    ring = stt_worker.SharedPCMRing(8)
+    yield ring
+    ring.close()
+
+
+class TestSharedPCMRing:
+    """Tests for the shared-memory ring buffer."""
+
+    def test_attach_by_name_sees_writes(self, ring):
+        """Test that a second handle on the same segment reads what the owner wrote."""
+        reader = stt_worker.SharedPCMRing(8, name=ring.name)
+        try:
+            ring.write(np.arange(5, dtype=np.int16))
+
+            samples, start = reader.read(0, reader.write_pos)
+
+            assert reader.write_pos == 5
+            assert start == 0
+            assert samples.tolist() == [0, 1, 2, 3, 4]
+        finally:
+            reader.close()
+
+    def test_wraparound(self, ring):
+        """Test that reads spanning the end of the segment are stitched together."""
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.write(np.arange(6, 11, dtype=np.int16))
+
+        samples, start = ring.read(6, ring.write_pos)
+
+        assert samples.tolist() == [6, 7, 8, 9, 10]
+
+    def test_overrun_reports_skip(self, ring):
+        """Test that a reader a full buffer behind is moved to the oldest sample."""
+        ring.write(np.arange(12, dtype=np.int16))
+
+        samples, start = ring.read(0, ring.write_pos)
+
+        assert start == 4
+        assert samples.tolist() == list(range(4, 12))
+
+
+class _FakeRecognizer:
+    """Recognizer that reports how many samples it has been fed."""
+
+    def __init__(self):
+        self.samples = 0
+
+    def AcceptWaveform(self, data):
+        self.samples += len(data) // 2
+        return False
+
+    def PartialResult(self):
+        return json.dumps({"partial": f"{self.samples} samples"})
+
+    def FinalResult(self):
+        return json.dumps({"text": f"final {self.samples}"})
+
+
+class _EndpointingRecognizer(_FakeRecognizer):
+    """Recognizer whose own endpoint fires once it has heard `endpoint` samples."""
+
+    def __init__(self, endpoint):
+        super().__init__()
+        self.endpoint = endpoint
+
+    def AcceptWaveform(self, data):
+        super().AcceptWaveform(data)
+        return self.samples >= self.endpoint
+
+    def Result(self):
+        self.samples = 0
+        return json.dumps({"text": "what time is it"})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+
+class TestServeLoop:
+    """Tests for the worker loop, run on a thread with in-process queues."""
+
+    @pytest.fixture
+    def served(self, ring):
+        engine = MagicMock()
+        engine.acquire_recognizer.side_effect = lambda: _FakeRecognizer()
+        control = queue.Queue()
+        results = queue.Queue()
+        data_ready = threading.Event()
+        thread = threading.Thread(
+            target=stt_worker._serve, args=(ring, engine, control, results, data_ready), daemon=True
+        )
+        thread.start()
+        yield control, results, data_ready, engine
+        control.put(("stop",))
+        thread.join(timeout=2.0)
+
+    def test_partials_and_final(self, ring, served):
+        """Test that the worker posts partials as audio arrives and a final on request."""
+        control, results, data_ready, engine = served
+
+        control.put(("start", 1, ring.write_pos))
+        ring.write(np.zeros(4, dtype=np.int16))
+        data_ready.set()
+        assert results.get(timeout=2.0) == (1, "partial", "4 samples")
+
+        ring.write(np.zeros(2, dtype=np.int16))
+        control.put(("finalize", 1))
+        # Finalize drains audio written before it was requested
+        event = results.get(timeout=2.0)
+        while event[1] == "partial":
+            event = results.get(timeout=2.0)
+        assert event == (1, "final", "final 6")
+        engine.release_recognizer.assert_called_once()
+
+    def test_finalize_keeps_segment_from_last_drain(self, ring, served):
+        """Test that a segment Vosk finalizes while draining for finalize() is not lost."""
+        control, results, data_ready, engine = served
+        engine.acquire_recognizer.side_effect = lambda: _EndpointingRecognizer(endpoint=6)
+        worker = stt_worker.STTWorker("model-dir")
+        worker.ring, worker.control, worker._results, worker.data_ready = ring, control, results, data_ready
+        session = stt_worker.WorkerSession(worker, 1)
+
+        control.put(("start", 1, ring.write_pos))
+        # Written without waking the worker, so it is only drained when finalize() arrives
+        ring.write(np.zeros(6, dtype=np.int16))
+
+        assert session.finalize(timeout=2.0) == "what time is it"
+
+    def test_cancel_posts_nothing(self, ring, served):
+        """Test that a cancelled utterance releases its recognizer without a result."""
+        control, results, data_ready, engine = served
+
+        control.put(("start", 7, ring.write_pos))
+        control.put(("cancel", 7))
+        control.put(("stop",))
+
+        for _ in range(100):
+            if engine.release_recognizer.called:
+                break
+            threading.Event().wait(0.01)
+        assert engine.release_recognizer.called
+        assert results.empty()
+
+
+class TestSTTWorkerHandle:
+    """Tests for the parent-side handle."""
+
+    def test_begin_requires_running_worker(self):
+        """Test that sessions cannot be opened before the worker is started."""
+        worker = stt_worker.STTWorker("model-dir")
+
+        with pytest.raises(RuntimeError):
+            worker.begin()
+
+    def test_collect_filters_by_utterance(self):
+        """Test that stale results from earlier utterances are ignored."""
+        worker = stt_worker.STTWorker("model-dir")
+        worker._results = queue.Queue()
+        worker._results.put((1, "partial", "old"))
+        worker._results.put((2, "partial", "new"))
+
+        assert worker.collect(2) == [("partial", "new")]
+
+    def test_finalize_joins_earlier_results(self):
+        """Test that results posted before the final text are joined in front of it."""
+        worker = stt_worker.STTWorker("model-dir")
+        worker._results = queue.Queue()
+        worker.control = queue.Queue()
+        worker.data_ready = threading.Event()
+        worker._results.put((4, "partial", "what time"))
+        worker._results.put((4, "result", "what time is it"))
+        worker._results.put((4, "final", "please"))
+
+        assert stt_worker.WorkerSession(worker, 4).finalize(timeout=1.0) == "what time is it please"
+
+    def test_collect_raises_on_worker_error(self):
+        """Test that decode failures in the worker surface in the parent."""
+        worker = stt_worker.STTWorker("model-dir")
+        worker._results = queue.Queue()
+        worker._results.put((3, "error", "kaldi exploded"))
+
+        with pytest.raises(RuntimeError):
+            worker.collect(3)
+
+    def test_collect_ignores_stale_error(self):
+        """Test that an error from a cancelled utterance does not abort the next one."""
+        worker = stt_worker.STTWorker("model-dir")
+        worker._results = queue.Queue()
+        worker._results.put((3, "error", "kaldi exploded"))
+        worker._results.put((4, "partial", "hello"))
+
+        assert worker.collect(4) == [("partial", "hello")]
+
+    def test_ring_holds_longest_utterance(self):
+        """Test that the worker ring is sized from the utterance cap and pre-roll."""
+        from components import stt
+
+        with patch('config.STT_MAX_UTTERANCE_SECONDS', 15.0), patch('config.STT_PREROLL_MS', 300), \
+             patch.object(stt_worker.STTWorker, 'start'), patch.object(stt, '_worker', None), \
+             patch.object(stt, '_worker_failed', False):
+            worker = stt.get_worker()
+
+        assert worker.capacity >= int(16000 * 15.3)
@@ -0,0 +1,121 @@
+"""
+Unit tests for text_segmenter.py module (sentence splitting for streaming TTS).
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components.text_segmenter import SentenceSegmenter, segment_stream, split_sentences
+
+
+class TestSplitSentences:
+    """Tests for splitting complete text."""
+
+    def test_splits_on_sentence_punctuation(self):
+        """Test that ., ! and ? end segments."""
+        assert split_sentences("Hello there! How are you? I am fine.") == [
+            "Hello there!", "How are you?", "I am fine."
+        ]
+
+    def test_keeps_abbreviations_and_decimals(self):
+        """Test that titles, initials and numbers do not split a sentence."""
+        text = "Dr. Smith paid 3.50 dollars. J. R. R. Tolkien wrote it."
+
+        assert split_sentences(text) == ["Dr. Smith paid 3.50 dollars.", "J. R. R. Tolkien wrote it."]
+
+    def test_long_sentence_split_at_clause(self):
+        """Test that an over-long sentence is cut at a clause boundary before the limit."""
+        text = "This answer has a first clause, then a second clause that runs on for a while."
+
+        segments = split_sentences(text, max_chars=40)
+
+        assert segments[0] == "This answer has a first clause,"
+        assert all(len(segment) <= 40 for segment in segments)
+        assert " ".join(segments) == text
+
+    def test_empty_text(self):
+        """Test that blank text yields nothing to synthesize."""
+        assert split_sentences("   ") == []
+
+
+class TestSentenceSegmenter:
+    """Tests for incremental feeding."""
+
+    def test_sentence_emitted_once_boundary_seen(self):
+        """Test that a sentence is only emitted once text after it arrives."""
+        segmenter = SentenceSegmenter()
+
+        assert segmenter.feed("The capital is Paris.") == []
+        assert segmenter.feed(" It is") == ["The capital is Paris."]
+        assert segmenter.flush() == ["It is"]
+
+    def test_token_by_token(self):
+        """Test that tiny pieces, like streamed LLM tokens, produce whole sentences."""
+        segmenter = SentenceSegmenter()
+        segments = []
+        for token in ["Su", "re", ".", " Two", " plus", " two", " is", " four", ".", " Done"]:
+            segments += segmenter.feed(token)
+
+        assert segments == ["Sure.", "Two plus two is four."]
+        assert segmenter.flush() == ["Done"]
+
+
+class TestSegmentStream:
+    """Tests for segmenting a stream of tokens."""
+
+    def test_segments_follow_tokens(self):
+        """Test that a sentence is emitted as soon as the next token starts."""
+        emitted = []
+
+        def tokens():
+            for token in ["Hello", " there.", " How", " are", " you?"]:
+                emitted.append(token)
+                yield token
+
+        segments = segment_stream(tokens())
+
+        assert next(segments) == "Hello there."
+        assert emitted == ["Hello", " there.", " How"]
+        assert list(segments) == ["How are you?"]
+
+    def test_close_closes_source(self):
+        """Test that closing the segments closes the token source."""
+        closed = []
+
+        def tokens():
+            try:
+                while True:
+                    yield "More. "
+            finally:
+                closed.append(True)
+
+        segments = segment_stream(tokens())
+        next(segments)
+        segments.close()
+
+        assert closed == [True]
+
+    def test_cancel_stops_at_next_token(self):
+        """Test that a set cancel event ends the stream and closes the source."""
+        import threading
+        cancel = threading.Event()
+        pulled = []
+
+        def tokens():
+            for token in ["One.", " Two.", " Three", " four"]:
+                pulled.append(token)
+                yield token
+
+        source = tokens()
+        segments = segment_stream(source, cancel=cancel)
+        assert next(segments) == "One."
+        cancel.set()
+
+        # The unfinished text is dropped rather than flushed
+        assert list(segments) == []
+        assert pulled == ["One.", " Two."]
+        assert source.gi_frame is None
@@ -0,0 +1,339 @@
+"""
+Unit tests for tts.py module (persistent Orca engine and output stream).
+"""
+
+import pytest
+import sys
+import os
+import struct
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import tts
+from components.tts_cache import TTSCache
+
+
+@pytest.fixture
+def orca_env():
+    """Patch Orca and PyAudio creation."""
+    orca = MagicMock()
+    orca.sample_rate = 22050
+    orca.synthesize.return_value = ([1, -2, 3], [])
+    with patch('components.tts.pvorca.create', return_value=orca) as mock_create, \
+         patch('components.tts.pyaudio.PyAudio') as mock_pyaudio, \
+         patch('components.tts.TTS_CACHE_ENABLED', False), \
+         patch('components.tts.AUDIO_OUTPUT_CALLBACK', False):
+        stream = mock_pyaudio.return_value.open.return_value
+        yield mock_create, orca, mock_pyaudio, stream
+    tts._engine = None
+
+
+class TestTTSEngine:
+    """Tests for the long-lived engine."""
+
+    def test_engine_and_stream_reused(self, orca_env):
+        """Test that repeated utterances share one Orca engine and output stream."""
+        mock_create, orca, mock_pyaudio, stream = orca_env
+
+        tts.speak_text("Hello", streaming=False)
+        tts.speak_text("Goodbye", streaming=False)
+
+        assert mock_create.call_count == 1
+        assert mock_pyaudio.call_count == 1
+        assert mock_pyaudio.return_value.open.call_count == 1
+        assert stream.write.call_count == 2
+        stream.close.assert_not_called()
+        orca.delete.assert_not_called()
+
+    def test_pcm_written_as_int16(self, orca_env):
+        """Test that Orca's sample list reaches the stream as 16-bit PCM."""
+        _, _, _, stream = orca_env
+
+        tts.speak_text("Hello", streaming=False)
+
+        assert stream.write.call_args[0][0] == struct.pack("<hhh", 1, -2, 3)
+
+    def test_broken_stream_reopened(self, orca_env):
+        """Test that a failed write drops the stream and the next call opens a new one."""
+        _, _, mock_pyaudio, stream = orca_env
+        stream.write.side_effect = [OSError("device gone"), None]
+
+        tts.speak_text("Hello", streaming=False)
+        tts.speak_text("Hello again", streaming=False)
+
+        stream.close.assert_called_once()
+        assert mock_pyaudio.return_value.open.call_count == 2
+
+    def test_shutdown_releases_everything(self, orca_env):
+        """Test that shutdown closes the stream, PyAudio and Orca exactly once."""
+        _, orca, mock_pyaudio, stream = orca_env
+        tts.preload_tts()
+
+        tts.shutdown_tts()
+        tts.shutdown_tts()
+
+        stream.close.assert_called_once()
+        mock_pyaudio.return_value.terminate.assert_called_once()
+        orca.delete.assert_called_once()
+        assert tts._engine is None
+
+    def test_orca_error_printed(self, orca_env, capsys):
+        """Test that synthesis errors are reported without raising."""
+        _, orca, _, _ = orca_env
+        orca.synthesize.side_effect = tts.pvorca.OrcaError("bad text")
+
+        tts.speak_text("Hello", streaming=False)
+
+        assert "Orca error" in capsys.readouterr().out
+
+
+class TestStreamingSpeech:
+    """Tests for sentence-by-sentence synthesis overlapped with playback."""
+
+    def test_orca_stream_used_per_sentence(self, orca_env):
+        """Test that each sentence is fed to an Orca stream and the tail is flushed."""
+        _, orca, _, stream = orca_env
+        orca_stream = orca.stream_open.return_value
+        orca_stream.synthesize.side_effect = [[1, 1], None]
+        orca_stream.flush.return_value = [2]
+
+        tts.speak_text("First sentence. Second sentence.", streaming=True)
+
+        fed = [call_args[0][0].strip() for call_args in orca_stream.synthesize.call_args_list]
+        assert fed == ["First sentence.", "Second sentence."]
+        written = [call_args[0][0] for call_args in stream.write.call_args_list]
+        assert written == [struct.pack("<hh", 1, 1), struct.pack("<h", 2)]
+        orca_stream.close.assert_called_once()
+        orca.synthesize.assert_not_called()
+
+    def test_falls_back_without_stream_api(self, orca_env):
+        """Test that older Orca versions synthesize each sentence separately."""
+        mock_create, _, _, stream = orca_env
+        orca = MagicMock(spec=["synthesize", "sample_rate", "delete"])
+        orca.sample_rate = 22050
+        orca.synthesize.return_value = ([5], [])
+        mock_create.return_value = orca
+
+        tts.speak_text("One. Two. Three.", streaming=True)
+
+        assert orca.synthesize.call_count == 3
+        assert stream.write.call_count == 3
+
+    def test_next_sentence_synthesized_during_playback(self, orca_env):
+        """Test that sentence N+1 is synthesized while sentence N is still playing."""
+        _, orca, _, stream = orca_env
+        second_synthesized = threading.Event()
+        orca_stream = orca.stream_open.return_value
+        orca_stream.flush.return_value = None
+
+        def synthesize(text):
+            if "Second" in text:
+                second_synthesized.set()
+            return [1]
+
+        orca_stream.synthesize.side_effect = synthesize
+        overlapped = []
+
+        def write(data):
+            if not overlapped:
+                overlapped.append(second_synthesized.wait(timeout=2.0))
+
+        stream.write.side_effect = write
+
+        tts.speak_text("First sentence. Second sentence.", streaming=True)
+
+        assert overlapped == [True]
+
+    def test_synthesis_error_reported(self, orca_env, capsys):
+        """Test that a failure in the synthesis thread surfaces in speak_text()."""
+        _, orca, _, stream = orca_env
+        orca.stream_open.return_value.synthesize.side_effect = tts.pvorca.OrcaError("bad text")
+
+        tts.speak_text("Hello there.", streaming=True)
+
+        assert "Orca error" in capsys.readouterr().out
+        stream.write.assert_not_called()
+
+
+class TestCachedSpeech:
+    """Tests for playing repeated phrases from the TTS cache."""
+
+    @pytest.fixture
+    def engine(self, orca_env, tmp_path):
+        cache = TTSCache(max_memory_bytes=1024, directory=str(tmp_path / "cache"))
+        return tts.TTSEngine(access_key="key", cache=cache, cache_max_chars=50)
+
+    def test_repeated_phrase_synthesized_once(self, orca_env, engine):
+        """Test that the second time a phrase is spoken it comes from the cache."""
+        _, orca, _, stream = orca_env
+
+        engine.say("Goodbye!", streaming=False)
+        engine.say("Goodbye!", streaming=False)
+
+        assert orca.synthesize.call_count == 1
+        assert stream.write.call_args_list[0] == stream.write.call_args_list[1]
+        assert engine.cache.hits == 1
+
+    def test_streamed_phrase_cached_whole(self, orca_env, engine):
+        """Test that all streamed chunks of a phrase are stored as one entry."""
+        _, orca, _, stream = orca_env
+        orca_stream = orca.stream_open.return_value
+        orca_stream.synthesize.side_effect = [[1], [2]]
+        orca_stream.flush.return_value = [3]
+
+        engine.say("One. Two.", streaming=True)
+        engine.say("One. Two.", streaming=True)
+
+        assert orca.stream_open.call_count == 1
+        assert stream.write.call_args[0][0] == struct.pack("<hhh", 1, 2, 3)
+
+    def test_long_text_not_cached(self, orca_env, engine):
+        """Test that replies longer than the limit are always synthesized."""
+        _, orca, _, _ = orca_env
+        text = "This reply is much longer than fifty characters and will not repeat."
+
+        engine.say(text, streaming=False)
+        engine.say(text, streaming=False)
+
+        assert orca.synthesize.call_count == 2
+
+    def test_warm_cache_skips_stored_phrases(self, orca_env, engine):
+        """Test that warming only synthesizes phrases missing from the store."""
+        _, orca, _, stream = orca_env
+
+        assert engine.warm_cache(["Hello!", "Goodbye!"]) == 2
+        assert engine.warm_cache(["Hello!", "Goodbye!"]) == 0
+
+        assert orca.synthesize.call_count == 2
+        stream.write.assert_not_called()
+        # Fixed phrases are persisted right away
+        assert len(list(engine.cache.directory.glob("*.pcm"))) == 2
+
+
+class TestInterruptiblePlayback:
+    """Tests for background playback that can be cut off."""
+
+    def test_interrupt_stops_at_next_buffer(self, orca_env):
+        """Test that playback stops within one output buffer of an interrupt."""
+        _, orca, _, stream = orca_env
+        orca.synthesize.return_value = (list(range(100)), [])
+        engine = tts.TTSEngine(access_key="key", frames_per_buffer=10)
+        started = threading.Event()
+        release = threading.Event()
+
+        def write(data):
+            started.set()
+            release.wait(timeout=2.0)
+
+        stream.write.side_effect = write
+        playback = tts.Playback(engine, "A long reply", streaming=False)
+        assert started.wait(timeout=2.0)
+
+        playback.interrupt()
+        release.set()
+
+        assert playback.wait(timeout=2.0)
+        assert playback.interrupted
+        # 100 samples in buffers of 10 would take 10 writes
+        assert stream.write.call_count == 1
+
+    def test_interrupt_closes_text_generator(self, orca_env):
+        """Test that cancelling stops whatever is producing the text."""
+        _, orca, _, stream = orca_env
+        orca.stream_open.return_value.synthesize.return_value = [1]
+        orca.stream_open.return_value.flush.return_value = None
+        engine = tts.TTSEngine(access_key="key")
+        cancel = threading.Event()
+        closed = threading.Event()
+
+        def sentences():
+            try:
+                while True:
+                    yield "More text."
+            finally:
+                closed.set()
+
+        stream.write.side_effect = lambda data: cancel.set()
+
+        engine.speak_stream(sentences(), cancel=cancel)
+
+        # The synthesis thread closes the generator on its own after playback returns
+        assert closed.wait(timeout=2.0)
+        assert stream.write.call_count == 1
+
+    def test_cancel_does_not_wait_for_synthesis_thread(self, orca_env):
+        """Test that an interrupted stream returns at once and synthesizes nothing more."""
+        _, orca, _, stream = orca_env
+        orca_stream = orca.stream_open.return_value
+        orca_stream.synthesize.return_value = [1]
+        engine = tts.TTSEngine(access_key="key")
+        cancel = threading.Event()
+        release = threading.Event()
+
+        def sentences():
+            yield "First."
+            # The LLM is still generating the next sentence
+            release.wait(timeout=5.0)
+            yield "Second."
+
+        stream.write.side_effect = lambda data: cancel.set()
+
+        started = time.monotonic()
+        engine.speak_stream(sentences(), cancel=cancel)
+        assert time.monotonic() - started < 1.0
+
+        release.set()
+        for _ in range(200):
+            if orca_stream.close.called:
+                break
+            time.sleep(0.01)
+        orca_stream.close.assert_called_once()
+        assert orca_stream.synthesize.call_count == 1
+        orca_stream.flush.assert_not_called()
+
+    def test_start_speaking_returns_when_done(self, orca_env):
+        """Test that non-blocking playback signals completion."""
+        _, _, _, stream = orca_env
+
+        playback = tts.start_speaking("Hello", streaming=False)
+
+        assert playback.wait(timeout=2.0)
+        assert not playback.interrupted
+        assert stream.write.called
+
+
+class TestCallbackOutput:
+    """Tests for playback through the callback-mode jitter buffer."""
+
+    def test_say_returns_after_audio_played(self, orca_env):
+        """Test that an utterance is queued in the jitter buffer and drained by the callback."""
+        _, orca, mock_pyaudio, _ = orca_env
+        orca.synthesize.return_value = (list(range(1, 101)), [])
+        engine = tts.TTSEngine(access_key="key", frames_per_buffer=10, callback_output=True,
+                               target_latency_ms=1)
+        callback = []
+        played = []
+        stop = threading.Event()
+
+        def device():
+            while not stop.is_set():
+                if callback:
+                    data, _ = callback[0](None, 10, {}, 0)
+                    played.extend(v for v in struct.unpack("<10h", data) if v)
+                stop.wait(0.001)
+
+        mock_pyaudio.return_value.open.side_effect = lambda **kwargs: callback.append(kwargs["stream_callback"]) or MagicMock()
+        thread = threading.Thread(target=device)
+        thread.start()
+        try:
+            engine.say("Hello", streaming=False)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert played == list(range(1, 101))
+        assert isinstance(engine._stream, tts.AudioOutput)
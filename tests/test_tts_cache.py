@@ -0,0 +1,98 @@
+"""
+Unit tests for tts_cache.py module (LRU and on-disk PCM cache).
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components.tts_cache import TTSCache
+
+MODEL = "models/picovoice/orca_params_en_female.pv"
+
+
+class TestTTSCache:
+    """Tests for the two-level cache."""
+
+    def test_key_depends_on_model_and_rate(self):
+        """Test that the same text rendered differently gets different keys."""
+        base = TTSCache.key("Hello", MODEL, 22050)
+
+        assert TTSCache.key("Hello", MODEL, 16000) != base
+        assert TTSCache.key("Hello", "orca_params_en_male.pv", 22050) != base
+        assert TTSCache.key(" Hello ", MODEL, 22050) == base
+
+    def test_memory_hit_and_miss_counters(self):
+        """Test that lookups are counted."""
+        cache = TTSCache(max_memory_bytes=100)
+
+        assert cache.get("Hi", MODEL, 22050) is None
+        cache.put("Hi", MODEL, 22050, b"\x01\x00")
+
+        assert cache.get("Hi", MODEL, 22050) == b"\x01\x00"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction_by_size(self):
+        """Test that the least recently used entry goes when the byte bound is exceeded."""
+        cache = TTSCache(max_memory_bytes=8)
+        cache.put("a", MODEL, 22050, b"1111", persist=True)
+        cache.put("b", MODEL, 22050, b"2222", persist=True)
+        cache.get("a", MODEL, 22050)
+
+        cache.put("c", MODEL, 22050, b"3333", persist=True)
+
+        assert cache.get("b", MODEL, 22050) is None
+        assert cache.get("a", MODEL, 22050) == b"1111"
+        assert cache.stats()["memory_bytes"] == 8
+
+    def test_disk_store_survives_restart(self, tmp_path):
+        """Test that a new cache instance reads entries written by an earlier one."""
+        TTSCache(max_memory_bytes=100, directory=str(tmp_path)).put("Bye", MODEL, 22050, b"\x02\x00", persist=True)
+
+        cache = TTSCache(max_memory_bytes=100, directory=str(tmp_path))
+
+        assert cache.contains("Bye", MODEL, 22050)
+        assert cache.get("Bye", MODEL, 22050) == b"\x02\x00"
+        assert cache.disk_hits == 1
+        # Promoted to memory on the first disk hit
+        assert cache.get("Bye", MODEL, 22050) == b"\x02\x00"
+        assert cache.hits == 1
+
+    def test_disk_store_bounded(self, tmp_path):
+        """Test that the oldest files are removed once the store exceeds its bound."""
+        cache = TTSCache(max_memory_bytes=100, directory=str(tmp_path), max_disk_bytes=8)
+        cache.put("a", MODEL, 22050, b"1111", persist=True)
+        os.utime(tmp_path / f"{TTSCache.key('a', MODEL, 22050)}.pcm", (time.time() - 60,) * 2)
+        cache.put("b", MODEL, 22050, b"2222", persist=True)
+        cache.put("c", MODEL, 22050, b"3333", persist=True)
+
+        assert sorted(p.name for p in tmp_path.glob("*.pcm")) == sorted(
+            f"{TTSCache.key(t, MODEL, 22050)}.pcm" for t in ("b", "c")
+        )
+
+    def test_one_off_phrase_stays_in_memory(self, tmp_path):
+        """Test that a phrase spoken once is never written to disk."""
+        cache = TTSCache(max_memory_bytes=100, directory=str(tmp_path))
+
+        cache.put("It is 10:42", MODEL, 22050, b"\x03\x00")
+
+        assert cache.contains("It is 10:42", MODEL, 22050)
+        assert list(tmp_path.glob("*.pcm")) == []
+
+    def test_repeated_phrase_persisted(self, tmp_path):
+        """Test that a phrase served from memory a second time is written to disk once."""
+        cache = TTSCache(max_memory_bytes=100, directory=str(tmp_path))
+        cache.put("Sorry?", MODEL, 22050, b"\x04\x00")
+        path = tmp_path / f"{TTSCache.key('Sorry?', MODEL, 22050)}.pcm"
+
+        assert cache.get("Sorry?", MODEL, 22050) == b"\x04\x00"
+        assert path.read_bytes() == b"\x04\x00"
+
+        mtime = path.stat().st_mtime_ns
+        cache.get("Sorry?", MODEL, 22050)
+        assert path.stat().st_mtime_ns == mtime
@@ -0,0 +1,136 @@
+"""
+Unit tests for vad.py module (adaptive multi-feature VAD).
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import vad
+
+RATE = 16000
+
+
+def _tone(mean_abs, samples, freq=440.0):
+    """Voice-band sine whose mean absolute amplitude is `mean_abs`."""
+    t = np.arange(samples) / RATE
+    return (np.sin(2 * np.pi * freq * t) * mean_abs * np.pi / 2).astype(np.int16)
+
+
+def _white_noise(mean_abs, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(samples) * mean_abs * 1.25).astype(np.int16)
+
+
+@pytest.fixture
+def detector():
+    return vad.VoiceActivityDetector(energy_threshold=300, hangover_ms=64)
+
+
+class TestFeatures:
+    """Tests for the vectorized per-frame features."""
+
+    def test_tone_is_in_speech_band(self, detector):
+        """Test that a 440 Hz tone has low ZCR and most energy in the speech band."""
+        frames = _tone(1000, 1024).reshape(-1, detector.frame_length)
+        energy, zcr, band_ratio = detector.features(frames)
+
+        assert energy.shape == (4,)
+        assert np.allclose(energy, 1000, rtol=0.1)
+        assert np.all(zcr < 0.1)
+        assert np.all(band_ratio > 0.9)
+
+    def test_white_noise_has_high_zcr(self, detector):
+        """Test that broadband hiss has a high zero-crossing rate."""
+        frames = _white_noise(1000, 1024).reshape(-1, detector.frame_length)
+        _, zcr, band_ratio = detector.features(frames)
+
+        assert np.all(zcr > detector.max_zcr)
+        assert np.all(band_ratio < detector.min_band_ratio)
+
+    def test_dc_offset_has_no_band_energy(self, detector):
+        """Test that a DC offset carries no speech-band energy."""
+        frames = np.full((2, detector.frame_length), 2000, dtype=np.int16)
+        _, _, band_ratio = detector.features(frames)
+
+        assert np.all(band_ratio < 0.01)
+
+
+class TestClassification:
+    """Tests for frame decisions, smoothing and the adaptive noise floor."""
+
+    def test_detects_tone_above_threshold(self, detector):
+        """Test that voice-band audio above the threshold is speech."""
+        assert detector.is_speech(_tone(1000, 512)) is True
+
+    def test_rejects_quiet_audio(self, detector):
+        """Test that voice-band audio below the absolute threshold is not speech."""
+        assert detector.is_speech(_tone(100, 512)) is False
+
+    def test_rejects_loud_hiss_and_hum(self, detector):
+        """Test that loud non-speech noise does not trigger."""
+        assert detector.is_speech(_white_noise(3000, 2048)) is False
+        assert detector.is_speech(_tone(3000, 2048, freq=60.0)) is False
+
+    def test_noise_floor_raises_gate(self, detector):
+        """Test that a learned noise floor stops moderately loud audio from triggering."""
+        detector.calibrate(_tone(400, RATE))
+        assert detector.noise_floor == pytest.approx(400, rel=0.1)
+
+        # Same level as the background is no longer speech...
+        assert detector.is_speech(_tone(500, 512)) is False
+        # ...but speech well above it still is
+        assert detector.is_speech(_tone(2000, 512)) is True
+
+    def test_noise_floor_follows_quiet_background(self, detector):
+        """Test that the floor decays towards a quieter background."""
+        detector.noise_floor = 1000.0
+        detector.classify(np.zeros(RATE, dtype=np.int16))
+
+        assert detector.noise_floor < 1.0
+
+    def test_onset_requires_consecutive_frames(self):
+        """Test that a single loud frame does not start speech."""
+        detector = vad.VoiceActivityDetector(energy_threshold=300, onset_ms=48)
+        block = np.concatenate([_tone(1000, 256), np.zeros(512, dtype=np.int16)])
+
+        assert not detector.classify(block).any()
+
+    def test_hangover_bridges_short_pauses(self, detector):
+        """Test that the speech state is held for the hangover after speech stops."""
+        states = detector.classify(np.concatenate([
+            _tone(1000, 512),
+            np.zeros(256 * 6, dtype=np.int16),
+        ]))
+
+        # Speech starts once the 32 ms onset is met; 64 ms hangover = 4 more frames of 16 ms
+        assert states.tolist() == [False, True, True, True, True, True, False, False]
+
+    def test_partial_frames_are_carried_over(self, detector):
+        """Test that samples short of a full frame are kept for the next block."""
+        assert len(detector.classify(_tone(1000, 300))) == 1
+        assert len(detector.classify(_tone(1000, 212))) == 1
+
+    def test_reset_keeps_noise_floor(self, detector):
+        """Test that reset clears speech state but not the learned floor."""
+        detector.calibrate(_tone(200, RATE))
+        detector.classify(_tone(2000, 512))
+        floor = detector.noise_floor
+
+        detector.reset()
+
+        assert detector.in_speech is False
+        assert detector.noise_floor == floor
+
+
+def test_get_detector_is_process_wide():
+    """Test that the detector (and its noise floor) is shared across turns."""
+    vad._detector = None
+    try:
+        assert vad.get_detector() is vad.get_detector()
+    finally:
+        vad._detector = None
@@ -0,0 +1,367 @@
+"""
+Unit tests for wake_word.py module (persistent Porcupine detector).
+"""
+
+import pytest
+import sys
+import os
+import ctypes
+import json
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+# Add parent directory to path to import components
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from components import wake_word
+
+KEYWORDS = [
+    wake_word.WakeKeyword("jarvis", "jarvis.ppn", "conversation"),
+    wake_word.WakeKeyword("computer", "computer.ppn", "command"),
+]
+
+
+def _frames():
+    """Build a cursor whose reads feed Porcupine silent frames."""
+    cursor = MagicMock()
+    cursor.position = 0
+
+    def read_into(out, timeout=None):
+        out[:] = cursor.position % 100
+        cursor.position += len(out)
+        return True
+
+    cursor.read_into.side_effect = read_into
+    return cursor
+
+
+@pytest.fixture
+def porcupine():
+    """Patch Porcupine creation and the shared capture."""
+    instance = MagicMock()
+    instance.sample_rate = 16000
+    instance.frame_length = 512
+    capture = MagicMock()
+    capture.rate = 16000
+    capture.open_cursor.side_effect = lambda *args, **kwargs: _frames()
+    with patch('components.wake_word.pvporcupine.create', return_value=instance) as mock_create, \
+         patch('components.wake_word.get_capture', return_value=capture):
+        yield mock_create, instance, capture
+    wake_word._detector = None
+
+
+class TestWakeWordDetector:
+    """Tests for the long-lived detector."""
+
+    def test_porcupine_created_once_across_cycles(self, porcupine):
+        """Test that re-arming reuses the same Porcupine instance."""
+        mock_create, instance, capture = porcupine
+        instance.process.side_effect = [-1, 0, -1, -1, 0]
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+
+        for _ in range(2):
+            detector.arm()
+            assert detector.wait() == 0
+            detector.disarm()
+
+        assert mock_create.call_count == 1
+        assert capture.open_cursor.call_count == 2
+        instance.delete.assert_not_called()
+
+    def test_records_detection_position(self, porcupine):
+        """Test that the capture position of the detection is kept for later stages."""
+        _, instance, _ = porcupine
+        instance.process.side_effect = [-1, -1, 0]
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+
+        detector.arm()
+        detector.wait()
+
+        assert detector.last_detection_pos == 3 * 512
+
+    def test_disarm_stops_listening(self, porcupine):
+        """Test that a disarmed detector holds no capture cursor."""
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+
+        detector.arm()
+        assert detector.armed
+        detector.disarm()
+
+        assert not detector.armed
+
+    def test_rate_mismatch_rejected(self, porcupine):
+        """Test that arming fails when the capture runs at the wrong rate."""
+        _, _, capture = porcupine
+        capture.rate = 44100
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+
+        with pytest.raises(ValueError):
+            detector.arm()
+
+    def test_delete_releases_porcupine(self, porcupine):
+        """Test that delete() frees the native instance exactly once."""
+        _, instance, _ = porcupine
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+        detector.arm()
+
+        detector.delete()
+        detector.delete()
+
+        instance.delete.assert_called_once()
+
+
+class TestFrameHandling:
+    """Tests for the preallocated frame path."""
+
+    @staticmethod
+    def _native_porcupine(process_func):
+        """Build a Porcupine object around a fake native process function."""
+        import pvporcupine
+        instance = object.__new__(pvporcupine.Porcupine)
+        instance._frame_length = 4
+        instance._sample_rate = 16000
+        instance._handle = object()
+        instance._process_func = process_func
+        return instance
+
+    def test_native_call_reads_bound_buffer(self, porcupine):
+        """Test that frames reach the C function through one reused buffer."""
+        mock_create, _, _ = porcupine
+        seen = []
+
+        def process_func(handle, pcm, result):
+            seen.append((ctypes.addressof(pcm.contents), [pcm[i] for i in range(4)]))
+            ctypes.cast(result, ctypes.POINTER(ctypes.c_int))[0] = 0 if len(seen) == 2 else -1
+            return instance.PicovoiceStatuses.SUCCESS
+
+        instance = self._native_porcupine(process_func)
+        mock_create.return_value = instance
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+
+        detector.arm()
+        assert detector.wait() == 0
+
+        assert seen[0][0] == seen[1][0]
+        assert seen[1][1] == [4, 4, 4, 4]
+
+    def test_native_error_raises_porcupine_exception(self, porcupine):
+        """Test that a failing native call surfaces through Porcupine.process()."""
+        mock_create, _, _ = porcupine
+        instance = self._native_porcupine(lambda *args: instance.PicovoiceStatuses.INVALID_STATE)
+        mock_create.return_value = instance
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+
+        with patch.object(type(instance), 'process', side_effect=RuntimeError("processing failed")) as process:
+            detector.arm()
+            with pytest.raises(RuntimeError):
+                detector.wait()
+
+        frame = process.call_args[0][0]
+        assert isinstance(frame, np.ndarray) and frame.dtype == np.int16
+
+    def test_missing_internals_fall_back_to_process(self, porcupine):
+        """Test that a Porcupine without the expected internals is driven through process()."""
+        import pvporcupine
+        mock_create, _, _ = porcupine
+        instance = object.__new__(pvporcupine.Porcupine)
+        instance._frame_length = 4
+        instance._sample_rate = 16000
+        mock_create.return_value = instance
+        detector = wake_word.WakeWordDetector("key", KEYWORDS)
+
+        with patch.object(type(instance), 'process', side_effect=[-1, 0]) as process:
+            detector.arm()
+            assert detector.wait() == 0
+
+        assert process.call_count == 2
+        frame = process.call_args[0][0]
+        assert isinstance(frame, np.ndarray) and frame.dtype == np.int16
+
+
+class TestWaitForWakeWord:
+    """Tests for the module-level wrapper."""
+
+    def test_singleton_reused(self, porcupine):
+        """Test that consecutive calls share one detector and leave it disarmed."""
+        mock_create, instance, _ = porcupine
+        instance.process.return_value = 0
+        with patch.object(wake_word, 'PICOVOICE_ACCESS_KEY', 'real-key'), \
+             patch.object(wake_word, 'configured_keywords', return_value=KEYWORDS):
+            assert wake_word.wait_for_wake_word() == 0
+            assert wake_word.wait_for_wake_word() == 0
+            detector = wake_word.get_wake_word_detector()
+
+        assert mock_create.call_count == 1
+        assert not detector.armed
+
+        wake_word.shutdown_wake_word()
+        instance.delete.assert_called_once()
+        assert wake_word._detector is None
+
+    def test_returns_detected_keyword(self, porcupine):
+        """Test that the detected index maps back to its keyword and mode."""
+        mock_create, instance, _ = porcupine
+        instance.process.side_effect = [-1, 1]
+        with patch.object(wake_word, 'PICOVOICE_ACCESS_KEY', 'real-key'), \
+             patch.object(wake_word, 'configured_keywords', return_value=KEYWORDS):
+            index = wake_word.wait_for_wake_word()
+
+        assert index == 1
+        assert wake_word.get_wake_keyword(index).mode == "command"
+        assert mock_create.call_args.kwargs["keyword_paths"] == ["jarvis.ppn", "computer.ppn"]
+
+    def test_no_detection_has_no_keyword(self):
+        """Test that a failed wait maps to no keyword."""
+        assert wake_word.get_wake_keyword(None) is None
+
+
+class TestKeywordConfiguration:
+    """Tests for parsing the keyword configuration."""
+
+    def test_parse_builtin_keywords_with_modes(self):
+        """Test that built-in keywords resolve in order with their modes."""
+        keywords = wake_word.parse_wake_words("jarvis=conversation, Computer=command")
+
+        assert [k.label for k in keywords] == ["jarvis", "Computer"]
+        assert [k.mode for k in keywords] == ["conversation", "command"]
+        assert keywords[1].path == wake_word.pvporcupine.KEYWORD_PATHS["computer"]
+
+    def test_parse_defaults_to_conversation(self):
+        """Test that an entry without a mode starts a conversation."""
+        keywords = wake_word.parse_wake_words("jarvis")
+
+        assert keywords[0].mode == "conversation"
+
+    def test_parse_custom_ppn(self, tmp_path):
+        """Test that .ppn paths are accepted and labelled by file name."""
+        path = tmp_path / "hey-buddy.ppn"
+        path.write_bytes(b"")
+
+        keywords = wake_word.parse_wake_words(f"{path}=command")
+
+        assert keywords == [wake_word.WakeKeyword("hey-buddy", str(path), "command")]
+
+    def test_parse_rejects_unknown_mode(self):
+        """Test that typos in the mode are reported at startup."""
+        with pytest.raises(ValueError):
+            wake_word.parse_wake_words("jarvis=chat")
+
+    def test_parse_rejects_unknown_keyword(self):
+        """Test that keywords Porcupine does not ship are reported."""
+        with pytest.raises(ValueError):
+            wake_word.parse_wake_words("not-a-keyword")
+
+    def test_legacy_single_keyword(self):
+        """Test that without WAKE_WORDS the single configured keyword is used."""
+        with patch.object(wake_word, 'WAKE_WORDS', None), \
+             patch.object(wake_word, 'WAKE_WORD_CUSTOM_PATH', None), \
+             patch.object(wake_word, 'WAKE_WORD_NAME', 'jarvis'):
+            keywords = wake_word.configured_keywords()
+
+        assert keywords == [wake_word.WakeKeyword("jarvis", wake_word.pvporcupine.KEYWORD_PATHS["jarvis"])]
+
+
+class TestWakeWordVerifier:
+    """Tests for the second-stage check on buffered audio."""
+
+    @pytest.fixture
+    def verifier_env(self):
+        """Provide a capture holding 2 s of audio and a mocked Vosk engine."""
+        from components.audio_capture import AudioCapture
+
+        capture = AudioCapture(buffer_seconds=5.0)
+        capture.ring.write(np.zeros(32000, dtype=np.int16))
+        recognizer = MagicMock()
+        with patch('components.wake_word.get_capture', return_value=capture), \
+             patch('components.stt.get_engine') as mock_get_engine:
+            mock_get_engine.return_value.acquire_recognizer.return_value = recognizer
+            yield capture, mock_get_engine.return_value, recognizer
+
+    def test_accepts_confident_keyword(self, verifier_env):
+        """Test that a keyword heard with enough confidence is accepted."""
+        _, engine, recognizer = verifier_env
+        recognizer.FinalResult.return_value = json.dumps(
+            {"result": [{"word": "jarvis", "conf": 0.92}], "text": "jarvis"}
+        )
+        verifier = wake_word.WakeWordVerifier(window_ms=1000, min_confidence=0.6)
+
+        assert verifier.verify(KEYWORDS[0], 32000) is True
+        assert (verifier.accepted, verifier.rejected) == (1, 0)
+        grammar = engine.acquire_recognizer.call_args[0][0]
+        assert "jarvis" in grammar
+        # One second of audio ending at the detection is decoded
+        assert len(recognizer.AcceptWaveform.call_args[0][0]) == 16000 * 2
+        engine.release_recognizer.assert_called_once_with(recognizer, grammar)
+
+    def test_rejects_unknown_audio(self, verifier_env):
+        """Test that audio Vosk cannot match to the keyword is rejected."""
+        _, _, recognizer = verifier_env
+        recognizer.FinalResult.return_value = json.dumps(
+            {"result": [{"word": "[unk]", "conf": 1.0}], "text": "[unk]"}
+        )
+        verifier = wake_word.WakeWordVerifier()
+
+        assert verifier.verify(KEYWORDS[0], 32000) is False
+        assert (verifier.accepted, verifier.rejected) == (0, 1)
+
+    def test_rejects_low_confidence(self, verifier_env):
+        """Test that a weak keyword match is below the threshold."""
+        _, _, recognizer = verifier_env
+        recognizer.FinalResult.return_value = json.dumps(
+            {"result": [{"word": "jarvis", "conf": 0.3}], "text": "jarvis"}
+        )
+
+        assert wake_word.WakeWordVerifier(min_confidence=0.6).verify(KEYWORDS[0], 32000) is False
+
+    def test_errors_accept(self, verifier_env):
+        """Test that a broken STT model does not block wake-ups."""
+        _, engine, _ = verifier_env
+        engine.acquire_recognizer.side_effect = RuntimeError("model missing")
+        verifier = wake_word.WakeWordVerifier()
+
+        assert verifier.verify(KEYWORDS[0], 32000) is True
+        assert verifier.accepted == 1
+
+    def test_out_of_vocabulary_words_left_out(self, verifier_env):
+        """Test that keyword words Vosk does not know are dropped from the grammar."""
+        _, engine, recognizer = verifier_env
+        engine.load.return_value.vosk_model_find_word.side_effect = lambda word: -1 if word == "buddy" else 7
+        recognizer.FinalResult.return_value = json.dumps(
+            {"result": [{"word": "hey", "conf": 0.9}], "text": "hey"}
+        )
+        keyword = wake_word.WakeKeyword("hey-buddy", "x.ppn")
+
+        assert wake_word.WakeWordVerifier().verify(keyword, 32000) is True
+        assert engine.acquire_recognizer.call_args[0][0] == ["hey", "hey"]
+
+    def test_keyword_outside_vocabulary_accepted(self, verifier_env):
+        """Test that a keyword Vosk cannot spell is accepted without decoding."""
+        _, engine, recognizer = verifier_env
+        engine.load.return_value.vosk_model_find_word.return_value = -1
+        verifier = wake_word.WakeWordVerifier()
+
+        assert verifier.verify(KEYWORDS[0], 32000) is True
+        assert verifier.verify(KEYWORDS[0], 32000) is True
+        assert verifier.accepted == 2
+        engine.acquire_recognizer.assert_not_called()
+        engine.load.return_value.vosk_model_find_word.assert_called_once_with("jarvis")
+
+    def test_keyword_words_from_custom_label(self):
+        """Test that custom keyword labels are split into words."""
+        keyword = wake_word.WakeKeyword("hey-buddy_en", "x.ppn")
+
+        assert wake_word.WakeWordVerifier.keyword_words(keyword) == ["hey", "buddy", "en"]
+
+    def test_rejected_hit_keeps_listening(self, porcupine):
+        """Test that a rejected detection does not end wait_for_wake_word()."""
+        _, instance, _ = porcupine
+        instance.process.side_effect = [0, -1, 1]
+        verifier = MagicMock()
+        verifier.verify.side_effect = [False, True]
+        with patch.object(wake_word, 'PICOVOICE_ACCESS_KEY', 'real-key'), \
+             patch.object(wake_word, 'configured_keywords', return_value=KEYWORDS), \
+             patch.object(wake_word, 'get_wake_word_verifier', return_value=verifier):
+            assert wake_word.wait_for_wake_word() == 1
+
+        assert verifier.verify.call_count == 2
+        assert verifier.verify.call_args[0][0] == KEYWORDS[1]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# tools/batch_transcribe.py
+
+"""
+CLI tool for re-transcribing a corpus of recorded WAV utterances with Vosk.
+
+Files are decoded across all cores with a process pool; each worker process
+loads the Vosk model once and reuses it for every file it is handed. Results
+are written as JSONL, one object per file, with the decode time and real-time
+factor (decode seconds / audio seconds).
+
+Usage:
+    python tools/batch_transcribe.py recordings/                  # Print JSONL to stdout
+    python tools/batch_transcribe.py recordings/ -o results.jsonl # Write JSONL to a file
+    python tools/batch_transcribe.py recordings/ -j 2             # Limit to 2 worker processes
+    python tools/batch_transcribe.py recordings/ --model models/vosk-model-en-us-0.22
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path to import components
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from vosk import KaldiRecognizer
+
+from components.stt_engine import MODEL_PATH, STTEngine
+
+READ_FRAMES = 4000  # Frames handed to the recognizer per AcceptWaveform call
+
+# Per-process engine, created by the pool initializer
+_engine = None
+_recognizers = {}
+
+
+def _init_worker(model_path: str) -> None:
+    """Pool initializer: load one resident model per worker process."""
+    global _engine
+    _engine = STTEngine(model_path=model_path)
+    _engine.load()
+
+
+def find_wav_files(directory: Path) -> list[Path]:
+    """Return all .wav files under `directory`, sorted for stable output."""
+    return sorted(p for p in directory.rglob("*") if p.suffix.lower() == ".wav" and p.is_file())
+
+
+def _recognizer_for(sample_rate: int) -> KaldiRecognizer:
+    """Return this worker's recognizer for `sample_rate`, reset for a new file."""
+    recognizer = _recognizers.get(sample_rate)
+    if recognizer is None:
+        recognizer = KaldiRecognizer(_engine.load(), sample_rate)
+        _recognizers[sample_rate] = recognizer
+    else:
+        recognizer.Reset()
+    return recognizer
+
+
+def transcribe_file(path: Path) -> dict:
+    """
+    Transcribe one WAV file with this worker's resident model.
+
+    Args:
+        path: Path to a 16-bit mono PCM WAV file
+
+    Returns:
+        Result dictionary with the transcript and timing, or an 'error' key
+    """
+    result = {"file": str(path)}
+    try:
+        with wave.open(str(path), "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getcomptype() != "NONE":
+                result["error"] = "expected 16-bit mono PCM WAV"
+                return result
+
+            sample_rate = wav.getframerate()
+            audio_seconds = wav.getnframes() / sample_rate
+            recognizer = _recognizer_for(sample_rate)
+
+            segments = []
+            start = time.perf_counter()
+            while True:
+                data = wav.readframes(READ_FRAMES)
+                if not data:
+                    break
+                if recognizer.AcceptWaveform(data):
+                    segments.append(json.loads(recognizer.Result()).get("text", ""))
+            segments.append(json.loads(recognizer.FinalResult()).get("text", ""))
+            decode_seconds = time.perf_counter() - start
+    except (wave.Error, EOFError, OSError) as e:
+        result["error"] = str(e)
+        return result
+
+    result.update({
+        "text": " ".join(segment for segment in segments if segment),
+        "audio_seconds": round(audio_seconds, 3),
+        "decode_seconds": round(decode_seconds, 3),
+        "rtf": round(decode_seconds / audio_seconds, 4) if audio_seconds else None,
+    })
+    return result
+
+
+def run_batch(files: list[Path], model_path: str, jobs: int):
+    """
+    Yield results for `files` in input order.
+
+    With jobs == 1 everything runs in this process, which is handy for debugging.
+    """
+    if jobs == 1:
+        _init_worker(model_path)
+        yield from map(transcribe_file, files)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs,
+                             initializer=_init_worker,
+                             initargs=(model_path,)) as pool:
+        # Small chunks keep all workers busy when file lengths vary a lot
+        yield from pool.map(transcribe_file, files, chunksize=4)
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Transcribe a directory of WAV files with Vosk across all cores"
+    )
+    parser.add_argument(
+        "directory",
+        type=Path,
+        help="Directory searched recursively for .wav files"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        help="Write JSONL results to this file (default: stdout)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: number of CPU cores)"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=MODEL_PATH,
+        help=f"Path to the Vosk model directory (default: {MODEL_PATH})"
+    )
+
+    args = parser.parse_args()
+
+    if not args.directory.is_dir():
+        print(f"Error: Directory not found: {args.directory}", file=sys.stderr)
+        sys.exit(1)
+
+    files = find_wav_files(args.directory)
+    if not files:
+        print(f"No .wav files found under {args.directory}", file=sys.stderr)
+        sys.exit(0)
+
+    jobs = max(1, min(args.jobs, len(files)))
+    print(f"Transcribing {len(files)} file(s) with {jobs} worker(s)...", file=sys.stderr)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    total_audio = 0.0
+    total_decode = 0.0
+    failures = 0
+    wall_start = time.perf_counter()
+    try:
+        for result in run_batch(files, args.model, jobs):
+            out.write(json.dumps(result) + "\n")
+            if "error" in result:
+                failures += 1
+                print(f"Warning: {result['file']}: {result['error']}", file=sys.stderr)
+            else:
+                total_audio += result["audio_seconds"]
+                total_decode += result["decode_seconds"]
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = time.perf_counter() - wall_start
+    print(f"Done: {len(files) - failures} transcribed, {failures} failed, "
+          f"{total_audio:.1f}s audio in {wall:.1f}s wall", file=sys.stderr)
+    if total_audio:
+        print(f"Aggregate RTF: {total_decode / total_audio:.3f} per worker, "
+              f"{wall / total_audio:.3f} wall-clock", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# tools/pcm_benchmark.py
+
+"""
+Benchmark PCM conversion of synthesized speech.
+
+Compares the per-sample conversion speak_text() used to do (recursive
+flatten, int() per sample, struct.pack) with the vectorized to_int16()
+conversion, on realistic reply lengths in the shapes Orca can return.
+
+Usage:
+    python tools/pcm_benchmark.py                   # 20 s replies at 22050 Hz
+    python tools/pcm_benchmark.py --seconds 60      # Longer replies
+    python tools/pcm_benchmark.py --rate 16000 -n 10
+"""
+
+import argparse
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import components
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from components.pcm import pcm_to_bytes
+
+
+def legacy_pcm_to_bytes(pcm):
+    """The original per-sample conversion from speak_text(), kept for comparison."""
+    if isinstance(pcm, (bytes, bytearray)):
+        return bytes(pcm)
+
+    def _flatten(items):
+        if isinstance(items, dict):
+            for value in items.values():
+                yield from _flatten(value)
+            return
+        for sample in items:
+            if isinstance(sample, (list, tuple)):
+                yield from _flatten(sample)
+            else:
+                yield sample
+
+    sequence = pcm.tolist() if hasattr(pcm, "tolist") else pcm
+    pcm_ints = []
+    for sample in _flatten(sequence):
+        if isinstance(sample, (bytes, bytearray)):
+            pcm_ints.extend(struct.unpack("<" + "h" * (len(sample) // 2), sample))
+        else:
+            try:
+                pcm_ints.append(int(sample))
+            except (TypeError, ValueError):
+                continue
+    return struct.pack("<" + "h" * len(pcm_ints), *pcm_ints)
+
+
+def _speech_like(seconds: float, rate: int) -> np.ndarray:
+    """Amplitude-modulated harmonics, roughly the level and spread of TTS output."""
+    t = np.arange(int(seconds * rate)) / rate
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720, 1440)))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    return (voice * envelope * 6000).astype(np.int16)
+
+
+def _time(func, pcm, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(pcm)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compare per-sample and vectorized PCM conversion"
+    )
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=20.0,
+        help="Length of the synthesized reply in seconds (default: 20)"
+    )
+    parser.add_argument(
+        "--rate",
+        type=int,
+        default=22050,
+        help="Sample rate in Hz (default: 22050, Orca's rate)"
+    )
+    parser.add_argument(
+        "-n", "--repeat",
+        type=int,
+        default=5,
+        help="Runs per case; the fastest is reported (default: 5)"
+    )
+
+    args = parser.parse_args()
+
+    samples = _speech_like(args.seconds, args.rate)
+    chunk = args.rate // 2
+    cases = {
+        "list[int]": samples.tolist(),
+        "int16 array": samples,
+        "float64 array": samples.astype(np.float64),
+        "nested chunks": [samples[i:i + chunk].tolist() for i in range(0, len(samples), chunk)],
+    }
+
+    print(f"{args.seconds:.0f}s reply, {len(samples)} samples at {args.rate} Hz (best of {args.repeat})")
+    print(f"{'input':<15} {'legacy':>10} {'vectorized':>12} {'speed-up':>10}")
+    for name, pcm in cases.items():
+        assert legacy_pcm_to_bytes(pcm) == pcm_to_bytes(pcm), name
+        legacy = _time(legacy_pcm_to_bytes, pcm, args.repeat)
+        vectorized = _time(pcm_to_bytes, pcm, args.repeat)
+        print(f"{name:<15} {legacy * 1000:8.1f}ms {vectorized * 1000:10.2f}ms {legacy / vectorized:9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
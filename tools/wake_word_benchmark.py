@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# tools/wake_word_benchmark.py
+
+"""
+Micro-benchmark for the idle wake-word loop.
+
+Replays synthetic microphone audio through the shared capture ring buffer and
+measures the CPU time spent per Porcupine frame with two frame-handling paths:
+
+    legacy     read bytes, struct.unpack_from() into a tuple, Porcupine.process()
+    zero-copy  read into the detector's preallocated buffer, native call on it
+
+The result is reported as CPU microseconds per frame and as the share of one
+core used when frames arrive in real time (sample_rate / frame_length per
+second), which is what the device pays while it sits waiting for the wake word.
+
+Without an access key Porcupine is replaced by a no-op engine so only the
+frame-handling overhead is measured; with --access-key the real engine runs.
+
+Usage:
+    python tools/wake_word_benchmark.py                       # Frame handling only
+    python tools/wake_word_benchmark.py --seconds 120         # Longer run
+    python tools/wake_word_benchmark.py --access-key KEY      # Include Porcupine itself
+"""
+
+import argparse
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import components
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pvporcupine
+
+from components.audio_capture import CaptureCursor, RingBuffer
+from components.wake_word import WakeKeyword, WakeWordDetector
+
+
+def _null_porcupine(frame_length: int = 512, sample_rate: int = 16000) -> pvporcupine.Porcupine:
+    """
+    Porcupine object whose native process function does nothing.
+
+    Both paths still pay exactly what they would in front of the real engine
+    (Porcupine.process() builds its ctypes copy, the zero-copy path passes a
+    pointer), only the keyword search itself is left out.
+    """
+    porcupine = object.__new__(pvporcupine.Porcupine)
+    porcupine._frame_length = frame_length
+    porcupine._sample_rate = sample_rate
+    porcupine._handle = None
+    porcupine._process_func = lambda handle, pcm, result: pvporcupine.Porcupine.PicovoiceStatuses.SUCCESS
+    porcupine._delete_func = lambda handle: None
+    return porcupine
+
+
+def _fill_ring(seconds: float, sample_rate: int) -> RingBuffer:
+    """Return a ring holding `seconds` of low-level noise, like a quiet room."""
+    samples = int(seconds * sample_rate)
+    ring = RingBuffer(samples)
+    rng = np.random.default_rng(0)
+    ring.write(rng.normal(0, 200, samples).astype(np.int16))
+    return ring
+
+
+def bench_legacy(porcupine, ring: RingBuffer) -> tuple[int, float]:
+    """Run the original per-frame unpack path over the whole ring."""
+    cursor = CaptureCursor(ring, 0)
+    frame_length = porcupine.frame_length
+    frames = ring.write_pos // frame_length
+    start = time.process_time()
+    for _ in range(frames):
+        pcm = cursor.read_bytes(frame_length, timeout=0)
+        pcm = struct.unpack_from("h" * frame_length, pcm)
+        porcupine.process(pcm)
+    return frames, time.process_time() - start
+
+
+def bench_zero_copy(detector: WakeWordDetector, ring: RingBuffer) -> tuple[int, float]:
+    """Run the detector's preallocated-buffer path over the whole ring."""
+    cursor = CaptureCursor(ring, 0)
+    frame = detector._frame
+    process_frame = detector._process_frame
+    frames = ring.write_pos // len(frame)
+    start = time.process_time()
+    for _ in range(frames):
+        cursor.read_into(frame, timeout=0)
+        process_frame()
+    return frames, time.process_time() - start
+
+
+def _report(name: str, frames: int, cpu_seconds: float, frames_per_second: float) -> None:
+    per_frame_us = cpu_seconds / frames * 1e6
+    idle_cpu = per_frame_us * frames_per_second / 1e6 * 100
+    print(f"{name:<10} {per_frame_us:8.2f} us/frame  {idle_cpu:6.3f}% of one core at real time")
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Measure idle CPU of the wake-word frame loop"
+    )
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=60.0,
+        help="Seconds of synthetic audio to replay per path (default: 60)"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per path; the fastest is reported (default: 3)"
+    )
+    parser.add_argument(
+        "--access-key",
+        type=str,
+        help="Picovoice access key; benchmarks the real Porcupine engine when set"
+    )
+    parser.add_argument(
+        "--keyword",
+        type=str,
+        default="jarvis",
+        help="Built-in keyword to load with --access-key (default: jarvis)"
+    )
+
+    args = parser.parse_args()
+
+    if args.access_key:
+        keyword = WakeKeyword(args.keyword, pvporcupine.KEYWORD_PATHS[args.keyword])
+        detector = WakeWordDetector(args.access_key, [keyword])
+        porcupine = detector._ensure_created()
+        engine = f"Porcupine ({args.keyword})"
+    else:
+        porcupine = _null_porcupine()
+        detector = WakeWordDetector(None, [])
+        detector._porcupine = porcupine
+        detector._bind_frame()
+        engine = "no-op engine (frame handling only)"
+
+    ring = _fill_ring(args.seconds, porcupine.sample_rate)
+    frames_per_second = porcupine.sample_rate / porcupine.frame_length
+    print(f"Replaying {args.seconds:.0f}s of audio, {frames_per_second:.2f} frames/s, {engine}")
+
+    try:
+        legacy = min((bench_legacy(porcupine, ring) for _ in range(args.repeat)), key=lambda r: r[1])
+        zero_copy = min((bench_zero_copy(detector, ring) for _ in range(args.repeat)), key=lambda r: r[1])
+    finally:
+        detector.delete()
+
+    _report("legacy", *legacy, frames_per_second)
+    _report("zero-copy", *zero_copy, frames_per_second)
+    if zero_copy[1]:
+        print(f"Speed-up: {legacy[1] / zero_copy[1]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()